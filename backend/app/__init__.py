@@ -1,6 +1,6 @@
 from flask import Flask, render_template, flash, redirect, request, url_for, jsonify
 from flask_wtf.csrf import CSRFError
-from app.extensions import db, migrate, csrf
+from app.extensions import db, migrate, csrf, audit_writer, image_fetcher
 from app.config import Config
 from werkzeug.middleware.proxy_fix import ProxyFix
 from sqlalchemy.exc import SQLAlchemyError, OperationalError, ProgrammingError
@@ -18,6 +18,13 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
+    audit_writer.init_app(app)
+    image_fetcher.init_app(app)
+
+    from app.utils.jobs import job_runner
+    job_runner.init_app(app)
+    from app.utils.notifications import notification_hub
+    notification_hub.init_app(app)
 
     # Normalize and create upload folders so Render can mount a persistent disk there.
     upload_root = app.config['UPLOAD_FOLDER']
@@ -176,12 +183,18 @@ def create_app(config_class=Config):
             'website_images',
             'website_loan_inquiries',
             'website_order_requests',
+            'website_order_items',
+            'loan_installments',
+            'portfolio_snapshots',
             'website_settings',
             'rate_limit_states',
             'daily_briefings',
             'briefing_dismissals',
             'chat_messages',
             'ocr_extractions',
+            'maintenance_watermarks',
+            'background_jobs',
+            'ai_narration_cache',
         }
         has_app_tables = bool(app_tables.intersection(tables))
         has_alembic = 'alembic_version' in tables
@@ -210,7 +223,7 @@ def create_app(config_class=Config):
 
     @app.cli.command('db-doctor')
     def db_doctor():
-        """Verify the PostgreSQL schema has all expected tables and columns.
+        """Verify the PostgreSQL schema has all expected tables, columns, sequences and indexes.
 
         Checks for production-critical objects introduced by migrations.
         Exits 0 if everything is present, 1 if anything is missing.
@@ -236,6 +249,12 @@ def create_app(config_class=Config):
             'briefing_dismissals',
             'chat_messages',
             'ocr_extractions',
+            'maintenance_watermarks',
+            'background_jobs',
+            'ai_narration_cache',
+            'website_order_items',
+            'loan_installments',
+            'portfolio_snapshots',
         ]
 
         # Required columns  (table, column)
@@ -246,10 +265,59 @@ def create_app(config_class=Config):
             ('loans', 'interest_mode'),
             ('loans', 'monthly_interest_amount'),
             ('website_loan_inquiries', 'finance_client_id'),
+            ('website_order_requests', 'total_amount'),
+            ('website_order_requests', 'item_count'),
+            ('website_order_requests', 'product_types'),
+        ]
+
+        # Required sequences (reference number allocators)
+        required_sequences = [
+            'boutique_sale_ref_seq',
+            'boutique_hire_ref_seq',
+            'hardware_sale_ref_seq',
+        ]
+
+        # Required indexes  (table, index) - hot-path filters and the rate limiter lookup
+        required_indexes = [
+            ('boutique_stock', 'ix_boutique_stock_active_quantity'),
+            ('boutique_stock', 'ix_boutique_stock_low_stock'),
+            ('boutique_sales', 'ix_boutique_sales_live_sale_date'),
+            ('boutique_sales', 'ix_boutique_sales_open_credit'),
+            ('boutique_sale_items', 'ix_boutique_sale_items_sale_id'),
+            ('hardware_stock', 'ix_hardware_stock_active_quantity'),
+            ('hardware_stock', 'ix_hardware_stock_low_stock'),
+            ('hardware_sales', 'ix_hardware_sales_live_sale_date'),
+            ('hardware_sales', 'ix_hardware_sales_open_credit'),
+            ('hardware_sale_items', 'ix_hardware_sale_items_sale_id'),
+            ('loans', 'ix_loans_live_status_balance'),
+            ('loans', 'ix_loans_client_id'),
+            ('loans', 'ix_loans_live_issue_date_id'),
+            ('loan_clients', 'ix_loan_clients_active_name_id'),
+            ('customers', 'ix_customers_name_id'),
+            ('loan_payments', 'ix_loan_payments_live_payment_date'),
+            ('loan_payments', 'ix_loan_payments_loan_id'),
+            ('group_loans', 'ix_group_loans_live_status_balance'),
+            ('group_loan_payments', 'ix_group_loan_payments_live_payment_date'),
+            ('group_loan_payments', 'ix_group_loan_payments_group_loan_id'),
+            ('audit_logs', 'ix_audit_logs_created_at'),
+            ('audit_logs', 'ix_audit_logs_username_created_at'),
+            ('rate_limit_states', 'uq_rate_limit_scope_identifier'),
+            ('background_jobs', 'ix_background_jobs_claim'),
+            ('background_jobs', 'uq_background_jobs_active_dedupe'),
+            ('ai_narration_cache', 'uq_ai_narration_cache_key'),
+            ('website_order_requests', 'ix_website_order_requests_active_types'),
+            ('website_order_items', 'ix_website_order_items_order_id'),
+            ('loan_installments', 'ix_loan_installments_due_date_status'),
+            ('loan_installments', 'ix_loan_installments_open_due_date'),
+            ('loan_installments', 'ix_loan_installments_loan_id'),
+            ('loan_installments', 'ix_loan_installments_group_loan_id'),
+            ('portfolio_snapshots', 'uq_portfolio_snapshot_date_type'),
         ]
 
         missing_tables = []
         missing_columns = []
+        missing_indexes = []
+        missing_sequences = []
         ok_count = 0
 
         for table in required_tables:
@@ -273,6 +341,31 @@ def create_app(config_class=Config):
                 missing_columns.append((table, column))
                 click.echo(click.style(f'  MISS column {table}.{column}', fg='red'))
 
+        sequences = set(inspector.get_sequence_names())
+        for sequence in required_sequences:
+            if sequence in sequences:
+                ok_count += 1
+                click.echo(click.style(f'  OK   seq    {sequence}', fg='green'))
+            else:
+                missing_sequences.append(sequence)
+                click.echo(click.style(f'  MISS seq    {sequence}', fg='red'))
+
+        index_cache = {}
+        for table, index in required_indexes:
+            if table not in tables:
+                missing_indexes.append((table, index))
+                click.echo(click.style(f'  MISS index  {table}.{index} (table missing)', fg='red'))
+                continue
+            if table not in index_cache:
+                index_cache[table] = {i['name'] for i in inspector.get_indexes(table)}
+                index_cache[table].update(u['name'] for u in inspector.get_unique_constraints(table))
+            if index in index_cache[table]:
+                ok_count += 1
+                click.echo(click.style(f'  OK   index  {table}.{index}', fg='green'))
+            else:
+                missing_indexes.append((table, index))
+                click.echo(click.style(f'  MISS index  {table}.{index}', fg='red'))
+
         # Check Alembic version
         click.echo('')
         if 'alembic_version' in tables:
@@ -286,10 +379,11 @@ def create_app(config_class=Config):
             click.echo(click.style('No alembic_version table — migrations have never run.', fg='yellow'))
 
         click.echo('')
-        total = len(required_tables) + len(required_columns)
-        if missing_tables or missing_columns:
+        total = len(required_tables) + len(required_columns) + len(required_sequences) + len(required_indexes)
+        if missing_tables or missing_columns or missing_sequences or missing_indexes:
             click.echo(click.style(
-                f'FAIL: {len(missing_tables)} tables and {len(missing_columns)} columns missing '
+                f'FAIL: {len(missing_tables)} tables, {len(missing_columns)} columns, '
+                f'{len(missing_sequences)} sequences and {len(missing_indexes)} indexes missing '
                 f'({ok_count}/{total} checks passed).',
                 fg='red', bold=True,
             ))
@@ -333,4 +427,92 @@ def create_app(config_class=Config):
         db.session.commit()
         click.echo(f'Manager account "{username}" created successfully.')
 
+    @app.cli.command('refresh-loans')
+    @click.option('--force', is_flag=True, help='Run even if today is already marked as refreshed')
+    def refresh_loans(force):
+        """Bring loan accrual and overdue status up to today (safe to schedule)."""
+        from app.modules.finance import refresh_active_loans
+        from app.utils.timezone import get_local_today
+
+        today = get_local_today()
+        changed = refresh_active_loans(today, force=force)
+        if changed:
+            click.echo(f'Loan state refreshed as of {today.isoformat()}.')
+        else:
+            click.echo(f'Loan state already current as of {today.isoformat()}.')
+
+    @app.cli.command('portfolio-snapshot')
+    @click.option('--date', 'target_date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Snapshot date (default: today, EAT)')
+    @click.option('--backfill-days', type=click.IntRange(0, 366), default=0,
+                  help='Also rebuild the snapshots for this many days before it')
+    def portfolio_snapshot(target_date, backfill_days):
+        """Store the day's portfolio-at-risk figures for the trend report (safe to schedule)."""
+        from datetime import timedelta
+        from app.modules.finance import refresh_active_loans
+        from app.utils.portfolio_risk import record_portfolio_snapshots
+        from app.utils.timezone import get_local_today
+
+        day = target_date.date() if target_date else get_local_today()
+        refresh_active_loans()
+        for offset in range(backfill_days, -1, -1):
+            snapshot_date = day - timedelta(days=offset)
+            results = record_portfolio_snapshots(snapshot_date)
+            total = results['individual'] + results['group']
+            click.echo(f'{snapshot_date.isoformat()}: {total.loan_count} loans outstanding, '
+                       f'PAR30 {total.par_ratio(30):.1f}%')
+
+    @app.cli.command('loan-schedules-rebuild')
+    def loan_schedules_rebuild():
+        """Regenerate every loan's installment schedule from its terms and payments (safe to re-run)."""
+        from app.utils.loan_schedule import rebuild_all_schedules
+
+        loans, group_loans = rebuild_all_schedules()
+        click.echo(f'Rebuilt installment schedules for {loans} loans and {group_loans} group loans.')
+
+    @app.cli.command('briefings-precompute')
+    @click.option('--date', 'target_date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Briefing date (default: today, EAT)')
+    @click.option('--refresh', is_flag=True, help='Recompute briefings that are already stored')
+    @click.option('--narration', type=click.Choice(['defer', 'inline', 'skip']), default='defer',
+                  help='Queue AI summaries as jobs (default), write them now, or skip them')
+    def briefings_precompute(target_date, refresh, narration):
+        """Build every scope's morning briefing ahead of the first login (safe to schedule)."""
+        from app.utils.briefing_engine import precompute_briefings
+        from app.utils.timezone import get_local_today
+
+        day = target_date.date() if target_date else get_local_today()
+        results = precompute_briefings(day, narration=narration, refresh=refresh)
+        failed = 0
+        for scope, branch, status in results:
+            label = f'{scope}/{branch}' if branch else scope
+            if status.startswith('failed'):
+                failed += 1
+                click.echo(click.style(f'  FAIL  {label}: {status}', fg='red'))
+            else:
+                click.echo(f'  {status.upper():6} {label}')
+        click.echo(f'Briefings for {day.isoformat()}: {len(results) - failed} ready, {failed} failed.')
+        if failed:
+            raise SystemExit(1)
+
+    @app.cli.command('worker')
+    @click.option('--once', is_flag=True, help='Run the jobs that are due now, then exit')
+    @click.option('--kind', 'kinds', multiple=True, help='Only run jobs of this kind (repeatable)')
+    @click.option('--poll-interval', type=float, default=None, help='Seconds to sleep when the queue is empty')
+    @click.option('--max-jobs', type=int, default=None, help='Exit after running this many jobs')
+    def worker(once, kinds, poll_interval, max_jobs):
+        """Run queued background jobs (AI narration, etc.) until stopped."""
+        from app.utils.jobs import default_worker_id, load_handlers, work
+
+        worker_id = default_worker_id()
+        handlers = sorted(load_handlers())
+        click.echo(f'Worker {worker_id} handling: {", ".join(kinds or handlers)}')
+        try:
+            processed = work(worker_id=worker_id, kinds=list(kinds) or None, once=once,
+                             poll_seconds=poll_interval, max_jobs=max_jobs)
+        except KeyboardInterrupt:
+            click.echo('Stopping worker.')
+            return
+        click.echo(f'Ran {processed} job(s).')
+
     return app
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 from sqlalchemy.engine import URL
@@ -140,3 +141,63 @@ class Config:
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/uploads')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 5242880))  # 5MB
     ALLOWED_EXTENSIONS = {'pdf', 'jpg', 'jpeg', 'png', 'gif', 'webp'}
+
+    # Audit log: 'async' batches rows on a background thread, 'sync' commits each row inline
+    AUDIT_LOG_MODE = os.getenv('AUDIT_LOG_MODE', 'async').strip().lower()
+    AUDIT_LOG_BATCH_SIZE = _env_int('AUDIT_LOG_BATCH_SIZE', 50)
+    AUDIT_LOG_FLUSH_SECONDS = _env_int('AUDIT_LOG_FLUSH_SECONDS', 2)
+
+    # Reference numbers reserved per worker per sequence round-trip (1 = dense, ordered numbers)
+    REFERENCE_BLOCK_SIZE = _env_int('REFERENCE_BLOCK_SIZE', 1)
+
+    # Seconds a worker trusts its cached website settings before re-checking updated_at
+    SITE_SETTINGS_CACHE_SECONDS = _env_int('SITE_SETTINGS_CACHE_SECONDS', 30)
+
+    # Rendered storefront pages: server-side lifetime per worker (0 disables), pages kept
+    # per worker (least recently used evicted first) and browser max-age
+    STOREFRONT_CACHE_SECONDS = _env_int('STOREFRONT_CACHE_SECONDS', 120)
+    STOREFRONT_CACHE_MAX_ENTRIES = _env_int('STOREFRONT_CACHE_MAX_ENTRIES', 32)
+    STOREFRONT_BROWSER_MAX_AGE = _env_int('STOREFRONT_BROWSER_MAX_AGE', 30)
+
+    # Manager chat: seconds a worker reuses the business snapshot behind open-ended questions
+    # (0 disables), and whether yesterday's totals come from the stored morning briefing
+    CHAT_SNAPSHOT_CACHE_SECONDS = _env_int('CHAT_SNAPSHOT_CACHE_SECONDS', 60)
+    CHAT_SNAPSHOT_FROM_BRIEFING = _env_bool('CHAT_SNAPSHOT_FROM_BRIEFING', True)
+
+    # Shared chat narration cache: seconds a narrative is reused for identical data (0 disables)
+    # and rows kept in ai_narration_cache (least recently used trimmed first)
+    AI_NARRATION_CACHE_SECONDS = _env_int('AI_NARRATION_CACHE_SECONDS', 900)
+    AI_NARRATION_CACHE_MAX_ENTRIES = _env_int('AI_NARRATION_CACHE_MAX_ENTRIES', 500)
+
+    # Background product image search: worker threads, queue bound, attempts and seconds between searches
+    IMAGE_FETCH_WORKERS = _env_int('IMAGE_FETCH_WORKERS', 2)
+    IMAGE_FETCH_MAX_PENDING = _env_int('IMAGE_FETCH_MAX_PENDING', 200)
+    IMAGE_FETCH_MAX_ATTEMPTS = _env_int('IMAGE_FETCH_MAX_ATTEMPTS', 3)
+    IMAGE_FETCH_MIN_INTERVAL = float(os.environ.get('IMAGE_FETCH_MIN_INTERVAL', '1.0'))
+
+    # Background jobs: run them in a thread inside each web worker (disable when a `flask worker`
+    # service runs, or list the kinds it keeps, comma-separated; empty means every kind), lease
+    # length before an unfinished job is retried, attempts and retry backoff
+    JOBS_EMBEDDED_WORKER = _env_bool('JOBS_EMBEDDED_WORKER', True)
+    JOBS_EMBEDDED_KINDS = [kind.strip() for kind in os.getenv('JOBS_EMBEDDED_KINDS', '').split(',') if kind.strip()]
+    JOBS_VISIBILITY_TIMEOUT = _env_int('JOBS_VISIBILITY_TIMEOUT', 300)
+    JOBS_MAX_ATTEMPTS = _env_int('JOBS_MAX_ATTEMPTS', 3)
+    JOBS_RETRY_BACKOFF_SECONDS = _env_int('JOBS_RETRY_BACKOFF_SECONDS', 30)
+    JOBS_POLL_SECONDS = _env_int('JOBS_POLL_SECONDS', 2)
+
+    # Seconds an OCR upload waits for a worker to pick up its job before falling back to manual review
+    OCR_QUEUE_TIMEOUT_SECONDS = _env_int('OCR_QUEUE_TIMEOUT_SECONDS', 90)
+
+    # Staff order/inquiry push notifications: SSE streams per worker (each holds a thread)
+    # and seconds before a stream closes and the browser reconnects; other tabs poll
+    NOTIFY_STREAM_ENABLED = _env_bool('NOTIFY_STREAM_ENABLED', True)
+    NOTIFY_STREAM_MAX_CLIENTS = _env_int('NOTIFY_STREAM_MAX_CLIENTS', 2)
+    NOTIFY_STREAM_SECONDS = _env_int('NOTIFY_STREAM_SECONDS', 55)
+
+    # Rate limiting: 'sqlite' (shared by workers on this host), 'memory' (per worker)
+    # or 'database' (durable rate_limit_states table)
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'sqlite').strip().lower()
+    RATE_LIMIT_SQLITE_PATH = os.getenv(
+        'RATE_LIMIT_SQLITE_PATH',
+        os.path.join(tempfile.gettempdir(), 'denove_rate_limits.sqlite3'),
+    )
@@ -1,7 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
+from app.utils.audit import AuditLogWriter
+from app.utils.image_fetch import ImageFetchExecutor
 
 db = SQLAlchemy()
 migrate = Migrate()
 csrf = CSRFProtect()
+audit_writer = AuditLogWriter()
+image_fetcher = ImageFetchExecutor()
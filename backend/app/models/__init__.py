@@ -11,22 +11,25 @@ from app.models.hardware import (
 )
 from app.models.finance import (
     LoanClient, Loan, LoanPayment,
-    GroupLoan, GroupLoanPayment, LoanDocument
+    GroupLoan, GroupLoanPayment, LoanDocument, LoanInstallment, PortfolioSnapshot
 )
 from app.models.website import (
-    WebsiteLoanInquiry, WebsiteOrderRequest,
+    WebsiteLoanInquiry, WebsiteOrderRequest, WebsiteOrderItem,
     PublishedProduct, WebsiteImage
 )
 from app.models.ai import (
-    DailyBriefing, BriefingDismissal, ChatMessage, OcrExtraction
+    DailyBriefing, BriefingDismissal, ChatMessage, NarrationCacheEntry, OcrExtraction
 )
+from app.models.system import MaintenanceWatermark, BackgroundJob
 
 __all__ = [
     'Customer', 'User', 'AuditLog',
     'BoutiqueCategory', 'BoutiqueStock', 'BoutiqueSale', 'BoutiqueSaleItem', 'BoutiqueCreditPayment',
     'HardwareCategory', 'HardwareStock', 'HardwareSale', 'HardwareSaleItem', 'HardwareCreditPayment',
-    'LoanClient', 'Loan', 'LoanPayment', 'GroupLoan', 'GroupLoanPayment', 'LoanDocument',
-    'WebsiteLoanInquiry', 'WebsiteOrderRequest', 'PublishedProduct', 'WebsiteImage',
-    'DailyBriefing', 'BriefingDismissal', 'ChatMessage', 'OcrExtraction',
+    'LoanClient', 'Loan', 'LoanPayment', 'GroupLoan', 'GroupLoanPayment', 'LoanDocument', 'LoanInstallment',
+    'PortfolioSnapshot',
+    'WebsiteLoanInquiry', 'WebsiteOrderRequest', 'WebsiteOrderItem', 'PublishedProduct', 'WebsiteImage',
+    'DailyBriefing', 'BriefingDismissal', 'ChatMessage', 'NarrationCacheEntry', 'OcrExtraction',
+    'MaintenanceWatermark', 'BackgroundJob',
 ]
 
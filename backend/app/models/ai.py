@@ -49,6 +49,26 @@ class ChatMessage(db.Model):
     created_at = db.Column(db.DateTime, default=get_local_now)
 
 
+class NarrationCacheEntry(db.Model):
+    """AI narration reused for identical (intent, data, model) requests."""
+    __tablename__ = 'ai_narration_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), nullable=False)  # sha256 of intent + model + payload
+    intent = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100))
+    narrative = db.Column(db.Text, nullable=False)
+    hit_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=get_local_now)
+    last_used_at = db.Column(db.DateTime, default=get_local_now)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('cache_key', name='uq_ai_narration_cache_key'),
+        db.Index('ix_ai_narration_cache_last_used_at', 'last_used_at'),
+    )
+
+
 class OcrExtraction(db.Model):
     """Stores OCR extraction results for user review before save."""
     __tablename__ = 'ocr_extractions'
@@ -65,7 +85,7 @@ class OcrExtraction(db.Model):
     corrected_fields_json = db.Column(db.Text)  # user-corrected final values
     used_ai = db.Column(db.Boolean, default=False, nullable=False)
     fallback_reason = db.Column(db.String(100))
-    status = db.Column(db.String(20), default='pending')  # 'pending', 'reviewed', 'confirmed', 'failed'
+    status = db.Column(db.String(20), default='pending')  # 'processing', 'pending', 'reviewed', 'confirmed', 'failed'
     reviewed_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     reviewed_at = db.Column(db.DateTime)
     linked_entity = db.Column(db.String(50))  # 'customer', 'loan_client', 'loan_document'
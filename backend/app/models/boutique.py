@@ -38,6 +38,13 @@ class BoutiqueStock(db.Model):
 
     category = db.relationship('BoutiqueCategory', backref='stock_items')
 
+    __table_args__ = (
+        db.Index('ix_boutique_stock_active_quantity', 'quantity',
+                 postgresql_where=db.text('is_active = true')),
+        db.Index('ix_boutique_stock_low_stock', 'quantity',
+                 postgresql_where=db.text('is_active = true AND quantity <= low_stock_threshold')),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -79,6 +86,13 @@ class BoutiqueSale(db.Model):
     customer = db.relationship('Customer', backref='boutique_sales', foreign_keys=[customer_id])
     items = db.relationship('BoutiqueSaleItem', backref='sale', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_boutique_sales_live_sale_date', 'sale_date', 'branch',
+                 postgresql_where=db.text('is_deleted = false')),
+        db.Index('ix_boutique_sales_open_credit', 'sale_date',
+                 postgresql_where=db.text("is_deleted = false AND payment_type = 'part' AND is_credit_cleared = false")),
+    )
+
     def to_dict(self, include_items=False):
         data = {
             'id': self.id,
@@ -110,6 +124,10 @@ class BoutiqueSaleItem(db.Model):
     is_other_item = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=get_local_now)
 
+    __table_args__ = (
+        db.Index('ix_boutique_sale_items_sale_id', 'sale_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -15,6 +15,10 @@ class Customer(db.Model):
     business_type = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=get_local_now)
 
+    __table_args__ = (
+        db.Index('ix_customers_name_id', 'name', 'id'),
+    )
+
     @property
     def nin(self):
         if self.nin_encrypted:
@@ -22,6 +22,11 @@ class LoanClient(db.Model):
 
     loans = db.relationship('Loan', backref='client', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_loan_clients_active_name_id', 'name', 'id',
+                 postgresql_where=db.text('is_active = true')),
+    )
+
     @property
     def payer_status_label(self):
         return {
@@ -90,6 +95,17 @@ class Loan(db.Model):
     payments = db.relationship('LoanPayment', backref='loan', lazy='dynamic')
     documents = db.relationship('LoanDocument', backref='loan', lazy='dynamic',
                                primaryjoin='Loan.id==LoanDocument.loan_id')
+    installments = db.relationship('LoanInstallment', backref='loan', lazy='dynamic',
+                                   primaryjoin='Loan.id==LoanInstallment.loan_id',
+                                   order_by='LoanInstallment.installment_no')
+
+    __table_args__ = (
+        db.Index('ix_loans_live_status_balance', 'status', 'balance',
+                 postgresql_where=db.text('is_deleted = false')),
+        db.Index('ix_loans_client_id', 'client_id'),
+        db.Index('ix_loans_live_issue_date_id', 'issue_date', 'id',
+                 postgresql_where=db.text('is_deleted = false')),
+    )
 
     @property
     def outstanding_principal(self):
@@ -151,6 +167,12 @@ class LoanPayment(db.Model):
     is_deleted = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=get_local_now)
 
+    __table_args__ = (
+        db.Index('ix_loan_payments_live_payment_date', 'payment_date',
+                 postgresql_where=db.text('is_deleted = false')),
+        db.Index('ix_loan_payments_loan_id', 'loan_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -192,6 +214,14 @@ class GroupLoan(db.Model):
     payments = db.relationship('GroupLoanPayment', backref='group_loan', lazy='dynamic')
     documents = db.relationship('LoanDocument', backref='group_loan', lazy='dynamic',
                                primaryjoin='GroupLoan.id==LoanDocument.group_loan_id')
+    installments = db.relationship('LoanInstallment', backref='group_loan', lazy='dynamic',
+                                   primaryjoin='GroupLoan.id==LoanInstallment.group_loan_id',
+                                   order_by='LoanInstallment.installment_no')
+
+    __table_args__ = (
+        db.Index('ix_group_loans_live_status_balance', 'status', 'balance',
+                 postgresql_where=db.text('is_deleted = false')),
+    )
 
     @property
     def outstanding_principal(self):
@@ -286,6 +316,12 @@ class GroupLoanPayment(db.Model):
     is_deleted = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=get_local_now)
 
+    __table_args__ = (
+        db.Index('ix_group_loan_payments_live_payment_date', 'payment_date',
+                 postgresql_where=db.text('is_deleted = false')),
+        db.Index('ix_group_loan_payments_group_loan_id', 'group_loan_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -300,6 +336,58 @@ class GroupLoanPayment(db.Model):
         }
 
 
+class LoanInstallment(db.Model):
+    """One scheduled repayment of an individual or group loan.
+
+    Rows are generated from the loan terms by app.utils.loan_schedule and
+    payments are applied to them oldest first. ``status`` is pending, partial
+    or paid; an installment is in arrears when it is not paid by ``due_date``.
+    """
+    __tablename__ = 'loan_installments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    loan_id = db.Column(db.Integer, db.ForeignKey('loans.id'), nullable=True)
+    group_loan_id = db.Column(db.Integer, db.ForeignKey('group_loans.id'), nullable=True)
+    installment_no = db.Column(db.Integer, nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    principal_due = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    interest_due = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    amount_due = db.Column(db.Numeric(12, 2), nullable=False)
+    amount_paid = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    paid_date = db.Column(db.Date, nullable=True)  # Date of the payment that settled it
+
+    __table_args__ = (
+        db.Index('ix_loan_installments_due_date_status', 'due_date', 'status'),
+        # Arrears and collections only look at unpaid rows
+        db.Index('ix_loan_installments_open_due_date', 'due_date',
+                 postgresql_where=db.text("status <> 'paid'")),
+        db.Index('ix_loan_installments_loan_id', 'loan_id', 'installment_no'),
+        db.Index('ix_loan_installments_group_loan_id', 'group_loan_id', 'installment_no'),
+        db.CheckConstraint('(loan_id IS NULL) <> (group_loan_id IS NULL)', name='ck_loan_installments_owner'),
+    )
+
+    @property
+    def amount_outstanding(self):
+        return max(Decimal(str(self.amount_due or 0)) - Decimal(str(self.amount_paid or 0)), Decimal('0'))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'loan_id': self.loan_id,
+            'group_loan_id': self.group_loan_id,
+            'installment_no': self.installment_no,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'principal_due': float(self.principal_due or 0),
+            'interest_due': float(self.interest_due or 0),
+            'amount_due': float(self.amount_due),
+            'amount_paid': float(self.amount_paid or 0),
+            'amount_outstanding': float(self.amount_outstanding),
+            'status': self.status,
+            'paid_date': self.paid_date.isoformat() if self.paid_date else None,
+        }
+
+
 class LoanDocument(db.Model):
     """Loan security documents/agreements"""
     __tablename__ = 'loan_documents'
@@ -320,3 +408,51 @@ class LoanDocument(db.Model):
             'file_type': self.file_type,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class PortfolioSnapshot(db.Model):
+    """End-of-day portfolio-at-risk figures for one loan type.
+
+    Written by app.utils.portfolio_risk; one row per (snapshot_date,
+    loan_type) where loan_type is 'individual' or 'group'. ``parN_amount`` is
+    the outstanding principal of loans with an installment at least N days
+    late, ``parN_count`` the number of those loans.
+    """
+    __tablename__ = 'portfolio_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    loan_type = db.Column(db.String(20), nullable=False)
+    loan_count = db.Column(db.Integer, nullable=False, default=0)
+    outstanding = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    arrears_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    par1_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    par1_count = db.Column(db.Integer, nullable=False, default=0)
+    par7_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    par7_count = db.Column(db.Integer, nullable=False, default=0)
+    par30_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    par30_count = db.Column(db.Integer, nullable=False, default=0)
+    par90_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    par90_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=get_local_now)
+
+    __table_args__ = (
+        db.UniqueConstraint('snapshot_date', 'loan_type', name='uq_portfolio_snapshot_date_type'),
+    )
+
+    def to_dict(self):
+        return {
+            'snapshot_date': self.snapshot_date.isoformat(),
+            'loan_type': self.loan_type,
+            'loan_count': self.loan_count,
+            'outstanding': float(self.outstanding or 0),
+            'arrears_amount': float(self.arrears_amount or 0),
+            'par1_amount': float(self.par1_amount or 0),
+            'par1_count': self.par1_count,
+            'par7_amount': float(self.par7_amount or 0),
+            'par7_count': self.par7_count,
+            'par30_amount': float(self.par30_amount or 0),
+            'par30_count': self.par30_count,
+            'par90_amount': float(self.par90_amount or 0),
+            'par90_count': self.par90_count,
+        }
@@ -36,6 +36,13 @@ class HardwareStock(db.Model):
 
     category = db.relationship('HardwareCategory', backref='stock_items')
 
+    __table_args__ = (
+        db.Index('ix_hardware_stock_active_quantity', 'quantity',
+                 postgresql_where=db.text('is_active = true')),
+        db.Index('ix_hardware_stock_low_stock', 'quantity',
+                 postgresql_where=db.text('is_active = true AND quantity <= low_stock_threshold')),
+    )
+
     @property
     def is_low_stock(self):
         """Check if stock is below threshold"""
@@ -82,6 +89,13 @@ class HardwareSale(db.Model):
     customer = db.relationship('Customer', backref='hardware_sales', foreign_keys=[customer_id])
     items = db.relationship('HardwareSaleItem', backref='sale', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_hardware_sales_live_sale_date', 'sale_date',
+                 postgresql_where=db.text('is_deleted = false')),
+        db.Index('ix_hardware_sales_open_credit', 'sale_date',
+                 postgresql_where=db.text("is_deleted = false AND payment_type = 'part' AND is_credit_cleared = false")),
+    )
+
     def to_dict(self, include_items=False):
         data = {
             'id': self.id,
@@ -113,6 +127,10 @@ class HardwareSaleItem(db.Model):
     is_other_item = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=get_local_now)
 
+    __table_args__ = (
+        db.Index('ix_hardware_sale_items_sale_id', 'sale_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -0,0 +1,76 @@
+"""Bookkeeping tables for background maintenance jobs."""
+
+from app.extensions import db
+from app.utils.timezone import get_local_now
+
+
+class MaintenanceWatermark(db.Model):
+    """Records the business date a maintenance job last brought state up to."""
+    __tablename__ = 'maintenance_watermarks'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)  # e.g. 'loan_state'
+    as_of_date = db.Column(db.Date, nullable=False)
+    updated_at = db.Column(db.DateTime, default=get_local_now, onupdate=get_local_now)
+
+    __table_args__ = (
+        db.UniqueConstraint('name', name='uq_maintenance_watermark_name'),
+    )
+
+
+class BackgroundJob(db.Model):
+    """A unit of slow work queued by a request and run by ``flask worker``.
+
+    Workers claim rows with ``SELECT ... FOR UPDATE SKIP LOCKED``; a claimed
+    job whose ``locked_until`` passes without finishing is picked up again.
+    """
+    __tablename__ = 'background_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # handler name, e.g. 'briefing_narration'
+    payload = db.Column(db.JSON, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    dedupe_key = db.Column(db.String(150), nullable=True)  # at most one queued/running job per key
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=get_local_now)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=get_local_now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=get_local_now, onupdate=get_local_now)
+
+    __table_args__ = (
+        db.Index(
+            'ix_background_jobs_claim', 'status', 'run_after',
+            postgresql_where=db.text("status IN ('queued', 'running')"),
+        ),
+        db.Index(
+            'uq_background_jobs_active_dedupe', 'dedupe_key', unique=True,
+            postgresql_where=db.text("dedupe_key IS NOT NULL AND status IN ('queued', 'running')"),
+        ),
+    )
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self, include_result=True):
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_result:
+            data['result'] = self.result
+            data['error'] = self.error
+        return data
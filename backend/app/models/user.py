@@ -95,6 +95,11 @@ class AuditLog(db.Model):
     ip_address = db.Column(db.String(45), nullable=True)
     created_at = db.Column(db.DateTime, default=get_local_now)
 
+    __table_args__ = (
+        db.Index('ix_audit_logs_created_at', 'created_at'),
+        db.Index('ix_audit_logs_username_created_at', 'username', 'created_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -7,9 +7,15 @@ They capture demand signals (loan inquiries, order requests) and control public
 CRITICAL: These tables store website-related data only.
 They do NOT replace or duplicate core business tables.
 """
+from decimal import Decimal, InvalidOperation
+
 from app.extensions import db
 from app.utils.timezone import get_local_now
 
+# Bits of WebsiteOrderRequest.product_types, one per product section.
+PRODUCT_TYPE_BITS = {'boutique': 1, 'hardware': 2}
+ALL_PRODUCT_TYPES = sum(PRODUCT_TYPE_BITS.values())
+
 
 def _normalize_public_media_url(value):
     raw = str(value or '').strip().replace('\\', '/')
@@ -107,6 +113,11 @@ class WebsiteOrderRequest(db.Model):
     items = db.Column(db.JSON, nullable=False)  # List of {product_id, product_type, name, quantity, price}
     preferred_branch = db.Column(db.String(50), nullable=True)  # 'kapchorwa', 'mbale', or null
     source = db.Column(db.String(20), default='website')
+
+    # Derived from items by set_items() so listings can filter and sum in SQL
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    product_types = db.Column(db.SmallInteger, nullable=False, default=0)  # PRODUCT_TYPE_BITS mask
     
     # Status Workflow
     status = db.Column(db.String(20), default='new')  # new, contacted, fulfilled, cancelled
@@ -127,6 +138,15 @@ class WebsiteOrderRequest(db.Model):
     
     assignee = db.relationship('User', foreign_keys=[assigned_to])
     reviewer = db.relationship('User', foreign_keys=[reviewed_by])
+    line_items = db.relationship(
+        'WebsiteOrderItem', backref='order', cascade='all, delete-orphan',
+        order_by='WebsiteOrderItem.line_no',
+    )
+
+    __table_args__ = (
+        db.Index('ix_website_order_requests_active_types', 'product_types', 'submitted_at',
+                 postgresql_where=db.text('is_active = true')),
+    )
     
     def to_dict(self):
         return {
@@ -141,20 +161,88 @@ class WebsiteOrderRequest(db.Model):
             'assigned_to': self.assignee.full_name if self.assignee else None,
             'notes': self.notes
         }
-    
-    @property
-    def total_amount(self):
-        """Calculate total from items."""
-        if not self.items:
-            return 0
-        return sum(item.get('price', 0) * item.get('quantity', 1) for item in self.items)
-    
-    @property
-    def item_count(self):
-        """Count total items."""
-        if not self.items:
-            return 0
-        return sum(item.get('quantity', 1) for item in self.items)
+
+    def set_items(self, items):
+        """Store the cart and derive its order lines, totals and product_types."""
+        self.items = items
+        self.line_items = []
+        total = Decimal('0')
+        count = 0
+        mask = 0
+        for line_no, item in enumerate(items or [], start=1):
+            product_type = item.get('product_type') or item.get('type')
+            try:
+                quantity = int(item.get('quantity', 1))
+            except (TypeError, ValueError):
+                quantity = 1
+            try:
+                unit_price = Decimal(str(item.get('price', 0))).quantize(Decimal('0.01'))
+            except (TypeError, ValueError, InvalidOperation):
+                unit_price = Decimal('0')
+            try:
+                product_id = int(item.get('product_id'))
+            except (TypeError, ValueError):
+                product_id = None
+            line_total = unit_price * quantity
+            self.line_items.append(WebsiteOrderItem(
+                line_no=line_no,
+                product_type=product_type,
+                product_id=product_id,
+                name=str(item.get('name') or '')[:200],
+                quantity=quantity,
+                unit_price=unit_price,
+                line_total=line_total,
+            ))
+            total += line_total
+            count += quantity
+            mask |= PRODUCT_TYPE_BITS.get(product_type, 0)
+        self.total_amount = total
+        self.item_count = count
+        self.product_types = mask
+
+    def has_product_type(self, product_type):
+        return bool((self.product_types or 0) & PRODUCT_TYPE_BITS.get(product_type, 0))
+
+    @classmethod
+    def product_type_filter(cls, product_type):
+        """SQL filter for orders containing ``product_type`` items.
+
+        Written as ``product_types IN (...)`` over every mask with the bit set
+        so it can use ``ix_website_order_requests_active_types``.
+        """
+        bit = PRODUCT_TYPE_BITS.get(product_type, 0)
+        masks = [mask for mask in range(1, ALL_PRODUCT_TYPES + 1) if mask & bit]
+        return cls.product_types.in_(masks) if masks else db.false()
+
+
+class WebsiteOrderItem(db.Model):
+    """One line of a WebsiteOrderRequest cart, written when the order is submitted."""
+    __tablename__ = 'website_order_items'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('website_order_requests.id', ondelete='CASCADE'), nullable=False)
+    line_no = db.Column(db.Integer, nullable=False)
+    product_type = db.Column(db.String(20), nullable=True)  # 'boutique' or 'hardware'
+    product_id = db.Column(db.Integer, nullable=True)  # BoutiqueStock or HardwareStock id
+    name = db.Column(db.String(200), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Numeric(12, 2), nullable=False)
+    line_total = db.Column(db.Numeric(12, 2), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_website_order_items_order_id', 'order_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_type': self.product_type,
+            'product_id': self.product_id,
+            'name': self.name,
+            'quantity': self.quantity,
+            'unit_price': float(self.unit_price),
+            'line_total': float(self.line_total),
+        }
 
 
 class PublishedProduct(db.Model):
@@ -211,9 +299,64 @@ class PublishedProduct(db.Model):
             return HardwareStock.query.get(self.product_id)
         return None
     
-    def to_public_dict(self):
-        """Return only public-safe fields for storefront."""
-        item = self.get_inventory_item()
+    @staticmethod
+    def load_inventory_items(published_products):
+        """Fetch the stock rows (with categories) behind ``published_products``.
+
+        One query per product type instead of one per product; returns a dict
+        keyed by ``(product_type, product_id)``.
+        """
+        from sqlalchemy.orm import joinedload
+        from app.models.boutique import BoutiqueStock
+        from app.models.hardware import HardwareStock
+
+        stock_models = {'boutique': BoutiqueStock, 'hardware': HardwareStock}
+        ids_by_type = {}
+        for published in published_products:
+            if published.product_type in stock_models:
+                ids_by_type.setdefault(published.product_type, set()).add(published.product_id)
+
+        items = {}
+        for product_type, product_ids in ids_by_type.items():
+            model = stock_models[product_type]
+            for item in model.query.options(joinedload(model.category)).filter(model.id.in_(product_ids)).all():
+                items[(product_type, item.id)] = item
+        return items
+
+    @staticmethod
+    def public_catalog(published_products):
+        """Build ``to_public_dict`` output for many products in a fixed number of queries.
+
+        Stock rows, categories and gallery images are batch-loaded up front,
+        so the storefront costs the same handful of queries however many
+        products are published. Products whose inventory item is gone are
+        skipped, as with ``to_public_dict``.
+        """
+        published_products = list(published_products)
+        if not published_products:
+            return []
+
+        items = PublishedProduct.load_inventory_items(published_products)
+        images = ProductImage.get_images_for(
+            (published.product_type, published.product_id) for published in published_products
+        )
+
+        catalog = []
+        for published in published_products:
+            key = (published.product_type, published.product_id)
+            public_data = published.to_public_dict(item=items.get(key), product_images=images.get(key, []), preloaded=True)
+            if public_data:
+                catalog.append(public_data)
+        return catalog
+
+    def to_public_dict(self, item=None, product_images=None, preloaded=False):
+        """Return only public-safe fields for storefront.
+
+        ``public_catalog`` passes ``item`` and ``product_images`` already
+        loaded (``preloaded=True``); called on its own, they are looked up.
+        """
+        if not preloaded:
+            item = self.get_inventory_item()
         if not item:
             return None
         
@@ -229,7 +372,8 @@ class PublishedProduct(db.Model):
             availability = 'In Stock'
         
         # Gather all images for this product
-        product_images = ProductImage.get_images(self.product_type, self.product_id)
+        if product_images is None:
+            product_images = ProductImage.get_images(self.product_type, self.product_id)
         image_urls = [_normalize_public_media_url(img.image_url) for img in product_images]
         image_urls = [url for url in image_urls if url]
         # Fallback: use the single image_url if no ProductImage rows
@@ -309,6 +453,30 @@ class ProductImage(db.Model):
             product_type=product_type, product_id=product_id
         ).order_by(ProductImage.display_order).all()
 
+    @staticmethod
+    def get_images_for(products):
+        """Get images for many ``(product_type, product_id)`` pairs in one query.
+
+        Returns a dict keyed by the pair, each list ordered by display_order.
+        """
+        ids_by_type = {}
+        for product_type, product_id in products:
+            ids_by_type.setdefault(product_type, set()).add(product_id)
+        if not ids_by_type:
+            return {}
+
+        conditions = [
+            db.and_(ProductImage.product_type == product_type, ProductImage.product_id.in_(product_ids))
+            for product_type, product_ids in ids_by_type.items()
+        ]
+        images = {}
+        rows = ProductImage.query.filter(db.or_(*conditions)).order_by(
+            ProductImage.display_order, ProductImage.id
+        ).all()
+        for image in rows:
+            images.setdefault((image.product_type, image.product_id), []).append(image)
+        return images
+
 
 class WebsiteImage(db.Model):
     """
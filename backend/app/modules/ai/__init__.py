@@ -10,8 +10,8 @@ import os
 from datetime import datetime, time, timedelta
 
 from flask import (
-    Blueprint, jsonify, render_template, request, session,
-    flash, redirect, url_for, current_app,
+    Blueprint, Response, jsonify, render_template, request, session,
+    flash, redirect, url_for, current_app, stream_with_context,
 )
 from werkzeug.utils import secure_filename
 
@@ -176,9 +176,12 @@ def briefing():
         except Exception:
             db.session.rollback()
 
+    narration_job = None
     try:
-        from app.utils.briefing_engine import get_or_create_briefing
+        from app.utils.briefing_engine import find_narration_job, get_or_create_briefing
         metrics, ai_narrative = get_or_create_briefing(scope, branch, today)
+        if not ai_narrative:
+            narration_job = find_narration_job(scope, branch, today)
     except Exception as exc:
         logger.warning('Briefing generation failed: %s', exc.__class__.__name__)
         metrics = {}
@@ -188,6 +191,7 @@ def briefing():
         'ai/briefing.html',
         metrics=metrics,
         ai_narrative=ai_narrative,
+        narration_job_id=narration_job.id if narration_job else None,
         scope=scope,
         branch=branch,
         briefing_date=today,
@@ -233,10 +237,13 @@ def check_briefing():
         payload = {'show': show, 'date': today.isoformat()}
         if show:
             try:
-                from app.utils.briefing_engine import get_or_create_briefing
+                from app.utils.briefing_engine import find_narration_job, get_or_create_briefing
                 scope, branch = _resolve_briefing_scope(user)
                 metrics, ai_narrative = get_or_create_briefing(scope, branch, today)
                 payload.update(_build_briefing_preview(scope, metrics, ai_narrative))
+                if not ai_narrative:
+                    narration_job = find_narration_job(scope, branch, today)
+                    payload['narration_job_id'] = narration_job.id if narration_job else None
             except Exception as exc:
                 logger.warning('Briefing preview unavailable: %s', exc.__class__.__name__)
                 payload.update({
@@ -249,6 +256,37 @@ def check_briefing():
         return jsonify({'show': False, 'date': today.isoformat()})
 
 
+# ============================================================================
+# Background Jobs
+# ============================================================================
+
+@ai_bp.route('/jobs/<int:id>')
+def job_status(id):
+    """Poll a background job queued by one of the AI endpoints."""
+    user = get_session_user()
+    if not user:
+        return jsonify({'error': 'unauthorized'}), 401
+
+    from app.utils.jobs import get_job
+
+    job = get_job(id)
+    if job is None:
+        return jsonify({'error': 'not_found'}), 404
+    # Shared jobs (created_by is None, e.g. briefing narration) expose status only.
+    if job.created_by is not None and job.created_by != user.id and user.role != 'manager':
+        return jsonify({'error': 'not_found'}), 404
+    include_result = job.created_by == user.id or user.role == 'manager'
+    return jsonify(job.to_dict(include_result=include_result))
+
+
+@ai_bp.route('/metrics')
+@manager_required
+def provider_metrics():
+    """Provider call counts, latency and token usage for this worker process."""
+    from app.utils.ai_client import get_ai_metrics
+    return jsonify(get_ai_metrics())
+
+
 # ============================================================================
 # Manager AI Chatbot
 # ============================================================================
@@ -309,6 +347,81 @@ def chat_send():
     return jsonify(result)
 
 
+def _sse(event, payload):
+    return f'event: {event}\ndata: {json.dumps(payload, default=str)}\n\n'
+
+
+@ai_bp.route('/chat/stream', methods=['POST'])
+@manager_required
+def chat_stream():
+    """Streaming variant of ``chat_send`` over Server-Sent Events.
+
+    Emits one ``data`` event with the structured answer, ``token`` events as
+    the narrative is generated, then ``done`` with the final response. The
+    exchange is logged once the stream ends, even if the client disconnects.
+    """
+    user = get_session_user()
+    data = request.get_json(silent=True) or {}
+    message = (data.get('message') or '').strip()
+
+    if not message:
+        return jsonify({'error': 'Empty message'}), 400
+    if len(message) > 1000:
+        return jsonify({'error': 'Message too long (max 1000 characters)'}), 400
+
+    from app.utils.chat_engine import apply_narration, classify_intent, prepare_chat_message
+    from app.utils.narration_cache import stream_cached_ai_chat
+
+    user_id = user.id
+    intent = classify_intent(message)
+
+    try:
+        result, narration = prepare_chat_message(message)
+    except Exception as exc:
+        logger.warning('Chat processing failed: %s', exc.__class__.__name__)
+        result, narration = {
+            'intent': 'error',
+            'summary': 'Sorry, something went wrong processing your request.',
+        }, None
+
+    # The provider stream can run for many seconds; give the connection back
+    # now. The cache and the chat log below use short sessions of their own.
+    db.session.commit()
+    db.session.remove()
+
+    def generate():
+        parts = []
+        try:
+            yield _sse('data', result)
+            if narration:
+                try:
+                    for chunk in stream_cached_ai_chat(**narration):
+                        parts.append(chunk)
+                        yield _sse('token', {'text': chunk})
+                except Exception as exc:
+                    logger.warning('Chat narration stream failed: %s', exc.__class__.__name__)
+            apply_narration(result, ''.join(parts).strip())
+            yield _sse('done', result)
+        finally:
+            apply_narration(result, ''.join(parts).strip())
+            try:
+                response_text = result.get('ai_narrative') or result.get('summary', '')
+                db.session.add(ChatMessage(user_id=user_id, role='user', content=message))
+                db.session.add(ChatMessage(
+                    user_id=user_id, role='assistant',
+                    content=response_text[:2000], intent=intent,
+                ))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
 # ============================================================================
 # OCR Extraction
 # ============================================================================
@@ -355,31 +468,17 @@ def ocr_upload():
         flash('File validation failed.', 'error')
         return redirect(request.referrer or url_for('ai.ocr_page'))
 
-    # Run OCR extraction
+    # Queue OCR extraction; the review page polls ocr_status until it lands.
     from app.utils.ai_client import is_ocr_enabled
-    from app.utils.ocr_engine import _empty_fields, extract_from_image, extract_from_pdf
+    from app.utils.ocr_engine import OCR_JOB_KIND, _empty_fields, ocr_job_key
 
     quota = _get_ocr_quota_status(client_reference)
+    # used_ai is set up front so concurrent uploads count against today's quota.
     used_ai = is_ocr_enabled() and not quota['limit_reached_for_new_client']
+    fallback_reason = None
+    if not used_ai:
+        fallback_reason = 'daily_limit' if quota['limit_reached_for_new_client'] else 'provider_unavailable'
 
-    if used_ai:
-        if ext == 'pdf':
-            result = extract_from_pdf(save_path, document_type)
-        else:
-            result = extract_from_image(save_path, document_type)
-        used_ai = bool(result.get('success'))
-    else:
-        result = {
-            'success': False,
-            'raw_text': None,
-            'fields': _empty_fields(document_type),
-            'error': (
-                f"Today's AI OCR limit of {quota['limit']} client references has been reached. "
-                'You can still upload and review documents manually.'
-            ),
-        }
-
-    # Save extraction record
     extraction = OcrExtraction(
         uploaded_by=user.id,
         original_filename=filename,
@@ -387,27 +486,40 @@ def ocr_upload():
         file_type=ext,
         document_type=document_type,
         client_reference=client_reference,
-        raw_ocr_text=result.get('raw_text'),
-        extracted_fields_json=json.dumps(result.get('fields', {})),
+        extracted_fields_json=json.dumps(_empty_fields(document_type)),
         used_ai=used_ai,
-        fallback_reason=None if used_ai else (
-            'daily_limit'
-            if quota['limit_reached_for_new_client']
-            else 'provider_unavailable'
-        ),
-        status='pending',
+        fallback_reason=fallback_reason,
+        status='processing' if used_ai else 'pending',
     )
     db.session.add(extraction)
     db.session.commit()
 
+    if used_ai:
+        try:
+            from app.utils.jobs import enqueue
+            enqueue(
+                OCR_JOB_KIND,
+                {'extraction_id': extraction.id, 'path': save_path},
+                dedupe_key=ocr_job_key(extraction.id),
+                max_attempts=1,
+                created_by=user.id,
+            )
+        except Exception:
+            db.session.rollback()
+            logger.warning('Could not queue OCR for extraction %s', extraction.id)
+            extraction.used_ai = False
+            extraction.fallback_reason = 'provider_unavailable'
+            extraction.status = 'pending'
+            db.session.commit()
+
     log_action(
         session.get('username', 'unknown'), session.get('section', 'ai'),
         'create', 'ocr_extraction', extraction.id,
         {
             'filename': filename,
             'document_type': document_type,
-            'ocr_success': result.get('success'),
-            'used_ai': used_ai,
+            'ocr_queued': extraction.status == 'processing',
+            'used_ai': extraction.used_ai,
             'client_reference': client_reference,
             'fallback_reason': extraction.fallback_reason,
         },
@@ -420,8 +532,12 @@ def ocr_upload():
             'warning',
         )
 
-    if result.get('error'):
-        flash(result['error'], 'info')
+    if extraction.fallback_reason == 'daily_limit':
+        flash(
+            f"Today's AI OCR limit of {quota['limit']} client references has been reached. "
+            'You can still upload and review documents manually.',
+            'info',
+        )
 
     if return_to and return_to.startswith('/'):
         return redirect(url_for('ai.ocr_review', id=extraction.id, next=return_to))
@@ -482,6 +598,44 @@ def ocr_review(id):
     )
 
 
+@ai_bp.route('/ocr/<int:id>/status')
+def ocr_status(id):
+    """Lightweight progress check polled by the review page while OCR runs."""
+    user = get_session_user()
+    if not user:
+        return jsonify({'error': 'unauthorized'}), 401
+
+    extraction = db.session.get(OcrExtraction, id)
+    if extraction is None or (extraction.uploaded_by != user.id and user.role != 'manager'):
+        return jsonify({'error': 'not_found'}), 404
+
+    if extraction.status == 'processing':
+        from app.utils.jobs import abandon_queued_job, find_active_job
+        from app.utils.ocr_engine import finish_ocr_extraction, ocr_job_key
+
+        job = find_active_job(ocr_job_key(extraction.id))
+        if job is not None and job.status == 'queued':
+            # No worker has claimed it (e.g. none runs ocr_extraction jobs); stop waiting.
+            timeout = current_app.config.get('OCR_QUEUE_TIMEOUT_SECONDS', 90)
+            if abandon_queued_job(job.id, timeout, f'Not picked up by a worker within {timeout}s'):
+                job = None
+        if job is None:
+            # The job may have finished since this row was loaded.
+            db.session.refresh(extraction)
+            if extraction.status == 'processing':
+                # Its job was lost (e.g. a worker died); fall back to manual review.
+                finish_ocr_extraction(extraction, {'success': False})
+                db.session.commit()
+
+    return jsonify({
+        'id': extraction.id,
+        'status': extraction.status,
+        'ready': extraction.status != 'processing',
+        'used_ai': extraction.used_ai,
+        'fallback_reason': extraction.fallback_reason,
+    })
+
+
 @ai_bp.route('/ocr/<int:id>/confirm', methods=['POST'])
 def ocr_confirm(id):
     """Confirm corrected OCR fields."""
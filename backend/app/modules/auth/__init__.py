@@ -1,6 +1,6 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app.models.user import User, AuditLog
-from app.extensions import db
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+from app.models.user import User
+from app.extensions import db, audit_writer
 from app.utils.rate_limit import consume_limit, clear_limit
 from app.utils.timezone import get_local_now
 from functools import wraps
@@ -14,9 +14,13 @@ LOGIN_BLOCK_SECONDS = 900
 
 
 def log_action(username, section, action, entity, entity_id=None, details=None):
-    """Log an action to the audit trail. Never crashes the app."""
+    """Log an action to the audit trail. Never crashes the app.
+
+    Rows go through the buffered audit writer, so this no longer commits the
+    caller's session; commit business changes before or after as usual.
+    """
     try:
-        log = AuditLog(
+        audit_writer.log(
             username=username,
             section=section,
             action=action,
@@ -25,10 +29,8 @@ def log_action(username, section, action, entity, entity_id=None, details=None):
             details=json.dumps(details) if details else None,
             ip_address=request.remote_addr
         )
-        db.session.add(log)
-        db.session.commit()
     except Exception:
-        db.session.rollback()
+        current_app.logger.exception('Failed to record audit entry %s/%s', section, action)
 
 
 def get_session_user():
@@ -9,7 +9,7 @@ from app.models.boutique import (
 from app.models.customer import Customer
 from app.models.user import User
 from app.modules.auth import login_required, log_action
-from app.extensions import db
+from app.extensions import db, image_fetcher
 from app.utils.timezone import get_local_today
 from app.utils.utils import generate_reference_number
 from app.utils.image_fetch import fetch_product_image_async, fetch_product_image
@@ -270,7 +270,8 @@ def stock():
         stock=items,
         categories=categories,
         show_inactive=show_inactive,
-        product_images=product_images
+        product_images=product_images,
+        image_jobs=image_fetcher.status_for('BoutiqueStock')
     )
 
 
@@ -547,8 +548,8 @@ def fetch_all_images():
     count = 0
     for item in items:
         category_name = item.category.name if item.category else None
-        fetch_product_image_async(item.id, item.item_name, category_name)
-        count += 1
+        if fetch_product_image_async(item.id, item.item_name, category_name):
+            count += 1
 
     flash(f'Fetching images for {count} items in the background...', 'success')
     return redirect(url_for('boutique.stock'))
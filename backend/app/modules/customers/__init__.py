@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from app.models.customer import Customer
 from app.modules.auth import login_required, get_session_user
 from app.extensions import db
+from app.utils.pagination import keyset_page, keyset_json, next_page_url, page_size_arg, wants_json
 from sqlalchemy import or_
 
 customers_bp = Blueprint('customers', __name__)
@@ -18,6 +19,16 @@ def _get_customer_scope(user):
     return user.role
 
 
+def _customer_list_item(customer):
+    return {
+        'id': customer.id,
+        'name': customer.name,
+        'phone': customer.phone,
+        'address': customer.address,
+        'business_type': customer.business_type,
+    }
+
+
 @customers_bp.route('/')
 @login_required('customers')
 def index():
@@ -25,6 +36,8 @@ def index():
     user = get_session_user()
     scope = _get_customer_scope(user)
     business_type = request.args.get('business_type')
+    search = str(request.args.get('q') or '').strip()[:100]
+    filters = {'business_type': business_type, 'q': search}
 
     try:
         query = Customer.query
@@ -34,13 +47,26 @@ def index():
         elif business_type:
             # Managers can optionally filter by business_type
             query = query.filter_by(business_type=business_type)
-        customers = query.order_by(Customer.name).all()
+        if search:
+            query = query.filter(or_(Customer.name.ilike(f'%{search}%'), Customer.phone.ilike(f'%{search}%')))
+        customers, next_cursor = keyset_page(
+            query, [Customer.name, Customer.id], request.args.get('cursor'), page_size_arg(), descending=False,
+        )
+        if wants_json():
+            return keyset_json('customers/_customer_rows.html', customers, next_cursor, filters,
+                               _customer_list_item, customers=customers)
+        customer_count = query.order_by(None).count()
     except Exception as exc:
         db.session.rollback()
         current_app.logger.exception('Customer listing failed: %s', exc)
-        customers = []
+        if wants_json():
+            return jsonify({'items': [], 'html': '', 'next_cursor': None, 'next_url': None}), 500
+        customers, next_cursor, customer_count = [], None, 0
     return render_template('customers/index.html',
                            customers=customers,
+                           customer_count=customer_count,
+                           next_url=next_page_url(next_cursor, filters),
+                           search=search,
                            business_type=scope or business_type,
                            is_manager=(user.role == 'manager'))
 
@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session, Response, send_file
-from app.models.finance import LoanClient, Loan, LoanPayment, GroupLoan, GroupLoanPayment, LoanDocument
+from app.models.finance import LoanClient, Loan, LoanPayment, GroupLoan, GroupLoanPayment, LoanDocument, LoanInstallment
 from app.modules.auth import login_required, log_action
 from app.extensions import db
 from app.utils.timezone import get_local_now, get_local_today
@@ -7,6 +7,8 @@ from app.utils.pdf_generator import generate_group_agreement_pdf
 from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
 from dateutil.relativedelta import relativedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from werkzeug.utils import secure_filename
 import json
 import os
@@ -22,6 +24,11 @@ MAX_MONTHLY_INTEREST = Decimal('100000000')
 MAX_DURATION_UNITS = 120
 MAX_GROUP_PERIODS = 240
 from app.utils.uploads import allowed_file, validate_and_save
+from app.utils.pagination import keyset_page, keyset_json, next_page_url, page_size_arg, wants_json
+from app.utils.loan_schedule import extend_accrual_schedules, open_installments, sync_group_schedule, sync_loan_schedule
+from app.utils.portfolio_risk import PAR_THRESHOLDS, TREND_RANGES, record_portfolio_snapshots, snapshot_trend
+
+LOAN_STATUSES = ('active', 'overdue', 'paid')
 
 
 def safe_decimal(value, default='0'):
@@ -126,28 +133,170 @@ def refresh_loan_state(loan, as_of_date=None):
     return changed
 
 
-def refresh_active_loans():
-    changed = False
-    loans = Loan.query.filter_by(is_deleted=False).all()
-    for loan in loans:
-        changed = refresh_loan_state(loan) or changed
-    if changed:
+LOAN_STATE_WATERMARK = 'loan_state'
+_loan_state_refreshed_as_of = None
+
+
+def _elapsed_full_months_sql(issue_date_col, as_of_date):
+    """SQL twin of elapsed_full_months (relativedelta semantics, month-end clipped)."""
+    as_of = db.cast(as_of_date, db.Date)
+    month_span = db.cast(
+        (db.extract('year', as_of) - db.extract('year', issue_date_col)) * 12
+        + (db.extract('month', as_of) - db.extract('month', issue_date_col)),
+        db.Integer
+    )
+    overshoot = db.case(
+        (issue_date_col + db.func.make_interval(0, month_span) > as_of, 1),
+        else_=0
+    )
+    return db.case(
+        (db.or_(issue_date_col == None, as_of <= issue_date_col), 0),
+        else_=month_span - overshoot
+    )
+
+
+def refresh_loan_states_bulk(as_of_date=None):
+    """Bring every loan's accrual, balance and status up to ``as_of_date`` in SQL.
+
+    Set-based equivalent of calling refresh_loan_state on each loan, plus the
+    overdue transition for group loans. Only rows whose values actually change
+    are written. Returns the number of rows updated; the caller commits.
+    """
+    as_of_date = as_of_date or get_local_today()
+
+    interest = db.case(
+        (Loan.interest_mode == 'monthly_accrual',
+         db.func.coalesce(Loan.monthly_interest_amount, 0) * _elapsed_full_months_sql(Loan.issue_date, as_of_date)),
+        else_=db.func.coalesce(Loan.interest_amount, 0)
+    )
+    total = db.func.coalesce(Loan.principal, 0) + interest
+    balance = db.func.greatest(total - db.func.coalesce(Loan.amount_paid, 0), 0)
+    status = db.case(
+        (balance <= 0, 'paid'),
+        (Loan.due_date < as_of_date, 'overdue'),
+        else_='active'
+    )
+
+    updated = Loan.query.filter(
+        Loan.is_deleted == False,
+        db.or_(
+            db.func.coalesce(Loan.interest_amount, 0) != interest,
+            db.func.coalesce(Loan.total_amount, 0) != total,
+            db.func.coalesce(Loan.balance, 0) != balance,
+            db.func.coalesce(Loan.status, 'active') != status,
+        )
+    ).update({
+        'interest_amount': interest,
+        'total_amount': total,
+        'balance': balance,
+        'status': status,
+    }, synchronize_session=False)
+
+    updated += GroupLoan.query.filter(
+        GroupLoan.is_deleted == False, GroupLoan.status == 'active',
+        GroupLoan.due_date < as_of_date, GroupLoan.balance > 0
+    ).update({'status': 'overdue'}, synchronize_session=False)
+    return updated
+
+
+def refresh_active_loans(as_of_date=None, force=False):
+    """Refresh loan state once per business day.
+
+    A persisted watermark records the last date the bulk refresh ran for, so
+    request handlers only pay for the UPDATE on the first hit of a new day.
+    Individual writes keep their own loan current via refresh_loan_state.
+    """
+    from app.models.system import MaintenanceWatermark
+
+    global _loan_state_refreshed_as_of
+    as_of_date = as_of_date or get_local_today()
+    if not force and _loan_state_refreshed_as_of and _loan_state_refreshed_as_of >= as_of_date:
+        return False
+
+    watermark = MaintenanceWatermark.query.filter_by(name=LOAN_STATE_WATERMARK).first()
+    if not force and watermark and watermark.as_of_date >= as_of_date:
+        _loan_state_refreshed_as_of = watermark.as_of_date
+        return False
+
+    updated = refresh_loan_states_bulk(as_of_date)
+    extend_accrual_schedules(as_of_date)
+    if watermark:
+        watermark.as_of_date = max(watermark.as_of_date, as_of_date)
+    else:
+        db.session.add(MaintenanceWatermark(name=LOAN_STATE_WATERMARK, as_of_date=as_of_date))
+    try:
         db.session.commit()
-    return changed
+    except IntegrityError:
+        # Another worker recorded the watermark first; its refresh covered ours.
+        db.session.rollback()
+    _loan_state_refreshed_as_of = as_of_date
+    return updated > 0
 
 
-def summarize_outstanding_portfolio():
-    """Split the active portfolio into remaining principal and interest portions."""
-    loan_rows = Loan.query.filter(Loan.is_deleted == False, Loan.balance > 0).all()
-    group_rows = GroupLoan.query.filter(GroupLoan.is_deleted == False, GroupLoan.balance > 0).all()
+PORTFOLIO_BREAKDOWN_FIELDS = ('loan_type', 'status', 'interest_mode', 'issue_month')
 
-    principal_outstanding = sum((loan.outstanding_principal for loan in loan_rows), Decimal('0'))
-    principal_outstanding += sum((group.outstanding_principal for group in group_rows), Decimal('0'))
 
-    interest_outstanding = sum((loan.outstanding_interest for loan in loan_rows), Decimal('0'))
-    interest_outstanding += sum((group.outstanding_interest for group in group_rows), Decimal('0'))
+def _outstanding_portfolio_rows():
+    """UNION ALL of individual and group loans with SQL outstanding principal/interest.
 
-    return float(principal_outstanding), float(interest_outstanding)
+    Mirrors Loan.outstanding_principal / outstanding_interest:
+    principal = LEAST(GREATEST(principal - amount_paid, 0), balance), interest = the rest.
+    """
+    def columns(model, loan_type, interest_mode):
+        balance = db.func.coalesce(model.balance, 0)
+        principal = db.func.least(
+            db.func.greatest(db.func.coalesce(model.principal, 0) - db.func.coalesce(model.amount_paid, 0), 0),
+            balance
+        )
+        return db.session.query(
+            db.literal(loan_type).label('loan_type'),
+            db.func.coalesce(model.status, 'active').label('status'),
+            interest_mode.label('interest_mode'),
+            db.cast(db.func.date_trunc('month', model.issue_date), db.Date).label('issue_month'),
+            principal.label('principal'),
+            db.func.greatest(balance - principal, 0).label('interest'),
+        ).filter(model.is_deleted == False, model.balance > 0)
+
+    individual = columns(Loan, 'individual', db.func.coalesce(Loan.interest_mode, 'flat_rate'))
+    group = columns(GroupLoan, 'group', db.literal('group'))
+    return db.union_all(individual, group).subquery()
+
+
+def summarize_outstanding_portfolio(group_by=None):
+    """Split the active portfolio into remaining principal and interest portions.
+
+    Without ``group_by`` returns ``(principal, interest)`` floats. Pass one or
+    more of PORTFOLIO_BREAKDOWN_FIELDS to get a list of dicts with the totals
+    per group instead. Either way the work is a single aggregate query.
+    """
+    rows = _outstanding_portfolio_rows()
+    totals = (
+        db.func.coalesce(db.func.sum(rows.c.principal), 0),
+        db.func.coalesce(db.func.sum(rows.c.interest), 0),
+    )
+
+    if not group_by:
+        principal_outstanding, interest_outstanding = db.session.query(*totals).one()
+        return float(principal_outstanding), float(interest_outstanding)
+
+    fields = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+    unknown = [name for name in fields if name not in PORTFOLIO_BREAKDOWN_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown portfolio breakdown field: {", ".join(unknown)}')
+
+    keys = [rows.c[name] for name in fields]
+    breakdown = []
+    for row in db.session.query(*keys, db.func.count(), *totals).group_by(*keys).order_by(*keys).all():
+        entry = dict(zip(fields, row[:len(fields)]))
+        count, principal_outstanding, interest_outstanding = row[len(fields):]
+        entry.update({
+            'count': count,
+            'principal': float(principal_outstanding),
+            'interest': float(interest_outstanding),
+            'total': float(principal_outstanding + interest_outstanding),
+        })
+        breakdown.append(entry)
+    return breakdown
 
 
 def parse_individual_loan_form(form):
@@ -251,19 +400,7 @@ def index():
     today = get_local_today()
 
     try:
-        refresh_active_loans()
-
-        # Update loan statuses
-        Loan.query.filter(
-            Loan.is_deleted == False, Loan.status.in_(['active', 'due_soon']),
-            Loan.due_date < today, Loan.balance > 0
-        ).update({'status': 'overdue'}, synchronize_session=False)
-
-        GroupLoan.query.filter(
-            GroupLoan.is_deleted == False, GroupLoan.status == 'active',
-            GroupLoan.due_date < today, GroupLoan.balance > 0
-        ).update({'status': 'overdue'}, synchronize_session=False)
-        db.session.commit()
+        refresh_active_loans(today)
 
         active_loans = Loan.query.filter(Loan.is_deleted == False, Loan.balance > 0).count()
         active_groups = GroupLoan.query.filter(GroupLoan.is_deleted == False, GroupLoan.balance > 0).count()
@@ -287,28 +424,113 @@ def index():
 
 # ============ CLIENTS ============
 
+def _choice_arg(name, choices, default=''):
+    value = str(request.args.get(name) or '').strip().lower()
+    return value if value in choices else default
+
+
+def _search_arg():
+    return str(request.args.get('q') or '').strip()[:100]
+
+
+def _active_loan_counts(client_ids):
+    if not client_ids:
+        return {}
+    rows = db.session.query(Loan.client_id, db.func.count(Loan.id)).filter(
+        Loan.client_id.in_(client_ids),
+        Loan.is_deleted == False,
+    ).group_by(Loan.client_id).all()
+    return dict(rows)
+
+
+def _client_list_item(client, active_loan_counts):
+    return {
+        'id': client.id,
+        'name': client.name,
+        'phone': client.phone,
+        'address': client.address,
+        'payer_status': client.payer_status or 'neutral',
+        'payer_status_label': client.payer_status_label,
+        'active_loans': active_loan_counts.get(client.id, 0),
+    }
+
+
+def _loan_list_item(loan):
+    return {
+        'id': loan.id,
+        'client_id': loan.client_id,
+        'client_name': loan.client.name if loan.client else None,
+        'payer_status': (loan.client.payer_status if loan.client else None) or 'neutral',
+        'principal': float(loan.principal),
+        'interest_mode': loan.interest_mode or 'flat_rate',
+        'total_amount': float(loan.total_amount),
+        'balance': float(loan.balance),
+        'issue_date': loan.issue_date.isoformat() if loan.issue_date else None,
+        'due_date': loan.due_date.isoformat() if loan.due_date else None,
+        'status': loan.status,
+    }
+
+
+def _group_loan_list_item(group):
+    return {
+        'id': group.id,
+        'group_name': group.group_name,
+        'member_count': group.member_count,
+        'principal': float(group.principal),
+        'total_amount': float(group.total_amount),
+        'balance': float(group.balance),
+        'period_type': group.period_type,
+        'periods_paid': group.periods_paid,
+        'total_periods': group.total_periods,
+        'status': group.status,
+    }
+
+
 @finance_bp.route('/clients')
 @login_required('finance')
 def clients():
     raw_payer_status = str(request.args.get('payer_status', 'all') or 'all').strip().lower()
     payer_status_filter = 'all' if raw_payer_status == 'all' else normalize_payer_status(raw_payer_status)
+    search = _search_arg()
+    filters = {'payer_status': payer_status_filter, 'q': search}
 
     base_query = LoanClient.query.filter_by(is_active=True)
     query = base_query
     if payer_status_filter != 'all':
         query = query.filter_by(payer_status=payer_status_filter)
+    if search:
+        query = query.filter(db.or_(
+            LoanClient.name.ilike(f'%{search}%'),
+            LoanClient.phone.ilike(f'%{search}%'),
+        ))
+
+    page, next_cursor = keyset_page(
+        query, [LoanClient.name, LoanClient.id], request.args.get('cursor'), page_size_arg(), descending=False,
+    )
+    active_loan_counts = _active_loan_counts([client.id for client in page])
+    if wants_json():
+        return keyset_json(
+            'finance/_client_rows.html', page, next_cursor, filters,
+            lambda client: _client_list_item(client, active_loan_counts),
+            clients=page, active_loan_counts=active_loan_counts,
+        )
 
-    all_clients = query.order_by(LoanClient.name).all()
-    status_counts = {
-        'all': base_query.count(),
-        'good': base_query.filter_by(payer_status='good').count(),
-        'bad': base_query.filter_by(payer_status='bad').count(),
-        'neutral': base_query.filter_by(payer_status='neutral').count(),
-    }
+    status_counts = {'all': 0, 'good': 0, 'bad': 0, 'neutral': 0}
+    counts = base_query.with_entities(LoanClient.payer_status, db.func.count(LoanClient.id))\
+        .group_by(LoanClient.payer_status).all()
+    for payer_status, count in counts:
+        status_counts['all'] += count
+        key = payer_status or 'neutral'
+        if key in status_counts:
+            status_counts[key] += count
     return render_template(
         'finance/clients.html',
-        clients=all_clients,
+        clients=page,
+        active_loan_counts=active_loan_counts,
+        next_url=next_page_url(next_cursor, filters),
+        filtered_count=query.order_by(None).count() if search else None,
         payer_status_filter=payer_status_filter,
+        search=search,
         status_counts=status_counts,
     )
 
@@ -393,9 +615,35 @@ def delete_client(id):
 @login_required('finance')
 def loans():
     refresh_active_loans()
-    all_loans = Loan.query.filter_by(is_deleted=False).order_by(Loan.issue_date.desc()).all()
-    clients = LoanClient.query.filter_by(is_active=True).order_by(LoanClient.name).all()
-    return render_template('finance/loans.html', loans=all_loans, clients=clients, today=get_local_today())
+    filters = {
+        'status': _choice_arg('status', LOAN_STATUSES),
+        'payer_status': _choice_arg('payer_status', CLIENT_PAYER_STATUSES),
+        'q': _search_arg(),
+    }
+
+    query = Loan.query.filter(Loan.is_deleted == False).options(selectinload(Loan.client))
+    if filters['status']:
+        query = query.filter(Loan.status == filters['status'])
+    if filters['payer_status'] or filters['q']:
+        query = query.join(LoanClient, Loan.client_id == LoanClient.id)
+        if filters['payer_status']:
+            query = query.filter(LoanClient.payer_status == filters['payer_status'])
+        if filters['q']:
+            query = query.filter(db.or_(
+                LoanClient.name.ilike(f"%{filters['q']}%"),
+                LoanClient.phone.ilike(f"%{filters['q']}%"),
+            ))
+
+    page, next_cursor = keyset_page(query, [Loan.issue_date, Loan.id], request.args.get('cursor'), page_size_arg())
+    if wants_json():
+        return keyset_json('finance/_loan_rows.html', page, next_cursor, filters, _loan_list_item, loans=page)
+
+    # Only the columns the "New Loan" client picker needs
+    clients = db.session.query(LoanClient.id, LoanClient.name, LoanClient.phone, LoanClient.payer_status)\
+        .filter(LoanClient.is_active == True).order_by(LoanClient.name).all()
+    return render_template('finance/loans.html', loans=page, loan_count=query.order_by(None).count(),
+                           next_url=next_page_url(next_cursor, filters), filters=filters,
+                           clients=clients, today=get_local_today())
 
 
 @finance_bp.route('/loans/create', methods=['POST'])
@@ -420,7 +668,10 @@ def create_loan():
             due_date=loan_data['due_date'],
             status='active'
         )
+        refresh_loan_state(loan)
         db.session.add(loan)
+        db.session.flush()
+        sync_loan_schedule(loan)
         db.session.commit()
 
         client = LoanClient.query.get(loan_data['client_id'])
@@ -439,9 +690,11 @@ def create_loan():
 def view_loan(id):
     loan = Loan.query.get_or_404(id)
     if refresh_loan_state(loan):
+        sync_loan_schedule(loan)
         db.session.commit()
     payments = loan.payments.filter_by(is_deleted=False).order_by(LoanPayment.payment_date.desc()).all()
-    return render_template('finance/loan_detail.html', loan=loan, payments=payments, today=get_local_today())
+    return render_template('finance/loan_detail.html', loan=loan, payments=payments,
+                           installments=loan.installments.all(), today=get_local_today())
 
 
 @finance_bp.route('/loans/<int:id>/pay', methods=['POST'])
@@ -479,6 +732,7 @@ def pay_loan(id):
         )
         db.session.add(payment)
         refresh_loan_state(loan)
+        sync_loan_schedule(loan)
         db.session.commit()
 
         log_action(session['username'], 'finance', 'create', 'loan_payment', payment.id,
@@ -550,7 +804,11 @@ def renew_loan(id):
             balance=new_loan_data['total_amount'],
             status='active'
         )
+        refresh_loan_state(new_loan)
         db.session.add(new_loan)
+        db.session.flush()
+        sync_loan_schedule(old_loan)
+        sync_loan_schedule(new_loan)
         db.session.commit()
 
         # Log the renewal action
@@ -578,6 +836,7 @@ def delete_loan(id):
     loan = Loan.query.get_or_404(id)
     loan.is_deleted = True
     loan.deleted_at = db.func.now()
+    sync_loan_schedule(loan)
     db.session.commit()
 
     log_action(session['username'], 'finance', 'delete', 'loan', loan.id,
@@ -614,14 +873,9 @@ def edit_loan(id):
             delta = due_date - issue_date
             loan.duration_weeks = delta.days // 7
 
-            # Update status based on new due date
-            today = get_local_today()
-            if loan.balance <= 0:
-                loan.status = 'paid'
-            elif due_date < today:
-                loan.status = 'overdue'
-            else:
-                loan.status = 'active'
+            # Re-derive accrual and status from the new dates
+            refresh_loan_state(loan)
+            sync_loan_schedule(loan)
 
             db.session.commit()
 
@@ -652,8 +906,21 @@ def edit_loan(id):
 @finance_bp.route('/group-loans')
 @login_required('finance')
 def group_loans():
-    all_groups = GroupLoan.query.filter_by(is_deleted=False).order_by(GroupLoan.created_at.desc()).all()
-    return render_template('finance/group_loans.html', groups=all_groups, today=get_local_today())
+    filters = {'status': _choice_arg('status', LOAN_STATUSES), 'q': _search_arg()}
+
+    query = GroupLoan.query.filter(GroupLoan.is_deleted == False)
+    if filters['status']:
+        query = query.filter(GroupLoan.status == filters['status'])
+    if filters['q']:
+        query = query.filter(GroupLoan.group_name.ilike(f"%{filters['q']}%"))
+
+    # Newest first; ids follow creation order and, unlike created_at, are never NULL
+    page, next_cursor = keyset_page(query, [GroupLoan.id], request.args.get('cursor'), page_size_arg())
+    if wants_json():
+        return keyset_json('finance/_group_loan_rows.html', page, next_cursor, filters, _group_loan_list_item,
+                           groups=page)
+    return render_template('finance/group_loans.html', groups=page, group_count=query.order_by(None).count(),
+                           next_url=next_page_url(next_cursor, filters), filters=filters, today=get_local_today())
 
 
 @finance_bp.route('/group-loans/create', methods=['POST'])
@@ -684,6 +951,8 @@ def create_group_loan():
             status='active'
         )
         db.session.add(group)
+        db.session.flush()
+        sync_group_schedule(group)
         db.session.commit()
 
         log_action(session['username'], 'finance', 'create', 'group_loan', group.id,
@@ -701,7 +970,8 @@ def create_group_loan():
 def view_group_loan(id):
     group = GroupLoan.query.get_or_404(id)
     payments = group.payments.filter_by(is_deleted=False).order_by(GroupLoanPayment.payment_date.desc()).all()
-    return render_template('finance/group_loan_detail.html', group=group, payments=payments, today=get_local_today())
+    return render_template('finance/group_loan_detail.html', group=group, payments=payments,
+                           installments=group.installments.all(), today=get_local_today())
 
 
 @finance_bp.route('/group-loans/<int:id>/pay', methods=['POST'])
@@ -747,6 +1017,7 @@ def pay_group_loan(id):
             balance_after=group.balance, notes=notes
         )
         db.session.add(payment)
+        sync_group_schedule(group)
         db.session.commit()
 
         log_action(session['username'], 'finance', 'create', 'group_loan_payment', payment.id,
@@ -764,6 +1035,7 @@ def pay_group_loan(id):
 def delete_group_loan(id):
     group = GroupLoan.query.get_or_404(id)
     group.is_deleted = True
+    sync_group_schedule(group)
     db.session.commit()
 
     log_action(session['username'], 'finance', 'delete', 'group_loan', group.id,
@@ -803,6 +1075,7 @@ def edit_group_loan(id):
                 group.status = 'overdue'
             else:
                 group.status = 'active'
+            sync_group_schedule(group)
 
             db.session.commit()
 
@@ -835,6 +1108,104 @@ def payments():
     return render_template('finance/payments.html', loan_payments=loan_payments, group_payments=group_payments)
 
 
+# ============ COLLECTIONS ============
+
+COLLECTIONS_ARREARS_LIMIT = 200
+
+
+@finance_bp.route('/collections')
+@login_required('finance')
+def collections():
+    """Installments due this week and loans behind on their schedule."""
+    refresh_active_loans()
+    today = get_local_today()
+    week_end = today + timedelta(days=6)
+
+    due_this_week = open_installments(today, week_end).options(
+        selectinload(LoanInstallment.loan).selectinload(Loan.client),
+        selectinload(LoanInstallment.group_loan),
+    ).order_by(LoanInstallment.due_date, LoanInstallment.id).all()
+
+    outstanding = db.func.sum(LoanInstallment.amount_due - LoanInstallment.amount_paid)
+    oldest_due = db.func.min(LoanInstallment.due_date)
+    arrears_rows = open_installments(end_date=today - timedelta(days=1)).with_entities(
+        LoanInstallment.loan_id,
+        LoanInstallment.group_loan_id,
+        oldest_due.label('oldest_due'),
+        db.func.count(LoanInstallment.id).label('installments'),
+        outstanding.label('amount'),
+    ).group_by(
+        LoanInstallment.loan_id, LoanInstallment.group_loan_id
+    ).order_by(oldest_due, LoanInstallment.loan_id, LoanInstallment.group_loan_id).all()
+
+    loan_ids = [row.loan_id for row in arrears_rows[:COLLECTIONS_ARREARS_LIMIT] if row.loan_id]
+    group_ids = [row.group_loan_id for row in arrears_rows[:COLLECTIONS_ARREARS_LIMIT] if row.group_loan_id]
+    loans_by_id = {
+        loan.id: loan
+        for loan in Loan.query.options(selectinload(Loan.client)).filter(Loan.id.in_(loan_ids)).all()
+    } if loan_ids else {}
+    groups_by_id = {
+        group.id: group for group in GroupLoan.query.filter(GroupLoan.id.in_(group_ids)).all()
+    } if group_ids else {}
+
+    arrears = []
+    for row in arrears_rows[:COLLECTIONS_ARREARS_LIMIT]:
+        if row.loan_id:
+            loan = loans_by_id.get(row.loan_id)
+            name = loan.client.name if loan and loan.client else 'Unknown'
+            url = url_for('finance.view_loan', id=row.loan_id)
+        else:
+            group = groups_by_id.get(row.group_loan_id)
+            name = group.group_name if group else 'Unknown'
+            url = url_for('finance.view_group_loan', id=row.group_loan_id)
+        arrears.append({
+            'name': name,
+            'url': url,
+            'is_group': bool(row.group_loan_id),
+            'oldest_due': row.oldest_due,
+            'days_overdue': (today - row.oldest_due).days,
+            'installments': row.installments,
+            'amount': row.amount or Decimal('0'),
+        })
+
+    return render_template(
+        'finance/collections.html',
+        today=today,
+        week_end=week_end,
+        due_this_week=due_this_week,
+        due_this_week_total=sum((item.amount_outstanding for item in due_this_week), Decimal('0')),
+        arrears=arrears,
+        arrears_count=len(arrears_rows),
+        arrears_total=sum((row.amount or Decimal('0') for row in arrears_rows), Decimal('0')),
+    )
+
+
+# ============ PORTFOLIO AT RISK ============
+
+@finance_bp.route('/portfolio-at-risk')
+@login_required('finance')
+def portfolio_at_risk():
+    """PAR aging as of today plus the trend from stored daily snapshots."""
+    refresh_active_loans()
+    today = get_local_today()
+    days = request.args.get('days', 90, type=int)
+    if days not in TREND_RANGES:
+        days = 90
+
+    # Today's figures are computed anyway; storing them keeps the trend filled without the cron job
+    current = record_portfolio_snapshots(today)
+    current['all'] = current['individual'] + current['group']
+    return render_template(
+        'finance/portfolio_at_risk.html',
+        today=today,
+        current=current,
+        trend=snapshot_trend(days, today),
+        days=days,
+        trend_ranges=TREND_RANGES,
+        par_thresholds=PAR_THRESHOLDS,
+    )
+
+
 # ============ LOAN AGREEMENT ============
 
 @finance_bp.route('/loans/preview-agreement', methods=['POST'])
@@ -917,6 +1288,7 @@ def create_loan_with_agreement():
             due_date=loan_data['due_date'],
             status='active'
         )
+        refresh_loan_state(loan)
         db.session.add(loan)
         db.session.flush()
 
@@ -937,6 +1309,7 @@ def create_loan_with_agreement():
                     )
                     db.session.add(doc)
 
+        sync_loan_schedule(loan)
         db.session.commit()
 
         client = LoanClient.query.get(loan_data['client_id'])
@@ -1188,6 +1561,7 @@ def create_group_loan_with_agreement():
                     )
                     db.session.add(doc)
 
+        sync_group_schedule(group)
         db.session.commit()
 
         log_action(session['username'], 'finance', 'create', 'group_loan', group.id,
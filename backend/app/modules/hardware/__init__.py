@@ -7,7 +7,7 @@ from app.models.hardware import (
 )
 from app.models.customer import Customer
 from app.modules.auth import login_required, log_action
-from app.extensions import db
+from app.extensions import db, image_fetcher
 from app.utils.timezone import get_local_today
 from app.utils.utils import generate_reference_number
 from app.utils.image_fetch import fetch_product_image_async, fetch_product_image
@@ -162,7 +162,8 @@ def stock():
     for item in items:
         product_images[item.id] = ProductImage.get_images('hardware', item.id)
     return render_template('hardware/stock.html', stock=items, categories=categories,
-                           show_inactive=show_inactive, product_images=product_images)
+                           show_inactive=show_inactive, product_images=product_images,
+                           image_jobs=image_fetcher.status_for('HardwareStock'))
 
 
 @hardware_bp.route('/stock/add', methods=['POST'])
@@ -431,21 +432,22 @@ def delete_image(id, image_id):
 @hardware_bp.route('/stock/fetch-all-images', methods=['POST'])
 @login_required('hardware')
 def fetch_all_images():
-    """Clear all existing images and re-fetch for all active stock items"""
+    """Re-fetch images for all active stock items"""
     items = HardwareStock.query.filter(HardwareStock.is_active == True).all()
 
-    # Clear all existing images first so they all get re-fetched
-    for item in items:
-        item.image_url = None
-    db.session.commit()
-
+    # Existing images stay until their replacement is found, so items the
+    # full queue turns away keep the image they have.
     count = 0
     for item in items:
         category_name = item.category.name if item.category else None
-        fetch_product_image_async(item.id, item.item_name, category_name, model_class='HardwareStock')
-        count += 1
-
-    flash(f'Re-fetching images for {count} items in the background. Refresh the page in a few seconds.', 'success')
+        if fetch_product_image_async(item.id, item.item_name, category_name, model_class='HardwareStock',
+                                     replace_image_url=item.image_url or None):
+            count += 1
+
+    message = f'Re-fetching images for {count} items in the background. Refresh the page in a few seconds.'
+    if count < len(items):
+        message += f' {len(items) - count} items were skipped because they are already queued or the queue is full.'
+    flash(message, 'success')
     return redirect(url_for('hardware.stock'))
 
 
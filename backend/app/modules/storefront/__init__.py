@@ -21,6 +21,8 @@ from app.models.website import (
     WebsiteOrderRequest,
 )
 from app.utils.branding import get_site_settings
+from app.utils.notifications import inquiry_notification, notify_staff, order_notification
+from app.utils.page_cache import cached_public_page
 from app.utils.rate_limit import consume_limit
 
 storefront_bp = Blueprint('storefront', __name__, template_folder='../../templates/storefront')
@@ -47,13 +49,9 @@ def get_published_products(product_type=None, limit=None, featured_only=False):
     if limit:
         query = query.limit(limit)
     
-    products = []
-    for item in query.all():
-        public_data = item.to_public_dict()
-        if public_data:  # Only include if inventory item still exists
-            products.append(public_data)
-    
-    return products
+    # Stock, categories and images are batch-loaded; products whose
+    # inventory item no longer exists are left out.
+    return PublishedProduct.public_catalog(query.all())
 
 
 def get_safe_boutique_products(limit=None):
@@ -121,6 +119,7 @@ def _order_items_are_valid(items):
 # ============ PUBLIC ROUTES (READ-ONLY) ============
 
 @storefront_bp.route('/')
+@cached_public_page
 def home():
     """
     Public storefront homepage.
@@ -165,6 +164,7 @@ def boutique():
 
 
 @storefront_bp.route('/shop')
+@cached_public_page
 def shop():
     """
     Full product listings page.
@@ -249,6 +249,8 @@ def submit_loan_inquiry():
         )
         
         db.session.add(inquiry)
+        db.session.flush()
+        notify_staff(inquiry_notification(inquiry))
         db.session.commit()
         
         return jsonify({
@@ -297,13 +299,15 @@ def submit_order_request():
             customer_name=data.get('customer_name', '').strip(),
             customer_phone=data.get('customer_phone', '').strip(),
             customer_email=data.get('customer_email', '').strip() if data.get('customer_email') else None,
-            items=data.get('items'),  # JSON array
             preferred_branch=data.get('preferred_branch'),
             source='website',
             status='new'
         )
+        order.set_items(data.get('items'))  # JSON array plus order lines and totals
         
         db.session.add(order)
+        db.session.flush()
+        notify_staff(order_notification(order))
         db.session.commit()
         
         return jsonify({
@@ -9,10 +9,16 @@ This module provides managers with full control over:
 
 CRITICAL: This module is accessible ONLY to managers.
 """
+import json
+import queue
+import time
 from datetime import datetime
 from functools import wraps
 from decimal import Decimal, InvalidOperation
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
+from flask import (
+    Blueprint, Response, render_template, request, redirect, url_for, flash, session, jsonify, current_app,
+    stream_with_context,
+)
 from werkzeug.utils import secure_filename
 from sqlalchemy.exc import SQLAlchemyError
 from app.extensions import db
@@ -23,17 +29,23 @@ from app.models.website import (
     PublishedProduct,
     WebsiteImage,
     WebsiteSettings,
+    PRODUCT_TYPE_BITS,
 )
 from app.models.finance import LoanClient
 from app.models.boutique import BoutiqueStock, BoutiqueCategory
 from app.models.hardware import HardwareStock, HardwareCategory
 from app.modules.auth import get_session_user, log_action as audit_log_action
-from app.utils.branding import get_site_settings
+from app.utils.branding import get_site_settings, invalidate_site_settings
+from app.utils.notifications import notification_hub
+from app.utils.page_cache import invalidate_public_pages
 from app.utils.timezone import get_local_now
 import os
 
 website_bp = Blueprint('website', __name__, template_folder='../../templates/website_management')
 
+# Most records a notification poll returns; the popup only shows a handful.
+NOTIFY_POLL_LIMIT = 50
+
 from app.utils.uploads import allowed_image, validate_and_save_image
 
 
@@ -124,33 +136,28 @@ def can_manage_loan_inquiries():
 
 
 def can_access_order(order):
-    if get_user_section() == 'manager':
+    return order_matches_section(order.product_types, get_user_section())
+
+
+def order_matches_section(product_types, section):
+    """Whether an order with the ``product_types`` mask concerns ``section``."""
+    if section == 'manager':
         return True
-    if get_user_section() == 'finance':
-        return False
-    for item in order.items or []:
-        item_type = item.get('type') or item.get('product_type')
-        if item_type == get_user_section():
-            return True
-    return False
+    if section == 'finance':
+        return False  # Finance doesn't handle product orders
+    # For boutique/hardware, only orders that contain items of their type
+    return bool((product_types or 0) & PRODUCT_TYPE_BITS.get(section, 0))
 
 
-def filter_orders_by_section(orders):
-    """Filter order list so workers only see orders containing their product types."""
-    section = get_user_section()
+def section_orders_query(section=None):
+    """Active order requests this section may see, filtered in SQL."""
+    section = section or get_user_section()
+    query = WebsiteOrderRequest.query.filter_by(is_active=True)
     if section == 'manager':
-        return orders
+        return query
     if section == 'finance':
-        return []  # Finance doesn't handle product orders
-    # For boutique/hardware, only show orders that contain items of their type
-    filtered = []
-    for order in orders:
-        if order.items:
-            for item in order.items:
-                if item.get('type') == section or item.get('product_type') == section:
-                    filtered.append(order)
-                    break
-    return filtered
+        return query.filter(db.false())  # Finance doesn't handle product orders
+    return query.filter(WebsiteOrderRequest.product_type_filter(section))
 
 
 def log_website_action(action, entity, entity_id=None, details=None):
@@ -227,9 +234,7 @@ def dashboard():
         pending_inquiries = 0
 
     # Count pending order requests (filtered by section)
-    all_new_orders = WebsiteOrderRequest.query.filter_by(status='new', is_active=True).all()
-    filtered_new_orders = filter_orders_by_section(all_new_orders)
-    pending_orders = len(filtered_new_orders)
+    pending_orders = section_orders_query(section).filter_by(status='new').count()
 
     # Recent inquiries (only finance + manager)
     if section in ('manager', 'finance'):
@@ -239,9 +244,8 @@ def dashboard():
         recent_inquiries = []
 
     # Recent orders (filtered by section)
-    all_recent = WebsiteOrderRequest.query.filter_by(is_active=True)\
-        .order_by(WebsiteOrderRequest.submitted_at.desc()).limit(20).all()
-    recent_orders = filter_orders_by_section(all_recent)[:5]
+    recent_orders = section_orders_query(section)\
+        .order_by(WebsiteOrderRequest.submitted_at.desc()).limit(5).all()
 
     return render_template('website_management/dashboard.html',
         published_count=published_count,
@@ -324,6 +328,8 @@ def website_settings():
             settings.logo_path = f'uploads/website/{filename}'
 
         db.session.commit()
+        invalidate_site_settings()
+        invalidate_public_pages()
         log_website_action('update', 'website_settings', settings.id, {'company_name': settings.company_name})
         flash('Website settings updated successfully.', 'success')
         return redirect(url_for('website.website_settings'))
@@ -427,6 +433,7 @@ def publish_product():
         db.session.add(published)
     
     db.session.commit()
+    invalidate_public_pages()
     log_website_action('publish', 'published_product', existing.id if existing else published.id, {
         'product_type': product_type,
         'product_id': product_id,
@@ -445,6 +452,7 @@ def unpublish_product(id):
         return redirect(url_for('website.products'))
     published.is_published = False
     db.session.commit()
+    invalidate_public_pages()
     
     log_website_action('unpublish', 'published_product', published.id, {
         'product_type': published.product_type,
@@ -465,6 +473,7 @@ def republish_product(id):
     published.is_published = True
     published.published_at = get_local_now()
     db.session.commit()
+    invalidate_public_pages()
 
     log_website_action('republish', 'published_product', published.id, {
         'product_type': published.product_type,
@@ -496,6 +505,7 @@ def edit_published_product(id):
         published.published_at = get_local_now()
 
     db.session.commit()
+    invalidate_public_pages()
     log_website_action('update', 'published_product', published.id, {
         'product_type': published.product_type,
         'product_id': published.product_id,
@@ -517,6 +527,7 @@ def delete_published_product(id):
     product_info = f'{published.product_type}:{published.product_id}'
     db.session.delete(published)
     db.session.commit()
+    invalidate_public_pages()
 
     log_website_action('delete', 'published_product', id, {'product_info': product_info})
     flash('Product record deleted. You can re-publish it from the inventory below.', 'success')
@@ -577,6 +588,7 @@ def upload_image():
     )
     db.session.add(image)
     db.session.commit()
+    invalidate_public_pages()
     
     log_website_action('upload', 'website_image', image.id, {'filename': filename})
     flash('Image uploaded successfully', 'success')
@@ -590,6 +602,7 @@ def toggle_image(id):
     image = WebsiteImage.query.get_or_404(id)
     image.is_active = not image.is_active
     db.session.commit()
+    invalidate_public_pages()
     
     status = 'activated' if image.is_active else 'deactivated'
     log_website_action('toggle', 'website_image', image.id, {'status': status})
@@ -708,24 +721,28 @@ def order_requests():
         return redirect(url_for('website.loan_inquiries'))
 
     status_filter = request.args.get('status', 'all')
+    page = request.args.get('page', 1, type=int)
+    per_page = 50
 
-    query = WebsiteOrderRequest.query.filter_by(is_active=True)
+    section_query = section_orders_query(section)
+    query = section_query
     if status_filter != 'all':
         query = query.filter_by(status=status_filter)
 
-    all_orders = query.order_by(WebsiteOrderRequest.submitted_at.desc()).all()
-    orders = filter_orders_by_section(all_orders)
+    pagination = query.order_by(WebsiteOrderRequest.submitted_at.desc())\
+        .paginate(page=page, per_page=per_page, error_out=False)
 
     # Count by status (also filtered by section)
-    all_active = WebsiteOrderRequest.query.filter_by(is_active=True).all()
-    section_orders = filter_orders_by_section(all_active)
     status_counts = {'new': 0, 'contacted': 0, 'fulfilled': 0, 'cancelled': 0}
-    for o in section_orders:
-        if o.status in status_counts:
-            status_counts[o.status] += 1
+    counts = section_query.with_entities(WebsiteOrderRequest.status, db.func.count(WebsiteOrderRequest.id))\
+        .group_by(WebsiteOrderRequest.status).all()
+    for status, count in counts:
+        if status in status_counts:
+            status_counts[status] = count
 
     return render_template('website_management/order_requests.html',
-        orders=orders,
+        orders=pagination.items,
+        pagination=pagination,
         status_filter=status_filter,
         status_counts=status_counts
     )
@@ -778,8 +795,11 @@ def update_order_status(id):
 @website_bp.route('/api/new-orders')
 @staff_required
 def check_new_orders():
-    """Check for new orders since a given timestamp. Used by polling notifications.
+    """Check for new orders since a given watermark. Used by polling notifications.
 
+    Clients pass ``after_id`` (the ``watermark`` from their last response); if
+    no order has been created since, this returns after one primary-key
+    lookup. ``since`` (an ISO timestamp) is still accepted for first polls.
     Filtered by section: boutique workers see boutique orders only, etc.
     Finance workers get empty (they poll /api/new-inquiries instead).
     """
@@ -787,16 +807,24 @@ def check_new_orders():
     if section == 'finance':
         return jsonify({'orders': [], 'count': 0})
 
-    since = request.args.get('since')
-    query = WebsiteOrderRequest.query.filter_by(status='new', is_active=True)
-    if since:
-        try:
-            since_dt = datetime.fromisoformat(since)
-            query = query.filter(WebsiteOrderRequest.submitted_at > since_dt)
-        except (ValueError, TypeError):
-            pass
+    after_id = request.args.get('after_id', type=int)
     try:
-        all_orders = query.order_by(WebsiteOrderRequest.submitted_at.desc()).all()
+        watermark = db.session.query(db.func.max(WebsiteOrderRequest.id)).scalar() or 0
+        if after_id is not None and watermark <= after_id:
+            return jsonify({'orders': [], 'count': 0, 'watermark': watermark})
+
+        query = section_orders_query(section).filter_by(status='new')
+        if after_id is not None:
+            query = query.filter(WebsiteOrderRequest.id > after_id)
+        else:
+            since = request.args.get('since')
+            if since:
+                try:
+                    since_dt = datetime.fromisoformat(since)
+                    query = query.filter(WebsiteOrderRequest.submitted_at > since_dt)
+                except (ValueError, TypeError):
+                    pass
+        orders = query.order_by(WebsiteOrderRequest.id.desc()).limit(NOTIFY_POLL_LIMIT).all()
     except SQLAlchemyError:
         current_app.logger.error(
             'Order notification polling unavailable on %s due to database schema/config drift.',
@@ -804,18 +832,18 @@ def check_new_orders():
         )
         return jsonify({'orders': [], 'count': 0, 'degraded': True}), 200
 
-    orders = filter_orders_by_section(all_orders)
     return jsonify({
         'orders': [{
             'id': o.id,
             'customer_name': o.customer_name,
             'customer_phone': o.customer_phone,
             'items': o.items,
-            'total_amount': o.total_amount,
+            'total_amount': float(o.total_amount or 0),
             'item_count': o.item_count,
             'submitted_at': o.submitted_at.isoformat() if o.submitted_at else None
         } for o in orders],
-        'count': len(orders)
+        'count': len(orders),
+        'watermark': watermark,
     })
 
 
@@ -830,16 +858,24 @@ def check_new_inquiries():
     if section in ('boutique', 'hardware'):
         return jsonify({'inquiries': [], 'count': 0})
 
-    since = request.args.get('since')
-    query = WebsiteLoanInquiry.query.filter_by(status='new', is_active=True)
-    if since:
-        try:
-            since_dt = datetime.fromisoformat(since)
-            query = query.filter(WebsiteLoanInquiry.submitted_at > since_dt)
-        except (ValueError, TypeError):
-            pass
+    after_id = request.args.get('after_id', type=int)
     try:
-        inquiries = query.order_by(WebsiteLoanInquiry.submitted_at.desc()).all()
+        watermark = db.session.query(db.func.max(WebsiteLoanInquiry.id)).scalar() or 0
+        if after_id is not None and watermark <= after_id:
+            return jsonify({'inquiries': [], 'count': 0, 'watermark': watermark})
+
+        query = WebsiteLoanInquiry.query.filter_by(status='new', is_active=True)
+        if after_id is not None:
+            query = query.filter(WebsiteLoanInquiry.id > after_id)
+        else:
+            since = request.args.get('since')
+            if since:
+                try:
+                    since_dt = datetime.fromisoformat(since)
+                    query = query.filter(WebsiteLoanInquiry.submitted_at > since_dt)
+                except (ValueError, TypeError):
+                    pass
+        inquiries = query.order_by(WebsiteLoanInquiry.id.desc()).limit(NOTIFY_POLL_LIMIT).all()
     except SQLAlchemyError:
         current_app.logger.error(
             'Loan inquiry polling unavailable on %s due to database schema/config drift.',
@@ -849,5 +885,58 @@ def check_new_inquiries():
 
     return jsonify({
         'inquiries': [i.to_dict() for i in inquiries],
-        'count': len(inquiries)
+        'count': len(inquiries),
+        'watermark': watermark,
     })
+
+
+@website_bp.route('/api/notifications/stream')
+@staff_required
+def notification_stream():
+    """Server-Sent Events feed of new orders and loan inquiries for this section.
+
+    Returns 204 when push is disabled or this worker's streams are all in use;
+    the page then falls back to polling the two endpoints above.
+    """
+    section = get_user_section()
+    wants_orders = section in ('manager', 'boutique', 'hardware')
+    wants_inquiries = section in ('manager', 'finance')
+    if not (wants_orders or wants_inquiries):
+        return '', 204
+
+    subscriber = notification_hub.subscribe()
+    if subscriber is None:
+        return '', 204
+
+    # The stream never touches the database; hand the connection back now
+    # rather than when the response finally closes.
+    db.session.remove()
+    stream_seconds = notification_hub.stream_seconds
+
+    def generate():
+        deadline = time.monotonic() + stream_seconds
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    payload = subscriber.get(timeout=min(15, remaining))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                kind = payload.get('kind')
+                if kind == 'order' and not (wants_orders and order_matches_section(payload.get('product_types'), section)):
+                    continue
+                if kind == 'inquiry' and not wants_inquiries:
+                    continue
+                yield f"event: {kind}\nid: {payload.get('id')}\ndata: {json.dumps(payload, default=str)}\n\n"
+        finally:
+            notification_hub.unsubscribe(subscriber)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
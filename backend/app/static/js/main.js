@@ -279,6 +279,52 @@ function refreshSearchableSelects() {
     initSearchableSelects();
 }
 
+// ============ LOAD MORE (KEYSET PAGES) ============
+// A.keyset-more links point at the next page; with JS the rows are fetched as
+// JSON and appended to data-target, and the link follows itself into view.
+function initKeysetLoadMore() {
+    document.querySelectorAll('a.keyset-more').forEach(function(link) {
+        var target = document.getElementById(link.dataset.target);
+        if (!target || link.dataset.keysetReady) return;
+        link.dataset.keysetReady = 'true';
+        var loading = false;
+
+        function loadMore() {
+            if (loading || !link.href) return;
+            loading = true;
+            link.textContent = 'Loading...';
+            var url = new URL(link.href, window.location.href);
+            url.searchParams.set('format', 'json');
+            fetch(url, {headers: {'Accept': 'application/json'}})
+                .then(function(r) { if (!r.ok) throw new Error(r.status); return r.json(); })
+                .then(function(data) {
+                    target.insertAdjacentHTML('beforeend', data.html || '');
+                    if (data.next_url) {
+                        link.href = data.next_url;
+                        link.textContent = 'Load more';
+                    } else {
+                        link.parentElement.remove();
+                    }
+                })
+                .catch(function() { link.textContent = 'Load more'; })
+                .finally(function() { loading = false; });
+        }
+
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            loadMore();
+        });
+
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(function(entries) {
+                if (entries[0].isIntersecting) loadMore();
+            }, {rootMargin: '200px'}).observe(link);
+        }
+    });
+}
+
+document.addEventListener('DOMContentLoaded', initKeysetLoadMore);
+
 // ============ COLLATERAL UPLOAD ============
 function initCollateralUpload() {
     const uploadZone = document.querySelector('.upload-zone');
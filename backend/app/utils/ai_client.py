@@ -4,13 +4,23 @@ Text chat uses an OpenAI-compatible chat completions API (DeepSeek, OpenAI,
 OpenRouter, local vLLM, etc.). OCR can use either an OpenAI-compatible vision
 endpoint or Anthropic's native Messages API. Providers are selected entirely
 through env vars, so the app can mix DeepSeek chat with Anthropic OCR.
+
+Provider calls share one pooled keep-alive ``requests.Session`` per base
+URL per process, retry 429/5xx responses and connection errors with
+jittered backoff, and stop calling a provider for a cool-down period after
+repeated failures (callers then take their deterministic fallback).
+Per-model call, latency and token counters are kept in ``get_ai_metrics()``.
 """
 
 import base64
+import json
 import logging
 import os
+import random
+import threading
 import time
 from functools import lru_cache
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +71,10 @@ def is_chat_enabled():
     return is_ai_enabled() and _ai_config()['chat_enabled']
 
 
+def get_chat_model():
+    return _ai_config()['chat_model']
+
+
 def is_ocr_enabled():
     ocr = _ocr_config()
     return ocr['enabled'] and bool(ocr['api_key']) and bool(ocr['model'])
@@ -75,40 +89,312 @@ def get_ocr_limits():
     }
 
 
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_sessions = {}
+_sessions_pid = None
+_breakers = {}
+_metrics = {}
+_http_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _http_config():
+    return {
+        'pool_size': int(_env('AI_HTTP_POOL_SIZE', '4')),
+        'max_retries': int(_env('AI_MAX_RETRIES', '2')),
+        'retry_backoff': float(_env('AI_RETRY_BACKOFF_SECONDS', '0.5')),
+        'max_retry_after': float(_env('AI_MAX_RETRY_AFTER_SECONDS', '5')),
+        'circuit_failures': int(_env('AI_CIRCUIT_FAILURES', '5')),
+        'circuit_cooldown': float(_env('AI_CIRCUIT_COOLDOWN_SECONDS', '60')),
+    }
+
+
+def _endpoint_key(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def _get_session(url):
+    """Return this process's pooled session for the provider serving ``url``."""
+    global _sessions_pid
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    key = _endpoint_key(url)
+    with _http_lock:
+        # Sockets must not be shared across gunicorn's fork.
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        session = _sessions.get(key)
+        if session is None:
+            pool_size = max(_http_config()['pool_size'], 1)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[key] = session
+        return session
+
+
+class _CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; one trial call after ``cooldown``."""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = max(threshold, 1)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def allow(self, now):
+        if self.opened_at is None:
+            return True
+        if now - self.opened_at >= self.cooldown and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record(self, ok, now):
+        self.trial_in_flight = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = now
+
+
+def _breaker_for(key):
+    breaker = _breakers.get(key)
+    if breaker is None:
+        cfg = _http_config()
+        breaker = _breakers.setdefault(key, _CircuitBreaker(cfg['circuit_failures'], cfg['circuit_cooldown']))
+    return breaker
+
+
+def _record_metrics(model, *, ok, latency=0.0, retries=0, short_circuited=False, input_tokens=0, output_tokens=0):
+    with _http_lock:
+        stats = _metrics.setdefault(model or 'unknown', {
+            'calls': 0, 'failures': 0, 'short_circuits': 0, 'retries': 0,
+            'latency_total': 0.0, 'latency_max': 0.0,
+            'input_tokens': 0, 'output_tokens': 0,
+        })
+        if short_circuited:
+            stats['short_circuits'] += 1
+            return
+        stats['calls'] += 1
+        stats['failures'] += 0 if ok else 1
+        stats['retries'] += retries
+        stats['latency_total'] += latency
+        stats['latency_max'] = max(stats['latency_max'], latency)
+        stats['input_tokens'] += input_tokens or 0
+        stats['output_tokens'] += output_tokens or 0
+
+
+def get_ai_metrics():
+    """Per-model provider stats for this process, plus open circuit breakers."""
+    with _http_lock:
+        models = {}
+        for model, stats in _metrics.items():
+            calls = stats['calls']
+            models[model] = dict(stats, latency_avg=round(stats['latency_total'] / calls, 3) if calls else 0.0)
+        open_circuits = sorted(key for key, breaker in _breakers.items() if breaker.opened_at is not None)
+    return {'models': models, 'open_circuits': open_circuits}
+
+
+def _retry_delay(attempt, resp=None):
+    cfg = _http_config()
+    retry_after = resp.headers.get('Retry-After') if resp is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), cfg['max_retry_after'])
+        except ValueError:
+            pass
+    return cfg['retry_backoff'] * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def _post_json(url, *, headers, payload, timeout, model, label):
+    """POST with pooling, retries and the circuit breaker.
+
+    Returns ``(data, elapsed, retries)`` where ``data`` is the decoded JSON
+    body of a 200 response, or None after logging why the call failed.
+    """
+    import requests
+
+    key = _endpoint_key(url)
+    with _http_lock:
+        allowed = _breaker_for(key).allow(time.monotonic())
+    if not allowed:
+        logger.info('%s circuit open for %s; skipping call (model=%s)', label, key, model)
+        _record_metrics(model, ok=False, short_circuited=True)
+        return None, 0.0, 0
+
+    session = _get_session(url)
+    max_retries = max(_http_config()['max_retries'], 0)
+    t0 = time.monotonic()
+    data = None
+    attempt = 0
+    while True:
+        resp = None
+        try:
+            resp = session.post(url, json=payload, headers=headers, timeout=timeout)
+            if resp.status_code == 200:
+                data = resp.json()
+                break
+            retryable = resp.status_code in RETRY_STATUS_CODES
+            logger.warning('%s returned %s in %.1fs (model=%s)', label, resp.status_code, time.monotonic() - t0, model)
+        except requests.Timeout as exc:
+            # A read timeout already spent the full budget; do not double it.
+            retryable = isinstance(exc, requests.ConnectTimeout)
+            logger.warning('%s timed out in %.1fs: %s', label, time.monotonic() - t0, exc.__class__.__name__)
+        except requests.RequestException as exc:
+            retryable = isinstance(exc, requests.ConnectionError)
+            logger.warning('%s unreachable in %.1fs: %s', label, time.monotonic() - t0, exc.__class__.__name__)
+        except ValueError as exc:
+            retryable = False
+            logger.warning('%s response parse error: %s', label, exc)
+
+        if not retryable or attempt >= max_retries:
+            break
+        time.sleep(_retry_delay(attempt, resp))
+        attempt += 1
+
+    elapsed = time.monotonic() - t0
+    with _http_lock:
+        _breaker_for(key).record(data is not None, time.monotonic())
+    if data is None:
+        _record_metrics(model, ok=False, latency=elapsed, retries=attempt)
+    return data, elapsed, attempt
+
+
 def _post_chat(messages, *, api_key, base_url, model, max_tokens, timeout):
     """POST to an OpenAI-compatible /chat/completions endpoint."""
+    url = f"{base_url.rstrip('/')}/chat/completions"
+    headers = {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+    }
+    payload = {
+        'model': model,
+        'messages': messages,
+        'max_tokens': max_tokens,
+        'temperature': 0.3,
+    }
+
+    data, elapsed, retries = _post_json(
+        url, headers=headers, payload=payload, timeout=timeout, model=model, label='AI provider',
+    )
+    if data is None:
+        return None
+    usage = data.get('usage') or {}
+    try:
+        content = data['choices'][0]['message']['content']
+    except (KeyError, IndexError, TypeError) as exc:
+        logger.warning('AI response parse error: %s', exc)
+        _record_metrics(model, ok=False, latency=elapsed, retries=retries)
+        return None
+    _record_metrics(model, ok=True, latency=elapsed, retries=retries,
+                    input_tokens=usage.get('prompt_tokens', 0), output_tokens=usage.get('completion_tokens', 0))
+    logger.debug('AI response in %.1fs (%d tokens)', elapsed, usage.get('total_tokens', 0))
+    return content
+
+
+def _stream_chat(messages, *, api_key, base_url, model, max_tokens, timeout):
+    """Stream an OpenAI-compatible chat completion, yielding text deltas.
+
+    Retries and the circuit breaker apply until the response starts; once
+    tokens flow, a broken stream simply ends early. The generator returns
+    True only if the provider finished the answer (``[DONE]`` or a
+    ``finish_reason``), so callers can tell a complete text from a cut-off one.
+    """
     import requests
 
     url = f"{base_url.rstrip('/')}/chat/completions"
     headers = {
         'Authorization': f'Bearer {api_key}',
         'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
     }
     payload = {
         'model': model,
         'messages': messages,
         'max_tokens': max_tokens,
         'temperature': 0.3,
+        'stream': True,
     }
 
+    key = _endpoint_key(url)
+    with _http_lock:
+        allowed = _breaker_for(key).allow(time.monotonic())
+    if not allowed:
+        logger.info('AI provider circuit open for %s; skipping stream (model=%s)', key, model)
+        _record_metrics(model, ok=False, short_circuited=True)
+        return False
+
+    session = _get_session(url)
+    max_retries = max(_http_config()['max_retries'], 0)
     t0 = time.monotonic()
+    resp = None
+    attempt = 0
+    while True:
+        try:
+            resp = session.post(url, json=payload, headers=headers, timeout=timeout, stream=True)
+            if resp.status_code == 200:
+                break
+            retryable = resp.status_code in RETRY_STATUS_CODES
+            logger.warning('AI provider stream returned %s in %.1fs (model=%s)',
+                           resp.status_code, time.monotonic() - t0, model)
+            resp.close()
+        except requests.RequestException as exc:
+            retryable = isinstance(exc, (requests.ConnectionError, requests.ConnectTimeout))
+            logger.warning('AI provider stream unreachable in %.1fs: %s', time.monotonic() - t0, exc.__class__.__name__)
+        failed_resp, resp = resp, None
+        if not retryable or attempt >= max_retries:
+            break
+        time.sleep(_retry_delay(attempt, failed_resp))
+        attempt += 1
+
+    if resp is None:
+        with _http_lock:
+            _breaker_for(key).record(False, time.monotonic())
+        _record_metrics(model, ok=False, latency=time.monotonic() - t0, retries=attempt)
+        return False
+
+    usage = {}
+    provider_error = False
+    finished = False
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=timeout)
-        elapsed = time.monotonic() - t0
-        if resp.status_code != 200:
-            logger.warning('AI provider returned %s in %.1fs (model=%s)', resp.status_code, elapsed, model)
-            return None
-        data = resp.json()
-        content = data['choices'][0]['message']['content']
-        logger.debug('AI response in %.1fs (%d tokens)', elapsed, data.get('usage', {}).get('total_tokens', 0))
-        return content
-    except requests.RequestException as exc:
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            chunk = line[5:].strip()
+            if chunk == '[DONE]':
+                finished = True
+                break
+            event = json.loads(chunk)
+            usage = event.get('usage') or usage
+            choices = event.get('choices') or []
+            delta = (choices[0].get('delta') or {}).get('content') if choices else None
+            if delta:
+                yield delta
+            if choices and choices[0].get('finish_reason'):
+                finished = True
+    except (requests.RequestException, ValueError) as exc:
+        provider_error = True
+        logger.warning('AI provider stream interrupted after %.1fs: %s', time.monotonic() - t0, exc.__class__.__name__)
+    finally:
+        resp.close()
         elapsed = time.monotonic() - t0
-        logger.warning('AI provider unreachable in %.1fs: %s', elapsed, exc.__class__.__name__)
-        return None
-    except (KeyError, IndexError, ValueError) as exc:
-        logger.warning('AI response parse error: %s', exc)
-        return None
+        with _http_lock:
+            _breaker_for(key).record(not provider_error, time.monotonic())
+        _record_metrics(model, ok=not provider_error, latency=elapsed, retries=attempt,
+                        input_tokens=usage.get('prompt_tokens', 0), output_tokens=usage.get('completion_tokens', 0))
+    if not finished and not provider_error:
+        logger.warning('AI provider stream ended without finishing (model=%s)', model)
+    return finished and not provider_error
 
 
 def _anthropic_messages_url(base_url):
@@ -122,8 +408,6 @@ def _anthropic_messages_url(base_url):
 
 def _post_anthropic_message(content_blocks, *, api_key, base_url, model, max_tokens, timeout, system=None):
     """POST to Anthropic's native Messages API."""
-    import requests
-
     url = _anthropic_messages_url(base_url)
     headers = {
         'x-api-key': api_key,
@@ -138,40 +422,31 @@ def _post_anthropic_message(content_blocks, *, api_key, base_url, model, max_tok
     if system:
         payload['system'] = system
 
-    t0 = time.monotonic()
-    try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=timeout)
-        elapsed = time.monotonic() - t0
-        if resp.status_code != 200:
-            logger.warning(
-                'Anthropic OCR provider returned %s in %.1fs (model=%s)',
-                resp.status_code, elapsed, model,
-            )
-            return None
-
-        data = resp.json()
-        parts = data.get('content', [])
-        text_parts = [part.get('text', '') for part in parts if part.get('type') == 'text']
-        content = '\n'.join(part for part in text_parts if part).strip()
-        if not content:
-            logger.warning('Anthropic OCR response parse error: missing text block')
-            return None
-
-        logger.debug(
-            'Anthropic OCR response in %.1fs (%d input tokens / %d output tokens)',
-            elapsed,
-            data.get('usage', {}).get('input_tokens', 0),
-            data.get('usage', {}).get('output_tokens', 0),
-        )
-        return content
-    except requests.RequestException as exc:
-        elapsed = time.monotonic() - t0
-        logger.warning('Anthropic OCR provider unreachable in %.1fs: %s', elapsed, exc.__class__.__name__)
+    data, elapsed, retries = _post_json(
+        url, headers=headers, payload=payload, timeout=timeout, model=model, label='Anthropic OCR provider',
+    )
+    if data is None:
         return None
-    except (KeyError, IndexError, ValueError) as exc:
-        logger.warning('Anthropic OCR response parse error: %s', exc)
+
+    usage = data.get('usage') or {}
+    parts = data.get('content') or []
+    text_parts = [part.get('text', '') for part in parts if isinstance(part, dict) and part.get('type') == 'text']
+    content = '\n'.join(part for part in text_parts if part).strip()
+    if not content:
+        logger.warning('Anthropic OCR response parse error: missing text block')
+        _record_metrics(model, ok=False, latency=elapsed, retries=retries)
         return None
 
+    _record_metrics(model, ok=True, latency=elapsed, retries=retries,
+                    input_tokens=usage.get('input_tokens', 0), output_tokens=usage.get('output_tokens', 0))
+    logger.debug(
+        'Anthropic OCR response in %.1fs (%d input tokens / %d output tokens)',
+        elapsed,
+        usage.get('input_tokens', 0),
+        usage.get('output_tokens', 0),
+    )
+    return content
+
 
 def ai_chat(prompt, *, system=None):
     """Send a text chat completion. Returns response string or None on failure."""
@@ -194,6 +469,30 @@ def ai_chat(prompt, *, system=None):
     )
 
 
+def ai_chat_stream(prompt, *, system=None):
+    """Stream a text chat completion, yielding text chunks. Yields nothing on failure.
+
+    The generator's return value is True when the provider finished the answer.
+    """
+    if not is_ai_enabled():
+        return False
+
+    cfg = _ai_config()
+    messages = []
+    if system:
+        messages.append({'role': 'system', 'content': system})
+    messages.append({'role': 'user', 'content': prompt})
+
+    return (yield from _stream_chat(
+        messages,
+        api_key=cfg['api_key'],
+        base_url=cfg['base_url'],
+        model=cfg['chat_model'],
+        max_tokens=cfg['max_tokens'],
+        timeout=cfg['timeout'],
+    ))
+
+
 def ai_chat_multi(messages, *, system=None):
     """Send a multi-turn conversation. messages is a list of {role, content} dicts."""
     if not is_ai_enabled():
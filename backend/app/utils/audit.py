@@ -0,0 +1,142 @@
+"""Buffered audit-log writer.
+
+``log_action`` hands rows to ``audit_writer`` instead of committing them
+inline. In ``async`` mode rows collect in an in-process buffer and a
+background thread bulk-inserts them (one multi-row INSERT, one commit) once
+``AUDIT_LOG_BATCH_SIZE`` rows are waiting or ``AUDIT_LOG_FLUSH_SECONDS`` have
+passed. ``sync`` mode keeps the old add-and-commit behaviour, which is what
+tests and one-off scripts want.
+
+Pending rows are flushed on interpreter exit and from gunicorn's
+``worker_exit`` hook, so a graceful restart does not lose audit history.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from app.utils.timezone import get_local_now
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    def __init__(self, app=None):
+        self.app = None
+        self.mode = 'sync'
+        self.batch_size = 50
+        self.flush_seconds = 2.0
+        self._buffer = deque()
+        self._max_buffer = 10000
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._thread_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('AUDIT_LOG_MODE', 'async')
+        self.batch_size = max(int(app.config.get('AUDIT_LOG_BATCH_SIZE', 50)), 1)
+        self.flush_seconds = max(float(app.config.get('AUDIT_LOG_FLUSH_SECONDS', 2.0)), 0.1)
+        self._max_buffer = max(int(app.config.get('AUDIT_LOG_MAX_BUFFER', 10000)), self.batch_size)
+        app.extensions['audit_writer'] = self
+        atexit.register(self.shutdown)
+
+    def log(self, **row):
+        """Record one audit row; ``created_at`` is stamped now, not at flush time."""
+        row.setdefault('created_at', get_local_now())
+        if self.mode != 'async':
+            self._write_sync(row)
+            return
+
+        with self._lock:
+            if len(self._buffer) >= self._max_buffer:
+                self._buffer.popleft()
+                logger.warning('Audit buffer full (%s rows); dropping the oldest entry', self._max_buffer)
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _write_sync(self, row):
+        from app.extensions import db
+        from app.models.user import AuditLog
+
+        try:
+            db.session.add(AuditLog(**row))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+
+    def _ensure_thread(self):
+        # Threads do not survive gunicorn's fork, so (re)start per worker pid.
+        if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+                return
+            self._stopping = False
+            self._thread_pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def _drain(self):
+        with self._lock:
+            rows = list(self._buffer)
+            self._buffer.clear()
+        return rows
+
+    def flush(self):
+        """Write every buffered row in a single transaction. Returns the row count."""
+        rows = self._drain()
+        if not rows or self.app is None:
+            return 0
+
+        from app.extensions import db
+        from app.models.user import AuditLog
+
+        with self.app.app_context():
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(AuditLog.__table__.insert(), rows)
+                return len(rows)
+            except Exception:
+                logger.exception('Bulk audit flush of %s rows failed; retrying row by row', len(rows))
+
+            written = 0
+            for row in rows:
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(AuditLog.__table__.insert(), [row])
+                    written += 1
+                except Exception:
+                    logger.exception('Dropping audit row %s/%s', row.get('section'), row.get('action'))
+            return written
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flush thread and write anything still buffered."""
+        self._stopping = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._thread_pid == os.getpid():
+            thread.join(timeout)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Final audit flush failed')
+
+    @property
+    def pending(self):
+        return len(self._buffer)
@@ -1,6 +1,10 @@
+import threading
+import time
 from decimal import Decimal
 from types import SimpleNamespace
 
+from flask import current_app
+
 
 DEFAULT_SITE_SETTINGS = {
     'company_name': 'Denove',
@@ -35,15 +39,21 @@ BUILTIN_LOGO_PATHS = {
 }
 
 
-def get_site_settings():
-    settings = None
+# Process-local cache of the merged settings. Saves on this worker call
+# invalidate_site_settings(); other workers notice the new updated_at stamp
+# the next time they re-check, at most SITE_SETTINGS_CACHE_SECONDS later.
+_settings_cache = {'values': None, 'version': None, 'checked_at': 0.0}
+_settings_lock = threading.Lock()
+
+
+def _cache_ttl_seconds():
     try:
-        from app.models.website import WebsiteSettings
+        return current_app.config.get('SITE_SETTINGS_CACHE_SECONDS', 30)
+    except RuntimeError:
+        return 30
 
-        settings = WebsiteSettings.query.first()
-    except Exception:
-        settings = None
 
+def _merge_settings(settings):
     merged = DEFAULT_SITE_SETTINGS.copy()
     if settings:
         for key in merged:
@@ -54,7 +64,41 @@ def get_site_settings():
     # Keep user-uploaded logos, but migrate the old built-in defaults to the new denove.jpg.
     if merged.get('logo_path') in BUILTIN_LOGO_PATHS:
         merged['logo_path'] = DEFAULT_SITE_SETTINGS['logo_path']
+    return merged
+
+
+def invalidate_site_settings():
+    """Drop this worker's cached settings so the next lookup reloads them."""
+    with _settings_lock:
+        _settings_cache.update(values=None, version=None, checked_at=0.0)
+
+
+def get_site_settings():
+    now = time.monotonic()
+    cached = _settings_cache['values']
+    if cached is not None and now - _settings_cache['checked_at'] < _cache_ttl_seconds():
+        return SimpleNamespace(**cached)
+
+    try:
+        from app.extensions import db
+        from app.models.website import WebsiteSettings
+
+        # Cheap version probe; only reload the full row when it changed.
+        stamp = db.session.query(WebsiteSettings.id, WebsiteSettings.updated_at).first()
+        version = tuple(stamp) if stamp else None
+        if cached is not None and version == _settings_cache['version']:
+            with _settings_lock:
+                _settings_cache['checked_at'] = now
+            return SimpleNamespace(**cached)
+
+        merged = _merge_settings(WebsiteSettings.query.first())
+    except Exception:
+        if cached is not None:
+            return SimpleNamespace(**cached)
+        return SimpleNamespace(**_merge_settings(None))
 
+    with _settings_lock:
+        _settings_cache.update(values=merged, version=version, checked_at=now)
     return SimpleNamespace(**merged)
 
 
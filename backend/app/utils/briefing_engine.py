@@ -8,7 +8,8 @@ import json
 import logging
 from datetime import datetime, time, timedelta
 
-from sqlalchemy import func, or_
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.extensions import db
 from app.models.boutique import BoutiqueSale, BoutiqueStock, BoutiqueSaleItem
@@ -17,7 +18,8 @@ from app.models.finance import Loan, GroupLoan, LoanPayment, GroupLoanPayment, L
 from app.models.user import User, AuditLog
 from app.models.website import WebsiteLoanInquiry, WebsiteOrderRequest
 from app.models.ai import DailyBriefing
-from app.utils.timezone import EAT_TIMEZONE, get_local_today
+from app.utils.jobs import enqueue, find_active_job, job_handler
+from app.utils.timezone import EAT_TIMEZONE, get_local_now, get_local_today
 
 logger = logging.getLogger(__name__)
 
@@ -383,15 +385,107 @@ def compute_finance_metrics(target_date=None):
 # Cache / retrieve briefing
 # ---------------------------------------------------------------------------
 
-def get_or_create_briefing(scope, branch=None, target_date=None):
-    """Get cached briefing or compute + cache it.  Returns (metrics_dict, ai_narrative)."""
+NARRATION_JOB_KIND = 'briefing_narration'
+
+
+def narration_job_key(scope, branch, target_date):
+    return f"briefing:{target_date.isoformat()}:{scope}:{branch or '__all__'}"
+
+
+def find_narration_job(scope, branch=None, target_date=None):
+    """Return the queued or running narration job for a briefing, if any."""
+    today = target_date or get_local_today()
+    return find_active_job(narration_job_key(scope, branch, today))
+
+
+def _narrate(scope, metrics):
+    from app.utils.ai_client import ai_chat
+    return ai_chat(_build_narration_prompt(scope, metrics), system=_narration_system_prompt(scope))
+
+
+# Every (scope, branch) a user can be shown; see ai._resolve_briefing_scope.
+BRIEFING_TARGETS = (
+    ('manager', None),
+    ('boutique', 'K'),
+    ('boutique', 'B'),
+    ('hardware', None),
+    ('finance', None),
+)
+
+
+def compute_briefing_metrics(scope, branch=None, target_date=None):
+    today = target_date or get_local_today()
+    if scope == 'manager':
+        return compute_manager_metrics(today)
+    if scope == 'boutique':
+        return compute_boutique_metrics(branch, today)
+    if scope == 'hardware':
+        return compute_hardware_metrics(today)
+    if scope == 'finance':
+        return compute_finance_metrics(today)
+    return {}
+
+
+def _store_briefing(today, scope, cache_branch, metrics, ai_narrative, replace=False):
+    """Upsert a briefing on (briefing_date, scope, branch) and commit.
+
+    Returns ``(briefing_id, inserted)``. Without ``replace`` a row written
+    first by a concurrent request or the precompute job wins.
+    """
+    table = DailyBriefing.__table__
+    stmt = pg_insert(table).values(
+        briefing_date=today,
+        scope=scope,
+        branch=cache_branch,
+        metrics_json=json.dumps(metrics, default=str),
+        ai_narrative=ai_narrative,
+        created_at=get_local_now(),
+    )
+    if replace:
+        stmt = stmt.on_conflict_do_update(
+            constraint='uq_briefing_date_scope_branch',
+            set_={
+                'metrics_json': stmt.excluded.metrics_json,
+                'ai_narrative': func.coalesce(stmt.excluded.ai_narrative, table.c.ai_narrative),
+                'created_at': stmt.excluded.created_at,
+            },
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(constraint='uq_briefing_date_scope_branch')
+
+    briefing_id = db.session.execute(stmt.returning(table.c.id)).scalar()
+    db.session.commit()
+    return briefing_id, briefing_id is not None
+
+
+def _queue_narration(briefing_id, scope, branch, today):
+    try:
+        enqueue(
+            NARRATION_JOB_KIND,
+            {'briefing_id': briefing_id, 'scope': scope},
+            dedupe_key=narration_job_key(scope, branch, today),
+        )
+    except Exception:
+        db.session.rollback()
+        logger.warning('Could not queue narration for %s/%s briefing', scope, branch or '__all__')
+
+
+def get_or_create_briefing(scope, branch=None, target_date=None, defer_narration=True):
+    """Get cached briefing or compute + cache it.  Returns (metrics_dict, ai_narrative).
+
+    ``flask briefings-precompute`` normally fills the cache overnight, so this
+    is a single read on the unique (date, scope, branch) index; computing here
+    is only the fallback for a missed run or a new branch.
+
+    With ``defer_narration`` the AI summary is queued as a background job
+    (see ``find_narration_job``) and ``ai_narrative`` is None until it lands,
+    so the request never waits on the AI provider.
+    """
     today = target_date or get_local_today()
     cache_branch = branch or '__all__'
 
-    existing = DailyBriefing.query.filter(
-        DailyBriefing.briefing_date == today,
-        DailyBriefing.scope == scope,
-        or_(DailyBriefing.branch == cache_branch, DailyBriefing.branch.is_(None))
+    existing = DailyBriefing.query.filter_by(
+        briefing_date=today, scope=scope, branch=cache_branch,
     ).first()
     if existing:
         try:
@@ -402,46 +496,117 @@ def get_or_create_briefing(scope, branch=None, target_date=None):
         if cached_metrics is not None:
             return sanitize_briefing_metrics(scope, cached_metrics, branch, today), existing.ai_narrative
 
-    # Compute metrics
-    if scope == 'manager':
-        metrics = compute_manager_metrics(today)
-    elif scope == 'boutique':
-        metrics = compute_boutique_metrics(branch, today)
-    elif scope == 'hardware':
-        metrics = compute_hardware_metrics(today)
-    elif scope == 'finance':
-        metrics = compute_finance_metrics(today)
-    else:
-        metrics = {}
+    metrics = compute_briefing_metrics(scope, branch, today)
+
+    from app.utils.ai_client import is_briefing_ai_enabled
+    wants_narration = bool(metrics) and is_briefing_ai_enabled()
 
-    # Attempt AI narration (non-blocking, short timeout)
+    # Attempt AI narration inline only when asked to (short timeout)
     ai_narrative = None
+    if wants_narration and not defer_narration:
+        try:
+            ai_narrative = _narrate(scope, metrics)
+        except Exception as exc:
+            logger.warning('AI narration failed for %s briefing: %s', scope, exc.__class__.__name__)
+
+    # Cache; an invalid cached row is overwritten, otherwise the first writer wins.
     try:
-        from app.utils.ai_client import is_briefing_ai_enabled, ai_chat
-        if is_briefing_ai_enabled() and metrics:
-            prompt = _build_narration_prompt(scope, metrics)
-            ai_narrative = ai_chat(prompt, system=_narration_system_prompt(scope))
-    except Exception as exc:
-        logger.warning('AI narration failed for %s briefing: %s', scope, exc.__class__.__name__)
-
-    # Cache
-    try:
-        briefing = DailyBriefing(
-            briefing_date=today,
-            scope=scope,
-            branch=cache_branch,
-            metrics_json=json.dumps(metrics, default=str),
-            ai_narrative=ai_narrative,
+        briefing_id, inserted = _store_briefing(
+            today, scope, cache_branch, metrics, ai_narrative, replace=existing is not None,
         )
-        db.session.add(briefing)
-        db.session.commit()
     except Exception:
         db.session.rollback()
         logger.warning('Failed to cache briefing for %s/%s', scope, branch)
+    else:
+        if not inserted:
+            # Another request cached it first; serve that copy.
+            stored = DailyBriefing.query.filter_by(
+                briefing_date=today, scope=scope, branch=cache_branch,
+            ).first()
+            if stored:
+                try:
+                    return sanitize_briefing_metrics(scope, json.loads(stored.metrics_json), branch, today), stored.ai_narrative
+                except (TypeError, ValueError):
+                    pass
+        elif wants_narration and defer_narration and not ai_narrative:
+            _queue_narration(briefing_id, scope, branch, today)
 
     return sanitize_briefing_metrics(scope, metrics, branch, today), ai_narrative
 
 
+def precompute_briefings(target_date=None, narration='defer', refresh=False):
+    """Compute and store every scope's briefing ahead of the first login.
+
+    ``narration`` is ``'defer'`` (queue AI jobs), ``'inline'`` (narrate now)
+    or ``'skip'``. Existing rows are kept unless ``refresh`` is set. Returns a
+    list of ``(scope, branch, status)`` tuples.
+    """
+    today = target_date or get_local_today()
+    from app.utils.ai_client import is_briefing_ai_enabled
+    ai_enabled = narration != 'skip' and is_briefing_ai_enabled()
+
+    results = []
+    for scope, branch in BRIEFING_TARGETS:
+        cache_branch = branch or '__all__'
+        if not refresh:
+            exists = db.session.query(DailyBriefing.id).filter_by(
+                briefing_date=today, scope=scope, branch=cache_branch,
+            ).first()
+            if exists:
+                results.append((scope, branch, 'cached'))
+                continue
+
+        try:
+            metrics = compute_briefing_metrics(scope, branch, today)
+            ai_narrative = None
+            if metrics and ai_enabled and narration == 'inline':
+                try:
+                    ai_narrative = _narrate(scope, metrics)
+                except Exception as exc:
+                    logger.warning('AI narration failed for %s briefing: %s', scope, exc.__class__.__name__)
+            briefing_id, _inserted = _store_briefing(today, scope, cache_branch, metrics, ai_narrative, replace=refresh)
+        except Exception as exc:
+            db.session.rollback()
+            logger.exception('Precomputing the %s/%s briefing failed', scope, cache_branch)
+            results.append((scope, branch, f'failed: {exc.__class__.__name__}'))
+            continue
+
+        if briefing_id is None:
+            results.append((scope, branch, 'cached'))
+            continue
+        if metrics and ai_enabled and not ai_narrative:
+            _queue_narration(briefing_id, scope, branch, today)
+        results.append((scope, branch, 'stored'))
+
+    return results
+
+
+@job_handler(NARRATION_JOB_KIND)
+def narrate_briefing_job(payload):
+    """Background job: add the AI summary to a cached briefing."""
+    briefing = db.session.get(DailyBriefing, payload['briefing_id'])
+    if briefing is None:
+        return {'narrated': False, 'reason': 'briefing_missing'}
+    if briefing.ai_narrative:
+        return {'narrated': True}
+
+    metrics = json.loads(briefing.metrics_json)
+    # Hand the connection back to the pool while the provider call runs.
+    db.session.remove()
+
+    ai_narrative = _narrate(payload['scope'], metrics)
+    if not ai_narrative:
+        # ai_chat swallows provider errors; raise so the job is retried.
+        raise RuntimeError('AI provider returned no narration')
+
+    briefing = db.session.get(DailyBriefing, payload['briefing_id'])
+    if briefing is None:
+        return {'narrated': False, 'reason': 'briefing_missing'}
+    briefing.ai_narrative = ai_narrative
+    db.session.commit()
+    return {'narrated': True}
+
+
 def _build_narration_prompt(scope, metrics):
     """Build a compact prompt from metrics for AI narration."""
     lines = [f"Daily briefing for {scope} scope:"]
@@ -5,20 +5,25 @@ supported business questions, runs safe ORM queries, and optionally lets the
 LLM narrate the structured results.
 """
 
+import copy
 import json
 import logging
 import re
-from datetime import timedelta
+import threading
+import time as time_module
+from datetime import datetime, time, timedelta
 
-from sqlalchemy import func
+from flask import current_app
+from sqlalchemy import and_, case, func, or_
 
 from app.extensions import db
+from app.models.ai import DailyBriefing
 from app.models.boutique import BoutiqueSale, BoutiqueStock
 from app.models.finance import GroupLoan, GroupLoanPayment, Loan, LoanClient, LoanPayment
 from app.models.hardware import HardwareSale, HardwareStock
 from app.models.user import AuditLog
 from app.models.website import WebsiteLoanInquiry, WebsiteOrderRequest
-from app.utils.timezone import get_local_today
+from app.utils.timezone import EAT_TIMEZONE, get_local_today
 
 logger = logging.getLogger(__name__)
 
@@ -56,71 +61,209 @@ def _branch_label(raw_value):
     return "Shared / Unassigned"
 
 
-_INTENT_PATTERNS = [
-    ("overdue_loans", re.compile(r"overdue|past\s*due|late\s*(loan|payment)", re.I)),
+def _boutique_stock_filter(branch):
+    """Boutique stock a branch can sell: its own lines plus shared ones."""
+    if not branch:
+        return BoutiqueStock.is_active == True
+    return and_(
+        BoutiqueStock.is_active == True,
+        or_(BoutiqueStock.branch == branch, BoutiqueStock.branch == None),
+    )
+
+
+def _boutique_scope(branch):
+    """Summary suffix naming the branch the boutique figures are limited to."""
+    return f" Boutique figures are for {_branch_label(branch)} only." if branch else ""
+
+
+# (intent, weight, pattern). Every rule is compiled into one alternation and
+# scored together, so a message's intent no longer depends on rule order:
+# phrases specific to one question outweigh single words several share. A
+# rule counts once per message however often it matches, and branch names are
+# not evidence for any intent (they become the ``branch`` parameter). Ties go
+# to the rule listed first.
+_INTENT_RULES = [
+    ("overdue_loans", 3, r"overdue|past\s*due|arrears|defaulted|late\s*(?:loan|payment|repayment)s?"),
+    ("overdue_loans", 1, r"\b(?:defaulters?|unpaid\s*loans?)\b"),
     (
         "inventory_overview",
-        re.compile(
-            r"how\s*(much|many).*(stock|inventory)|"
-            r"(stock|inventory).*(do\s*i|do\s*we)\s*ha\w+|"
-            r"total\s*(stock|inventory)|"
-            r"(stock|inventory)\s*(overview|summary|position|on\s*hand|available|levels?)",
-            re.I,
-        ),
+        3,
+        r"how\s*(?:much|many)\b.*?\b(?:stock|inventory)|"
+        r"(?:stock|inventory)\b.*?\bdo\s*(?:i|we)\s*ha\w+|"
+        r"total\s*(?:stock|inventory)|"
+        r"(?:stock|inventory)\s*(?:overview|summary|position|on\s*hand|available|levels?|value)",
     ),
+    ("inventory_overview", 1, r"\b(?:stock|inventory)\b"),
     (
         "low_stock",
-        re.compile(
-            r"low.stock|out.of.stock|restock|replenish|stock.*(low|need|run)|"
-            r"inventory.*(reorder|restock|critical)",
-            re.I,
-        ),
+        3,
+        r"low.stock|out.of.stock|restock|replenish|reorder|stock.*?(?:low|need|run)|"
+        r"inventory.*?(?:critical)",
     ),
-    ("yesterday_summary", re.compile(r"yesterday|summary|performance|recap", re.I)),
-    ("branch_comparison", re.compile(r"branch|compar|kapchorwa|mbale", re.I)),
-    ("user_activity", re.compile(r"(who|user|staff).*(log|activ|did)|log.*in.*yesterday", re.I)),
-    ("loan_search", re.compile(r"loan.*(above|over|more\s*than|greater|>\s*\d)", re.I)),
-    ("top_transactions", re.compile(r"(big|top|large|major)\s*(transact|sale)", re.I)),
-    ("pending_inquiries", re.compile(r"(inquir|order|request).*(pending|new|review)", re.I)),
-    ("projection_guidance", re.compile(r"projection|forecast|predict|outlook|trend", re.I)),
+    ("yesterday_summary", 2, r"yesterday|recap|how\s*did\s*(?:we|i)\s*do"),
+    ("yesterday_summary", 1, r"summary|summari[sz]e|performance|takings|revenue|\bsales\b|\bsold\b"),
+    ("branch_comparison", 2, r"branch|compar"),
+    ("user_activity", 4, r"(?:who|users?|staff)\b.*?\b(?:log|activ|did)|log.*?in.*?yesterday|audit"),
+    ("loan_search", 3, r"loans?\b.*?(?:above|over\b|more\s*than|greater|bigger|exceed|>\s*\d)"),
+    ("top_transactions", 4, r"(?:big|top|large|major)\w*\s*(?:transact|sale)"),
+    ("pending_inquiries", 3, r"(?:inquir|enquir|order|request|lead)\w*.*?(?:pending|new|review|waiting)"),
+    ("pending_inquiries", 1, r"\b(?:inquir|enquir)\w*"),
+    ("projection_guidance", 3, r"projection|forecast|predict|outlook|trend"),
 ]
 
+_INTENT_REGEX = re.compile(
+    "|".join(f"(?P<r{index}>{pattern})" for index, (_intent, _weight, pattern) in enumerate(_INTENT_RULES)),
+    re.I,
+)
+
+# Below this the message is treated as a general question for the AI snapshot.
+MIN_INTENT_CONFIDENCE = 0.25
+
+_AMOUNT_PATTERN = re.compile(
+    r"(?:ugx|ush|shs?)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k|m|bn|thousand|million|billion)?\b",
+    re.I,
+)
+_AMOUNT_MULTIPLIERS = {
+    "k": 1_000, "thousand": 1_000,
+    "m": 1_000_000, "million": 1_000_000,
+    "bn": 1_000_000_000, "billion": 1_000_000_000,
+}
+_ISO_DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_LAST_DAYS_PATTERN = re.compile(r"(?:last|past)\s*(\d{1,3})\s*days?", re.I)
+_BRANCH_PATTERNS = (
+    ("K", re.compile(r"kapchorwa", re.I)),
+    ("B", re.compile(r"mbale", re.I)),
+)
+
+
+def extract_parameters(message):
+    """Pull an amount, a branch code, a day and a look-back window out of a message.
+
+    Only keys that were found are returned.
+    """
+    params = {}
+    today = get_local_today()
+    text = message
+
+    iso = _ISO_DATE_PATTERN.search(text)
+    if iso:
+        try:
+            params["date"] = today.replace(year=int(iso.group(1)), month=int(iso.group(2)), day=int(iso.group(3)))
+        except ValueError:
+            pass
+        text = text[:iso.start()] + text[iso.end():]
+    elif re.search(r"day\s*before\s*yesterday", text, re.I):
+        params["date"] = today - timedelta(days=2)
+    elif re.search(r"yesterday", text, re.I):
+        params["date"] = today - timedelta(days=1)
+    elif re.search(r"\btoday\b", text, re.I):
+        params["date"] = today
+
+    window = _LAST_DAYS_PATTERN.search(text)
+    if window:
+        params["days"] = max(int(window.group(1)), 1)
+        text = text[:window.start()] + text[window.end():]
+    elif re.search(r"\b(?:this|last|past)\s*week\b", text, re.I):
+        params["days"] = 7
+    elif re.search(r"\b(?:this|last|past)\s*month\b", text, re.I):
+        params["days"] = 30
+
+    for match in _AMOUNT_PATTERN.finditer(text):
+        try:
+            amount = float(match.group(1).replace(",", ""))
+        except ValueError:
+            continue
+        amount *= _AMOUNT_MULTIPLIERS.get((match.group(2) or "").lower(), 1)
+        params["amount"] = int(amount)
+        break
+
+    for code, pattern in _BRANCH_PATTERNS:
+        if pattern.search(message):
+            params["branch"] = code
+            break
+
+    return params
+
+
+def rank_intents(message):
+    """Score every intent against the message; returns ``[(intent, score)]``, best first."""
+    scores = {}
+    matched = {int(match.lastgroup[1:]) for match in _INTENT_REGEX.finditer(message)}
+    for index in matched:
+        intent, weight, _pattern = _INTENT_RULES[index]
+        scores[intent] = scores.get(intent, 0) + weight
+    order = {intent: index for index, (intent, _weight, _pattern) in enumerate(_INTENT_RULES)}
+    return sorted(scores.items(), key=lambda item: (-item[1], order[item[0]]))
+
+
+def classify_message(message):
+    """Classify a message. Returns the intent, a 0-1 confidence, the ranked
+    candidates and any extracted parameters."""
+    ranked = rank_intents(message)
+    intent, confidence = "general", 0.0
+    if ranked:
+        top_score = ranked[0][1]
+        confidence = round(top_score / (sum(score for _intent, score in ranked) + 1), 2)
+        if confidence >= MIN_INTENT_CONFIDENCE:
+            intent = ranked[0][0]
+    return {
+        "intent": intent,
+        "confidence": confidence,
+        "ranked": ranked,
+        "params": extract_parameters(message),
+    }
+
 
 def classify_intent(message):
     """Classify a user message into a supported intent."""
-    for intent, pattern in _INTENT_PATTERNS:
-        if pattern.search(message):
-            return intent
-    return "general"
+    return classify_message(message)["intent"]
 
 
-def _extract_number(message, default=0):
-    match = re.search(r"[\d,]+", message.replace(",", ""))
-    if not match:
-        return default
-    try:
-        return int(match.group().replace(",", ""))
-    except ValueError:
-        return default
+def _day_label(day):
+    today = get_local_today()
+    if day == today:
+        return "today"
+    if day == today - timedelta(days=1):
+        return "yesterday"
+    return f"on {day.isoformat()}"
+
+
+def _overdue_filter(model, today):
+    """Live loans past due with money outstanding, whether or not the nightly
+    status refresh has marked them overdue yet."""
+    return and_(
+        model.is_deleted == False,
+        model.balance > 0,
+        or_(
+            model.status == "overdue",
+            and_(model.status == "active", model.due_date < today),
+        ),
+    )
 
 
 def handle_overdue_loans():
-    loans = Loan.query.filter(
-        Loan.is_deleted == False,
-        Loan.status == "overdue",
-    ).order_by(Loan.balance.desc()).limit(20).all()
-    groups = GroupLoan.query.filter(
-        GroupLoan.is_deleted == False,
-        GroupLoan.status == "overdue",
-    ).order_by(GroupLoan.balance.desc()).limit(10).all()
+    today = get_local_today()
+    individual_filter = _overdue_filter(Loan, today)
+    group_filter = _overdue_filter(GroupLoan, today)
+
+    loans = db.session.query(Loan, LoanClient.name).outerjoin(
+        LoanClient, LoanClient.id == Loan.client_id
+    ).filter(individual_filter).order_by(Loan.balance.desc()).limit(20).all()
+    groups = GroupLoan.query.filter(group_filter).order_by(GroupLoan.balance.desc()).limit(10).all()
+
+    loan_count, loan_balance = db.session.query(
+        func.count(Loan.id), func.coalesce(func.sum(Loan.balance), 0)
+    ).filter(individual_filter).one()
+    group_count, group_balance = db.session.query(
+        func.count(GroupLoan.id), func.coalesce(func.sum(GroupLoan.balance), 0)
+    ).filter(group_filter).one()
 
     items = []
-    for loan in loans:
-        client = LoanClient.query.get(loan.client_id)
+    for loan, client_name in loans:
         items.append(
             {
                 "type": "individual",
-                "client": client.name if client else "Unknown",
+                "client": client_name or "Unknown",
                 "principal": _float(loan.principal),
                 "balance": _float(loan.balance),
                 "due_date": loan.due_date.isoformat() if loan.due_date else None,
@@ -139,19 +282,23 @@ def handle_overdue_loans():
             }
         )
 
-    total_balance = sum(item["balance"] for item in items)
+    count = int(loan_count or 0) + int(group_count or 0)
+    total_balance = _float(loan_balance) + _float(group_balance)
+    summary = f"{count} overdue loans with total outstanding balance of UGX {total_balance:,.0f}."
+    if count > len(items):
+        summary += f" Showing the {len(items)} largest."
     return {
         "intent": "overdue_loans",
-        "count": len(items),
+        "count": count,
         "total_balance": total_balance,
         "items": items,
-        "summary": f"{len(items)} overdue loans with total outstanding balance of UGX {total_balance:,.0f}.",
+        "summary": summary,
     }
 
 
-def handle_low_stock():
+def handle_low_stock(branch=None):
     boutique = BoutiqueStock.query.filter(
-        BoutiqueStock.is_active == True,
+        _boutique_stock_filter(branch),
         BoutiqueStock.quantity <= BoutiqueStock.low_stock_threshold,
     ).order_by(BoutiqueStock.quantity.asc()).limit(20).all()
     hardware = HardwareStock.query.filter(
@@ -185,7 +332,7 @@ def handle_low_stock():
         "All tracked stock is currently above its configured restock threshold."
         if not items
         else f"{len(items)} items are below their restock threshold and need attention."
-    )
+    ) + _boutique_scope(branch)
     return {
         "intent": "low_stock",
         "count": len(items),
@@ -194,31 +341,26 @@ def handle_low_stock():
     }
 
 
-def handle_inventory_overview():
-    boutique_rows = BoutiqueStock.query.filter(BoutiqueStock.is_active == True).all()
-    hardware_rows = HardwareStock.query.filter(HardwareStock.is_active == True).all()
+def _stock_totals(model, criterion=None):
+    """(active lines, units on hand, lines at or below threshold) in one aggregate."""
+    skus, units, low = db.session.query(
+        func.count(model.id),
+        func.coalesce(func.sum(model.quantity), 0),
+        func.coalesce(func.sum(case((model.quantity <= model.low_stock_threshold, 1), else_=0)), 0),
+    ).filter(model.is_active == True if criterion is None else criterion).one()
+    return int(skus or 0), int(units or 0), int(low or 0)
 
-    boutique_skus = len(boutique_rows)
-    hardware_skus = len(hardware_rows)
-    boutique_units = sum(int(item.quantity or 0) for item in boutique_rows)
-    hardware_units = sum(int(item.quantity or 0) for item in hardware_rows)
-    boutique_low = sum(
-        1
-        for item in boutique_rows
-        if item.low_stock_threshold is not None and item.quantity <= item.low_stock_threshold
-    )
-    hardware_low = sum(
-        1
-        for item in hardware_rows
-        if item.low_stock_threshold is not None and item.quantity <= item.low_stock_threshold
-    )
+
+def handle_inventory_overview(branch=None):
+    boutique_skus, boutique_units, boutique_low = _stock_totals(BoutiqueStock, _boutique_stock_filter(branch))
+    hardware_skus, hardware_units, hardware_low = _stock_totals(HardwareStock)
 
     branch_rows = db.session.query(
         BoutiqueStock.branch,
         func.count(BoutiqueStock.id),
         func.sum(BoutiqueStock.quantity),
     ).filter(
-        BoutiqueStock.is_active == True
+        _boutique_stock_filter(branch)
     ).group_by(BoutiqueStock.branch).all()
 
     items = [
@@ -240,11 +382,11 @@ def handle_inventory_overview():
         },
     ]
 
-    for branch, sku_count, units in branch_rows:
+    for row_branch, sku_count, units in branch_rows:
         items.append(
             {
                 "section": "Boutique branch",
-                "name": _branch_label(branch),
+                "name": _branch_label(row_branch),
                 "skus": int(sku_count or 0),
                 "units_on_hand": int(units or 0),
                 "low_stock_items": "",
@@ -267,20 +409,25 @@ def handle_inventory_overview():
             f"Boutique has {boutique_skus} stock lines with {boutique_units:,.0f} units, and hardware has "
             f"{hardware_skus} stock lines with {hardware_units:,.0f} units. "
             f"{total_low} item{'s' if total_low != 1 else ''} are low on stock."
+            f"{_boutique_scope(branch)}"
         ),
     }
 
 
-def handle_yesterday_summary():
-    today = get_local_today()
-    yesterday = today - timedelta(days=1)
+def handle_yesterday_summary(day=None, branch=None):
+    """Revenue and repayments for one day, yesterday unless ``day`` is given.
 
-    boutique_revenue = _float(
-        db.session.query(func.sum(BoutiqueSale.amount_paid)).filter(
-            BoutiqueSale.sale_date == yesterday,
-            BoutiqueSale.is_deleted == False,
-        ).scalar()
+    ``branch`` limits the boutique revenue to one branch.
+    """
+    yesterday = day or get_local_today() - timedelta(days=1)
+
+    boutique_query = db.session.query(func.sum(BoutiqueSale.amount_paid)).filter(
+        BoutiqueSale.sale_date == yesterday,
+        BoutiqueSale.is_deleted == False,
     )
+    if branch:
+        boutique_query = boutique_query.filter(BoutiqueSale.branch == branch)
+    boutique_revenue = _float(boutique_query.scalar())
     hardware_revenue = _float(
         db.session.query(func.sum(HardwareSale.amount_paid)).filter(
             HardwareSale.sale_date == yesterday,
@@ -301,6 +448,7 @@ def handle_yesterday_summary():
     )
 
     total = boutique_revenue + hardware_revenue + finance_repayments
+    label = _day_label(yesterday)
     return {
         "intent": "yesterday_summary",
         "date": yesterday.isoformat(),
@@ -309,16 +457,16 @@ def handle_yesterday_summary():
         "finance_repayments": finance_repayments,
         "total": total,
         "summary": (
-            f"Yesterday ({yesterday.strftime('%a %d %b')}): Boutique UGX {boutique_revenue:,.0f}, "
+            f"{label[0].upper()}{label[1:]} ({yesterday.strftime('%a %d %b')}): Boutique UGX {boutique_revenue:,.0f}, "
             f"Hardware UGX {hardware_revenue:,.0f}, Finance repayments UGX {finance_repayments:,.0f}. "
-            f"Total UGX {total:,.0f}."
+            f"Total UGX {total:,.0f}.{_boutique_scope(branch)}"
         ),
     }
 
 
-def handle_branch_comparison():
+def handle_branch_comparison(days=7):
     today = get_local_today()
-    week_start = today - timedelta(days=7)
+    week_start = today - timedelta(days=days)
 
     branches = db.session.query(
         BoutiqueSale.branch,
@@ -339,9 +487,9 @@ def handle_branch_comparison():
         for branch, revenue, count in branches
     ]
     summary = (
-        "No boutique branch sales were recorded in the past 7 days."
+        f"No boutique branch sales were recorded in the past {days} days."
         if not items
-        else f"Boutique branch comparison for the past 7 days across {len(items)} active branch records."
+        else f"Boutique branch comparison for the past {days} days across {len(items)} active branch records."
     )
     return {
         "intent": "branch_comparison",
@@ -352,52 +500,53 @@ def handle_branch_comparison():
     }
 
 
-def handle_user_activity():
-    today = get_local_today()
-    yesterday = today - timedelta(days=1)
-
-    logs = AuditLog.query.filter(
-        func.date(AuditLog.created_at) == yesterday
-    ).order_by(AuditLog.created_at.desc()).limit(75).all()
+def handle_user_activity(day=None):
+    yesterday = day or get_local_today() - timedelta(days=1)
+    day_start = datetime.combine(yesterday, time.min, tzinfo=EAT_TIMEZONE)
+    day_end = day_start + timedelta(days=1)
 
-    users_seen = {}
-    for log in logs:
-        if log.username not in users_seen:
-            users_seen[log.username] = {"actions": 0, "sections": set()}
-        users_seen[log.username]["actions"] += 1
-        if log.section:
-            users_seen[log.username]["sections"].add(log.section)
+    # A range on created_at can use ix_audit_logs_created_at; date(created_at) cannot.
+    rows = db.session.query(
+        AuditLog.username,
+        func.count(AuditLog.id),
+        func.array_agg(func.distinct(AuditLog.section)),
+    ).filter(
+        AuditLog.created_at >= day_start,
+        AuditLog.created_at < day_end,
+    ).group_by(AuditLog.username).order_by(func.max(AuditLog.created_at).desc()).all()
 
     items = [
         {
             "username": username,
-            "actions": data["actions"],
-            "sections": ", ".join(sorted(data["sections"])) if data["sections"] else "-",
+            "actions": int(actions or 0),
+            "sections": ", ".join(sorted(section for section in sections or [] if section)) or "-",
         }
-        for username, data in users_seen.items()
+        for username, actions, sections in rows
     ]
+    total_actions = sum(item["actions"] for item in items)
     return {
         "intent": "user_activity",
         "date": yesterday.isoformat(),
         "user_count": len(items),
         "items": items,
-        "summary": f"{len(items)} users were active yesterday with {len(logs)} recorded actions.",
+        "summary": f"{len(items)} users were active {_day_label(yesterday)} with {total_actions} recorded actions.",
     }
 
 
-def handle_loan_search(message):
-    threshold = _extract_number(message, 500000)
-    loans = Loan.query.filter(
+def handle_loan_search(threshold=None):
+    threshold = 500000 if threshold is None else threshold
+    loans = db.session.query(Loan, LoanClient.name).outerjoin(
+        LoanClient, LoanClient.id == Loan.client_id
+    ).filter(
         Loan.is_deleted == False,
         Loan.balance > threshold,
     ).order_by(Loan.balance.desc()).limit(20).all()
 
     items = []
-    for loan in loans:
-        client = LoanClient.query.get(loan.client_id)
+    for loan, client_name in loans:
         items.append(
             {
-                "client": client.name if client else "Unknown",
+                "client": client_name or "Unknown",
                 "balance": _float(loan.balance),
                 "status": loan.status,
                 "link": f"/finance/loans/{loan.id}",
@@ -412,25 +561,37 @@ def handle_loan_search(message):
     }
 
 
-def handle_top_transactions():
+def handle_top_transactions(days=7, day=None, branch=None):
+    """Largest sales over the last ``days`` days, or on ``day`` when given.
+
+    ``branch`` limits the boutique sales to one branch.
+    """
     today = get_local_today()
-    week_start = today - timedelta(days=7)
+    week_start = today - timedelta(days=days)
+
+    def in_period(model):
+        if day:
+            return model.sale_date == day
+        return model.sale_date >= week_start
 
-    boutique_rows = db.session.query(
+    boutique_query = db.session.query(
         BoutiqueSale.reference_number,
         BoutiqueSale.total_amount,
         BoutiqueSale.sale_date,
     ).filter(
-        BoutiqueSale.sale_date >= week_start,
+        in_period(BoutiqueSale),
         BoutiqueSale.is_deleted == False,
-    ).order_by(BoutiqueSale.total_amount.desc()).limit(5).all()
+    )
+    if branch:
+        boutique_query = boutique_query.filter(BoutiqueSale.branch == branch)
+    boutique_rows = boutique_query.order_by(BoutiqueSale.total_amount.desc()).limit(5).all()
 
     hardware_rows = db.session.query(
         HardwareSale.reference_number,
         HardwareSale.total_amount,
         HardwareSale.sale_date,
     ).filter(
-        HardwareSale.sale_date >= week_start,
+        in_period(HardwareSale),
         HardwareSale.is_deleted == False,
     ).order_by(HardwareSale.total_amount.desc()).limit(5).all()
 
@@ -460,7 +621,10 @@ def handle_top_transactions():
     return {
         "intent": "top_transactions",
         "items": items,
-        "summary": f"Top {len(items)} transactions from the last 7 days.",
+        "summary": (
+            f"Top {len(items)} transactions {_day_label(day) if day else f'from the last {days} days'}."
+            f"{_boutique_scope(branch)}"
+        ),
     }
 
 
@@ -531,20 +695,61 @@ def handle_projection_guidance():
     }
 
 
-def build_snapshot_context():
-    """Compact deterministic snapshot used for broader AI narration."""
-    yesterday = handle_yesterday_summary()
+_snapshot_cache = {}
+_snapshot_lock = threading.Lock()
+
+
+def _config(name, default):
+    try:
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        return default
+
+
+def _yesterday_from_briefing(today):
+    """Yesterday's totals from today's stored manager briefing, if one exists.
+
+    The briefing is computed with the same filters as handle_yesterday_summary,
+    and a finished day's figures do not move, so this saves four aggregates.
+    """
+    briefing = DailyBriefing.query.filter_by(briefing_date=today, scope="manager", branch="__all__").first()
+    if briefing is None:
+        return None
+    try:
+        metrics = json.loads(briefing.metrics_json)
+        boutique = _float(metrics["boutique_yesterday_revenue"])
+        hardware = _float(metrics["hardware_yesterday_revenue"])
+        finance = _float(metrics["finance_yesterday_repayments"])
+        day = metrics["yesterday"]
+    except (KeyError, TypeError, ValueError):
+        return None
+    return {
+        "date": day,
+        "boutique_revenue": boutique,
+        "hardware_revenue": hardware,
+        "finance_repayments": finance,
+        "total": boutique + hardware + finance,
+    }
+
+
+def _compute_snapshot_context(today):
+    yesterday = None
+    if _config("CHAT_SNAPSHOT_FROM_BRIEFING", True):
+        yesterday = _yesterday_from_briefing(today)
+    if yesterday is None:
+        summary = handle_yesterday_summary(today - timedelta(days=1))
+        yesterday = {
+            "date": summary["date"],
+            "boutique_revenue": summary["boutique_revenue"],
+            "hardware_revenue": summary["hardware_revenue"],
+            "finance_repayments": summary["finance_repayments"],
+            "total": summary["total"],
+        }
     inventory = handle_inventory_overview()
     overdue = handle_overdue_loans()
     inquiries = handle_pending_inquiries()
     return {
-        "yesterday_summary": {
-            "date": yesterday["date"],
-            "boutique_revenue": yesterday["boutique_revenue"],
-            "hardware_revenue": yesterday["hardware_revenue"],
-            "finance_repayments": yesterday["finance_repayments"],
-            "total": yesterday["total"],
-        },
+        "yesterday_summary": yesterday,
         "inventory": {
             "total_skus": inventory["total_skus"],
             "total_units": inventory["total_units"],
@@ -561,89 +766,156 @@ def build_snapshot_context():
     }
 
 
+def build_snapshot_context():
+    """Compact deterministic snapshot used for broader AI narration.
+
+    Cached per worker for ``CHAT_SNAPSHOT_CACHE_SECONDS`` (0 disables), so a
+    run of open-ended questions shares one set of queries.
+    """
+    today = get_local_today()
+    ttl = _config("CHAT_SNAPSHOT_CACHE_SECONDS", 60)
+    now = time_module.monotonic()
+    cached = _snapshot_cache.get("snapshot")
+    if ttl > 0 and cached and cached["day"] == today and now - cached["stored_at"] < ttl:
+        return copy.deepcopy(cached["snapshot"])
+
+    snapshot = _compute_snapshot_context(today)
+    if ttl > 0:
+        with _snapshot_lock:
+            _snapshot_cache["snapshot"] = {"day": today, "stored_at": now, "snapshot": snapshot}
+    return copy.deepcopy(snapshot)
+
+
+# Each handler takes the parameters extracted by ``extract_parameters``.
 INTENT_HANDLERS = {
-    "overdue_loans": lambda message: handle_overdue_loans(),
-    "inventory_overview": lambda message: handle_inventory_overview(),
-    "low_stock": lambda message: handle_low_stock(),
-    "yesterday_summary": lambda message: handle_yesterday_summary(),
-    "branch_comparison": lambda message: handle_branch_comparison(),
-    "user_activity": lambda message: handle_user_activity(),
-    "loan_search": handle_loan_search,
-    "top_transactions": lambda message: handle_top_transactions(),
-    "pending_inquiries": lambda message: handle_pending_inquiries(),
-    "projection_guidance": lambda message: handle_projection_guidance(),
+    "overdue_loans": lambda params: handle_overdue_loans(),
+    "inventory_overview": lambda params: handle_inventory_overview(params.get("branch")),
+    "low_stock": lambda params: handle_low_stock(params.get("branch")),
+    "yesterday_summary": lambda params: handle_yesterday_summary(params.get("date"), params.get("branch")),
+    "branch_comparison": lambda params: handle_branch_comparison(params.get("days", 7)),
+    "user_activity": lambda params: handle_user_activity(params.get("date")),
+    "loan_search": lambda params: handle_loan_search(params.get("amount")),
+    "top_transactions": lambda params: handle_top_transactions(
+        params.get("days", 7), params.get("date"), params.get("branch")
+    ),
+    "pending_inquiries": lambda params: handle_pending_inquiries(),
+    "projection_guidance": lambda params: handle_projection_guidance(),
 }
 
 
-def process_chat_message(message):
-    """Process a manager chat message and return a structured response."""
-    intent = classify_intent(message)
+# Most SQL statements each handler may issue. Handlers are written as a fixed
+# number of aggregate/joined queries, so their cost does not grow with the
+# size of the books; tests/test_chat_query_budgets.py fails if an N+1 creeps
+# back in.
+INTENT_QUERY_BUDGETS = {
+    "overdue_loans": 4,
+    "inventory_overview": 3,
+    "low_stock": 2,
+    "yesterday_summary": 4,
+    "branch_comparison": 1,
+    "user_activity": 1,
+    "loan_search": 1,
+    "top_transactions": 2,
+    "pending_inquiries": 2,
+    "projection_guidance": 0,
+}
+
+
+def prepare_chat_message(message):
+    """Run the deterministic part of a chat turn.
+
+    Returns ``(result, narration)``: the structured response, and the keyword
+    arguments for ``cached_ai_chat`` when an AI narrative should be added
+    (``None`` otherwise). Shared by the blocking and streaming chat endpoints.
+    """
+    classification = classify_message(message)
+    intent = classification["intent"]
     handler = INTENT_HANDLERS.get(intent)
 
     if handler:
         try:
-            data = handler(message)
+            data = handler(classification["params"])
         except Exception as exc:
             logger.warning("Chat intent handler %s failed: %s", intent, exc)
             return {
                 "intent": intent,
                 "error": True,
                 "summary": "Sorry, I ran into a problem fetching that business data. Please try again.",
-            }
+            }, None
     else:
         data = None
 
+    from app.utils.ai_client import is_chat_enabled
+
     if data and not data.get("error"):
-        try:
-            from app.utils.ai_client import ai_chat, is_chat_enabled
-
-            if is_chat_enabled():
-                ai_response = ai_chat(
-                    (
-                        f"User asked: {message}\n\n"
-                        f"Here is the structured business data:\n{json.dumps(data, default=str)}\n\n"
-                        "Give a concise, practical answer in 2 to 4 sentences. "
-                        "Reference exact numbers from the data and mention only what is actually present. "
-                        "Currency is UGX."
-                    ),
-                    system=(
-                        "You are Denove Assistant, a business copilot for a Ugandan retail and microfinance company. "
-                        "Answer only from the supplied data. Never invent figures. Keep answers direct, clear, and actionable. "
-                        "Do not use markdown."
-                    ),
-                )
-                if ai_response:
-                    data["ai_narrative"] = ai_response
-        except Exception:
-            pass
-        return data
+        if not is_chat_enabled():
+            return data, None
+        # Narration depends on the data, not the wording, so identical
+        # data for the same intent reuses a cached answer.
+        return data, {
+            "intent": intent,
+            "payload": data,
+            "prompt": (
+                f"User asked: {message}\n\n"
+                f"Here is the structured business data:\n{json.dumps(data, default=str)}\n\n"
+                "Give a concise, practical answer in 2 to 4 sentences. "
+                "Reference exact numbers from the data and mention only what is actually present. "
+                "Currency is UGX."
+            ),
+            "system": (
+                "You are Denove Assistant, a business copilot for a Ugandan retail and microfinance company. "
+                "Answer only from the supplied data. Never invent figures. Keep answers direct, clear, and actionable. "
+                "Do not use markdown."
+            ),
+        }
+
+    fallback = {
+        "intent": "general",
+        "summary": CAPABILITY_FALLBACK,
+    }
+    if not is_chat_enabled():
+        return fallback, None
 
     try:
-        from app.utils.ai_client import ai_chat, is_chat_enabled
-
-        if is_chat_enabled():
-            ai_response = ai_chat(
-                (
-                    f"User question: {message}\n\n"
-                    f"Business snapshot:\n{json.dumps(build_snapshot_context(), default=str)}\n\n"
-                    "Answer helpfully if the question can be answered from this snapshot. "
-                    "If not, explain what you can help with next."
-                ),
-                system=(
-                    "You are Denove Assistant. Use only the provided business snapshot. "
-                    "Never invent facts. Keep the answer short, natural, and practical. Do not use markdown."
-                ),
-            )
-            if ai_response:
-                return {
-                    "intent": "general",
-                    "summary": ai_response,
-                    "ai_narrative": ai_response,
-                }
-    except Exception:
-        pass
+        snapshot = build_snapshot_context()
+    except Exception as exc:
+        logger.warning("Chat snapshot failed: %s", exc)
+        return fallback, None
 
-    return {
+    return fallback, {
         "intent": "general",
-        "summary": CAPABILITY_FALLBACK,
+        "payload": {"question": " ".join(message.lower().split()), "snapshot": snapshot},
+        "prompt": (
+            f"User question: {message}\n\n"
+            f"Business snapshot:\n{json.dumps(snapshot, default=str)}\n\n"
+            "Answer helpfully if the question can be answered from this snapshot. "
+            "If not, explain what you can help with next."
+        ),
+        "system": (
+            "You are Denove Assistant. Use only the provided business snapshot. "
+            "Never invent facts. Keep the answer short, natural, and practical. Do not use markdown."
+        ),
     }
+
+
+def apply_narration(result, narrative):
+    """Attach an AI narrative to a prepared result; general answers replace the fallback text."""
+    if not narrative:
+        return result
+    result["ai_narrative"] = narrative
+    if result.get("intent") == "general":
+        result["summary"] = narrative
+    return result
+
+
+def process_chat_message(message):
+    """Process a manager chat message and return a structured response."""
+    result, narration = prepare_chat_message(message)
+    if narration:
+        try:
+            from app.utils.narration_cache import cached_ai_chat
+
+            apply_narration(result, cached_ai_chat(**narration))
+        except Exception:
+            pass
+    return result
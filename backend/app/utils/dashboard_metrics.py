@@ -0,0 +1,339 @@
+"""Aggregated metrics for the unified manager dashboard.
+
+Every figure on the dashboard is derived from a handful of grouped queries:
+two per sales table (paid amounts bucketed by sale date over the trend
+window, and outstanding credit), one for loan repayments, one for profit, one per stock table and one for overdue
+counts.  The result is returned as a typed object the template reads
+directly.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from sqlalchemy import func, literal, union_all
+
+from app.extensions import db
+from app.models.boutique import BoutiqueSale, BoutiqueStock, BoutiqueSaleItem
+from app.models.hardware import HardwareSale, HardwareStock, HardwareSaleItem
+from app.models.finance import Loan, GroupLoan, LoanPayment, GroupLoanPayment
+from app.utils.timezone import get_local_today
+
+TREND_DAYS = 7
+LOW_STOCK_ALERT_LIMIT = 5
+
+
+@dataclass
+class SalesMetrics:
+    """Per-business figures for a retail section (boutique or hardware)."""
+    today: float = 0.0
+    yesterday: float = 0.0
+    credits: float = 0.0
+    transactions: int = 0
+    low_stock: int = 0
+    inventory_value: float = 0.0
+    profit_today: float = 0.0
+
+
+@dataclass
+class FinanceMetrics:
+    """Loan portfolio figures for the finance section."""
+    outstanding: float = 0.0
+    interest_expected: float = 0.0
+    repayments_today: float = 0.0
+    overdue_count: int = 0
+
+
+@dataclass
+class TrendDay:
+    """One row of the seven-day collections trend."""
+    date: str
+    boutique: float = 0.0
+    hardware: float = 0.0
+    finance: float = 0.0
+
+    @property
+    def total(self):
+        return self.boutique + self.hardware + self.finance
+
+
+@dataclass
+class DashboardMetrics:
+    """Everything the dashboard template renders, computed in one pass."""
+    today: date
+    boutique: SalesMetrics = field(default_factory=SalesMetrics)
+    hardware: SalesMetrics = field(default_factory=SalesMetrics)
+    finance: FinanceMetrics = field(default_factory=FinanceMetrics)
+    sales_trend: list = field(default_factory=list)
+    low_stock_items: list = field(default_factory=list)
+
+    @property
+    def today_revenue(self):
+        return self.boutique.today + self.hardware.today + self.finance.repayments_today
+
+    @property
+    def yesterday_revenue(self):
+        return self.boutique.yesterday + self.hardware.yesterday
+
+    @property
+    def credits_outstanding(self):
+        return self.boutique.credits + self.hardware.credits
+
+    @property
+    def loans_outstanding(self):
+        return self.finance.outstanding
+
+    @property
+    def loan_interest_expected(self):
+        return self.finance.interest_expected
+
+    @property
+    def low_stock_alerts(self):
+        return self.boutique.low_stock + self.hardware.low_stock
+
+    @property
+    def transactions_today(self):
+        return self.boutique.transactions + self.hardware.transactions
+
+    @property
+    def overdue_loans(self):
+        return self.finance.overdue_count
+
+    @property
+    def inventory_value(self):
+        return self.boutique.inventory_value + self.hardware.inventory_value
+
+    @property
+    def profit_today(self):
+        return self.boutique.profit_today + self.hardware.profit_today
+
+    @property
+    def by_business(self):
+        return {
+            'boutique': self.boutique,
+            'hardware': self.hardware,
+            'finance': self.finance,
+        }
+
+    def template_context(self):
+        """Keyword arguments for ``render_template('dashboard.html', ...)``."""
+        return {
+            'today': self.today,
+            'stats': self,
+            'by_business': self.by_business,
+            'sales_trend': self.sales_trend,
+            'low_stock_items': self.low_stock_items,
+        }
+
+    @classmethod
+    def empty(cls, today=None):
+        """Zeroed metrics used when the database is unavailable."""
+        return cls(today=today or get_local_today())
+
+
+def _float(val):
+    """Safely convert Decimal/None to float."""
+    if val is None:
+        return 0.0
+    return float(val)
+
+
+def _sales_by_day(sale_model, window_start, today):
+    """Sum paid amounts and count sales per day over the trend window.
+
+    Returns ``(paid_by_day, count_by_day)``.
+    """
+    rows = db.session.query(
+        sale_model.sale_date,
+        func.sum(sale_model.amount_paid),
+        func.count(sale_model.id),
+    ).filter(
+        sale_model.is_deleted == False,
+        sale_model.sale_date >= window_start,
+        sale_model.sale_date <= today,
+    ).group_by(sale_model.sale_date).all()
+
+    paid_by_day = {}
+    count_by_day = {}
+    for day, paid, count in rows:
+        paid_by_day[day] = _float(paid)
+        count_by_day[day] = count or 0
+    return paid_by_day, count_by_day
+
+
+def _open_credits(sale_model):
+    """Outstanding balance of uncleared part-payment sales.
+
+    The filter matches the ``ix_*_sales_open_credit`` partial index predicate.
+    """
+    total = db.session.query(func.sum(sale_model.balance)).filter(
+        sale_model.is_deleted == False,
+        sale_model.payment_type == 'part',
+        sale_model.is_credit_cleared == False,
+    ).scalar()
+    return _float(total)
+
+
+def _repayments_by_day(window_start, today):
+    """Sum individual and group loan repayments per day in one query."""
+    individual = db.session.query(
+        LoanPayment.payment_date.label('day'),
+        LoanPayment.amount.label('amount'),
+    ).filter(
+        LoanPayment.payment_date >= window_start,
+        LoanPayment.payment_date <= today,
+        LoanPayment.is_deleted == False,
+    )
+    group = db.session.query(
+        GroupLoanPayment.payment_date.label('day'),
+        GroupLoanPayment.amount.label('amount'),
+    ).filter(
+        GroupLoanPayment.payment_date >= window_start,
+        GroupLoanPayment.payment_date <= today,
+        GroupLoanPayment.is_deleted == False,
+    )
+    payments = union_all(individual, group).subquery()
+
+    rows = db.session.query(
+        payments.c.day,
+        func.sum(payments.c.amount),
+    ).group_by(payments.c.day).all()
+    return {day: _float(total) for day, total in rows}
+
+
+def _profit_for_day(target_date):
+    """Return (boutique, hardware) gross profit for a day in one query."""
+    boutique = db.session.query(
+        literal('boutique').label('business'),
+        ((BoutiqueSaleItem.unit_price - func.coalesce(BoutiqueStock.cost_price, 0)) *
+         BoutiqueSaleItem.quantity).label('profit'),
+    ).join(
+        BoutiqueSale, BoutiqueSaleItem.sale_id == BoutiqueSale.id
+    ).outerjoin(
+        BoutiqueStock, BoutiqueSaleItem.stock_id == BoutiqueStock.id
+    ).filter(
+        BoutiqueSale.sale_date == target_date,
+        BoutiqueSale.is_deleted == False,
+    )
+    hardware = db.session.query(
+        literal('hardware').label('business'),
+        ((HardwareSaleItem.unit_price - func.coalesce(HardwareStock.cost_price, 0)) *
+         HardwareSaleItem.quantity).label('profit'),
+    ).join(
+        HardwareSale, HardwareSaleItem.sale_id == HardwareSale.id
+    ).outerjoin(
+        HardwareStock, HardwareSaleItem.stock_id == HardwareStock.id
+    ).filter(
+        HardwareSale.sale_date == target_date,
+        HardwareSale.is_deleted == False,
+    )
+    lines = union_all(boutique, hardware).subquery()
+
+    rows = db.session.query(
+        lines.c.business,
+        func.sum(lines.c.profit),
+    ).group_by(lines.c.business).all()
+    totals = {business: _float(profit) for business, profit in rows}
+    return totals.get('boutique', 0.0), totals.get('hardware', 0.0)
+
+
+def _stock_summary(stock_model):
+    """Return (low_stock_count, inventory_value_at_cost) for active stock."""
+    is_low = stock_model.quantity <= stock_model.low_stock_threshold
+    low_count, inventory_value = db.session.query(
+        func.count(stock_model.id).filter(is_low),
+        func.sum(stock_model.cost_price * stock_model.quantity),
+    ).filter(
+        stock_model.is_active == True
+    ).one()
+    return low_count or 0, _float(inventory_value)
+
+
+def _low_stock_alerts(stock_model, business_label, limit=LOW_STOCK_ALERT_LIMIT):
+    rows = db.session.query(
+        stock_model.item_name,
+        stock_model.quantity,
+        stock_model.unit,
+    ).filter(
+        stock_model.is_active == True,
+        stock_model.quantity <= stock_model.low_stock_threshold,
+    ).limit(limit).all()
+    return [
+        {'business': business_label, 'item': name, 'quantity': quantity, 'unit': unit}
+        for name, quantity, unit in rows
+    ]
+
+
+def _overdue_count():
+    """Count overdue individual and group loans in one query."""
+    individual = db.session.query(func.count(Loan.id)).filter(
+        Loan.is_deleted == False,
+        Loan.status == 'overdue',
+    ).scalar_subquery()
+    group = db.session.query(func.count(GroupLoan.id)).filter(
+        GroupLoan.is_deleted == False,
+        GroupLoan.status == 'overdue',
+    ).scalar_subquery()
+    return db.session.query(individual + group).scalar() or 0
+
+
+def compute_dashboard_metrics(today=None, trend_days=TREND_DAYS):
+    """Compute all dashboard figures with a fixed, small number of queries."""
+    from app.modules.finance import summarize_outstanding_portfolio
+
+    today = today or get_local_today()
+    yesterday = today - timedelta(days=1)
+    window_start = today - timedelta(days=max(trend_days, 2) - 1)
+
+    boutique_paid, boutique_counts = _sales_by_day(BoutiqueSale, window_start, today)
+    hardware_paid, hardware_counts = _sales_by_day(HardwareSale, window_start, today)
+    boutique_credits = _open_credits(BoutiqueSale)
+    hardware_credits = _open_credits(HardwareSale)
+    repayments = _repayments_by_day(window_start, today)
+    boutique_profit, hardware_profit = _profit_for_day(today)
+    boutique_low, boutique_value = _stock_summary(BoutiqueStock)
+    hardware_low, hardware_value = _stock_summary(HardwareStock)
+    outstanding, interest_expected = summarize_outstanding_portfolio()
+
+    metrics = DashboardMetrics(
+        today=today,
+        boutique=SalesMetrics(
+            today=boutique_paid.get(today, 0.0),
+            yesterday=boutique_paid.get(yesterday, 0.0),
+            credits=boutique_credits,
+            transactions=boutique_counts.get(today, 0),
+            low_stock=boutique_low,
+            inventory_value=boutique_value,
+            profit_today=boutique_profit,
+        ),
+        hardware=SalesMetrics(
+            today=hardware_paid.get(today, 0.0),
+            yesterday=hardware_paid.get(yesterday, 0.0),
+            credits=hardware_credits,
+            transactions=hardware_counts.get(today, 0),
+            low_stock=hardware_low,
+            inventory_value=hardware_value,
+            profit_today=hardware_profit,
+        ),
+        finance=FinanceMetrics(
+            outstanding=outstanding,
+            interest_expected=interest_expected,
+            repayments_today=repayments.get(today, 0.0),
+            overdue_count=_overdue_count(),
+        ),
+    )
+
+    for offset in range(trend_days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        metrics.sales_trend.append(TrendDay(
+            date=day.strftime('%a'),
+            boutique=boutique_paid.get(day, 0.0),
+            hardware=hardware_paid.get(day, 0.0),
+            finance=repayments.get(day, 0.0),
+        ))
+
+    if boutique_low:
+        metrics.low_stock_items.extend(_low_stock_alerts(BoutiqueStock, 'Boutique'))
+    if hardware_low:
+        metrics.low_stock_items.extend(_low_stock_alerts(HardwareStock, 'Hardware'))
+
+    return metrics
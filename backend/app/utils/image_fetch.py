@@ -1,8 +1,53 @@
 """
 Utility to auto-fetch product images from the internet using DuckDuckGo image search.
 Falls back gracefully if the service is unavailable.
+
+Background fetches go through ``image_fetcher``: a small, fixed pool of
+worker threads fed by a de-duplicating queue keyed by (model, stock id).
+Searches are spaced out per provider and retried with exponential backoff,
+and the DB is only touched briefly to store a result, so a bulk refresh
+cannot spawn hundreds of threads or drain the connection pool.
 """
+import logging
+import os
+import random
 import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONTEXTS = {
+    'BoutiqueStock': 'product',
+    'HardwareStock': 'hardware building material',
+}
+
+
+def _search_image_url(product_name, category_name=None, search_context='product'):
+    """Run one DuckDuckGo image search; provider errors propagate to the caller."""
+    from duckduckgo_search import DDGS
+
+    # Build search query with appropriate context
+    query = product_name
+    if category_name:
+        query = f"{category_name} {product_name}"
+    query += f" {search_context}"
+
+    with DDGS() as ddgs:
+        results = ddgs.images(
+            keywords=query,
+            region="wt-wt",
+            safesearch="moderate",
+            max_results=5
+        )
+
+        for result in results:
+            image_url = result.get("image", "")
+            # Filter for reasonable image URLs
+            if image_url and image_url.startswith("http"):
+                return image_url
+
+    return None
 
 
 def fetch_product_image(product_name, category_name=None, search_context='product'):
@@ -19,28 +64,7 @@ def fetch_product_image(product_name, category_name=None, search_context='produc
         str: URL of the first matching image, or None if not found
     """
     try:
-        from duckduckgo_search import DDGS
-
-        # Build search query with appropriate context
-        query = product_name
-        if category_name:
-            query = f"{category_name} {product_name}"
-        query += f" {search_context}"
-
-        with DDGS() as ddgs:
-            results = ddgs.images(
-                keywords=query,
-                region="wt-wt",
-                safesearch="moderate",
-                max_results=5
-            )
-
-            for result in results:
-                image_url = result.get("image", "")
-                # Filter for reasonable image URLs
-                if image_url and image_url.startswith("http"):
-                    return image_url
-
+        return _search_image_url(product_name, category_name, search_context)
     except ImportError:
         print("[Image Fetch] duckduckgo-search not installed. Run: pip install duckduckgo-search")
     except Exception as e:
@@ -49,9 +73,201 @@ def fetch_product_image(product_name, category_name=None, search_context='produc
     return None
 
 
-def fetch_product_image_async(stock_item_id, product_name, category_name=None, model_class='BoutiqueStock'):
+class ImageFetchExecutor:
+    """Bounded worker pool for background product image searches."""
+
+    PROVIDER = 'duckduckgo'
+
+    def __init__(self, app=None):
+        self.app = None
+        self.workers = 2
+        self.max_pending = 200
+        self.max_attempts = 3
+        self.min_interval = 1.0
+        self.backoff_seconds = 5.0
+        self.status_ttl = 3600
+        self._pending = OrderedDict()
+        self._status = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._provider_next_at = {}
+        self._threads = []
+        self._threads_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = max(int(app.config.get('IMAGE_FETCH_WORKERS', 2)), 1)
+        self.max_pending = max(int(app.config.get('IMAGE_FETCH_MAX_PENDING', 200)), 1)
+        self.max_attempts = max(int(app.config.get('IMAGE_FETCH_MAX_ATTEMPTS', 3)), 1)
+        self.min_interval = max(float(app.config.get('IMAGE_FETCH_MIN_INTERVAL', 1.0)), 0.0)
+        app.extensions['image_fetcher'] = self
+
+    def submit(self, model_class, stock_item_id, product_name, category_name=None, replace_image_url=None):
+        """Queue a search; returns False if it was already queued or the queue is full.
+
+        The result is only stored on an item with no image, or whose image is
+        still ``replace_image_url`` (the one a re-fetch is meant to replace).
+        """
+        key = (model_class, stock_item_id)
+        with self._lock:
+            if key in self._pending or self._status.get(key, {}).get('state') == 'running':
+                return False
+            if len(self._pending) >= self.max_pending:
+                logger.warning('Image fetch queue full (%s jobs); skipping %s #%s', self.max_pending, *key)
+                return False
+            self._pending[key] = {
+                'product_name': product_name,
+                'category_name': category_name,
+                'replace_image_url': replace_image_url,
+                'attempts': 0,
+                'not_before': 0.0,
+            }
+            self._set_status(key, 'queued')
+            self._ready.notify()
+        self._ensure_threads()
+        return True
+
+    def status_for(self, model_class, stock_item_ids=None):
+        """Return ``{stock_id: state}`` for recent jobs of ``model_class``.
+
+        States are 'queued', 'running', 'done', 'not_found' and 'failed'.
+        """
+        cutoff = time.monotonic() - self.status_ttl
+        with self._lock:
+            return {
+                stock_id: entry['state']
+                for (name, stock_id), entry in self._status.items()
+                if name == model_class and entry['at'] >= cutoff
+                and (stock_item_ids is None or stock_id in stock_item_ids)
+            }
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def _set_status(self, key, state):
+        now = time.monotonic()
+        self._status[key] = {'state': state, 'at': now}
+        if len(self._status) > self.max_pending * 5:
+            cutoff = now - self.status_ttl
+            for stale in [k for k, v in self._status.items() if v['at'] < cutoff and v['state'] not in ('queued', 'running')]:
+                del self._status[stale]
+
+    def _ensure_threads(self):
+        # Threads do not survive gunicorn's fork, so (re)start per worker pid.
+        with self._lock:
+            if self._threads_pid != os.getpid():
+                self._threads = []
+                self._threads_pid = os.getpid()
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name='image-fetch', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _next_job(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = None
+                for key, job in self._pending.items():
+                    if job['not_before'] <= now:
+                        del self._pending[key]
+                        self._set_status(key, 'running')
+                        return key, job
+                    delay = job['not_before'] - now
+                    wait = delay if wait is None else min(wait, delay)
+                self._ready.wait(wait)
+
+    def _wait_for_provider(self):
+        # Space calls to the search provider across all workers in this process.
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._provider_next_at.get(self.PROVIDER, 0.0))
+            self._provider_next_at[self.PROVIDER] = start_at + self.min_interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def _run(self):
+        while True:
+            key, job = self._next_job()
+            try:
+                self._process(key, job)
+            except Exception:
+                logger.exception('Image fetch worker crashed on %s #%s', *key)
+                with self._lock:
+                    self._set_status(key, 'failed')
+
+    def _process(self, key, job):
+        model_class, stock_item_id = key
+        self._wait_for_provider()
+        try:
+            image_url = _search_image_url(
+                job['product_name'], job['category_name'], SEARCH_CONTEXTS.get(model_class, 'product')
+            )
+        except ImportError:
+            logger.warning('duckduckgo-search not installed; cannot fetch images')
+            with self._lock:
+                self._set_status(key, 'failed')
+            return
+        except Exception as exc:
+            job['attempts'] += 1
+            with self._lock:
+                if job['attempts'] >= self.max_attempts:
+                    logger.warning("Giving up on image for '%s' after %s attempts: %s",
+                                   job['product_name'], job['attempts'], exc)
+                    self._set_status(key, 'failed')
+                    return
+                # Back off this job and slow the provider down for everyone.
+                delay = self.backoff_seconds * (2 ** (job['attempts'] - 1)) * random.uniform(0.8, 1.2)
+                job['not_before'] = time.monotonic() + delay
+                self._provider_next_at[self.PROVIDER] = max(
+                    self._provider_next_at.get(self.PROVIDER, 0.0), time.monotonic() + delay / 2
+                )
+                self._pending[key] = job
+                self._set_status(key, 'queued')
+                self._ready.notify()
+            return
+
+        if not image_url:
+            logger.info("No image found for '%s'", job['product_name'])
+            with self._lock:
+                self._set_status(key, 'not_found')
+            return
+
+        self._store(model_class, stock_item_id, image_url, job.get('replace_image_url'))
+        logger.info("Found image for '%s': %s", job['product_name'], image_url[:80])
+        with self._lock:
+            self._set_status(key, 'done')
+
+    def _store(self, model_class, stock_item_id, image_url, replace_image_url=None):
+        from app.extensions import db
+
+        if model_class == 'HardwareStock':
+            from app.models.hardware import HardwareStock as StockModel
+        else:
+            from app.models.boutique import BoutiqueStock as StockModel
+
+        with self.app.app_context():
+            try:
+                item = db.session.get(StockModel, stock_item_id)
+                # Never overwrite an image someone set while the search was running.
+                if item and (not item.image_url or (replace_image_url and item.image_url == replace_image_url)):
+                    item.image_url = image_url
+                    db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+
+def fetch_product_image_async(stock_item_id, product_name, category_name=None, model_class='BoutiqueStock',
+                              replace_image_url=None):
     """
-    Fetch a product image in the background and update the database.
+    Queue a background image search for a stock item and update the database.
     This avoids slowing down the stock creation flow.
 
     Args:
@@ -59,37 +275,11 @@ def fetch_product_image_async(stock_item_id, product_name, category_name=None, m
         product_name: Name of the product
         category_name: Optional category for better search
         model_class: Name of the model class ('BoutiqueStock' or 'HardwareStock')
+        replace_image_url: The item's current image, if the result should replace it
+
+    Returns:
+        bool: True if a new job was queued
     """
-    from flask import current_app
-
-    app = current_app._get_current_object()
-
-    def _fetch_and_update():
-        with app.app_context():
-            from app.extensions import db
-
-            # Import the correct model based on model_class parameter
-            if model_class == 'HardwareStock':
-                from app.models.hardware import HardwareStock
-                StockModel = HardwareStock
-            else:
-                from app.models.boutique import BoutiqueStock
-                StockModel = BoutiqueStock
-
-            # Use appropriate search context based on model type
-            if model_class == 'HardwareStock':
-                search_context = 'hardware building material'
-            else:
-                search_context = 'product'
-            image_url = fetch_product_image(product_name, category_name, search_context)
-            if image_url:
-                item = StockModel.query.get(stock_item_id)
-                if item:
-                    item.image_url = image_url
-                    db.session.commit()
-                    print(f"[Image Fetch] Found image for '{product_name}': {image_url[:80]}...")
-            else:
-                print(f"[Image Fetch] No image found for '{product_name}'")
+    from app.extensions import image_fetcher
 
-    thread = threading.Thread(target=_fetch_and_update, daemon=True)
-    thread.start()
+    return image_fetcher.submit(model_class, stock_item_id, product_name, category_name, replace_image_url)
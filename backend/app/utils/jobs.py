@@ -0,0 +1,313 @@
+"""Durable background jobs stored in the ``background_jobs`` table.
+
+Request handlers call ``enqueue(kind, payload)`` and return straight away
+with the job id; clients poll ``/ai/jobs/<id>`` for the outcome. Jobs are
+executed by ``flask worker`` (a separate process) or, on a single-service
+deploy, by ``job_runner``'s embedded thread in each web worker
+(``JOBS_EMBEDDED_WORKER``, limited to ``JOBS_EMBEDDED_KINDS`` when set, so
+the two can split the kinds between them).
+
+Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` so any number of workers
+can share the table. A claimed job holds a lease (``locked_until``); if the
+worker dies the lease expires and another worker retries it. Failures are
+retried with exponential backoff until ``max_attempts``.
+
+Handlers are plain functions registered with ``@job_handler('kind')`` that
+take the payload dict and return a JSON-serialisable result.
+"""
+
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.system import BackgroundJob
+from app.utils.timezone import get_local_now
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+# Modules that register handlers; imported before a worker starts claiming jobs.
+HANDLER_MODULES = (
+    'app.utils.briefing_engine',
+    'app.utils.ocr_engine',
+)
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def job_handler(kind):
+    """Register ``func(payload)`` as the handler for jobs of ``kind``."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def load_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    return JOB_HANDLERS
+
+
+def _config(name, default):
+    try:
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        return default
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def find_active_job(dedupe_key):
+    """Return the queued or running job holding ``dedupe_key``, if any."""
+    if not dedupe_key:
+        return None
+    return BackgroundJob.query.filter(
+        BackgroundJob.dedupe_key == dedupe_key,
+        BackgroundJob.status.in_(ACTIVE_STATUSES),
+    ).first()
+
+
+def enqueue(kind, payload=None, *, dedupe_key=None, max_attempts=None, delay_seconds=0, created_by=None):
+    """Queue a job and commit. Returns the new job, or the active job already
+    holding ``dedupe_key``."""
+    existing = find_active_job(dedupe_key)
+    if existing:
+        return existing
+
+    job = BackgroundJob(
+        kind=kind,
+        payload=payload or {},
+        status='queued',
+        dedupe_key=dedupe_key,
+        attempts=0,
+        max_attempts=max_attempts or _config('JOBS_MAX_ATTEMPTS', 3),
+        run_after=get_local_now() + timedelta(seconds=delay_seconds),
+        created_by=created_by,
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request queued the same dedupe_key first.
+        db.session.rollback()
+        existing = find_active_job(dedupe_key)
+        if existing:
+            return existing
+        raise
+
+    job_runner.wake()
+    return job
+
+
+def get_job(job_id):
+    return db.session.get(BackgroundJob, job_id)
+
+
+def abandon_queued_job(job_id, older_than_seconds, reason):
+    """Fail a job no worker has picked up within ``older_than_seconds``, and commit.
+
+    Only a job still queued with no attempts is touched, so one a worker
+    claims meanwhile runs as normal. Returns True if the job was abandoned.
+    """
+    now = get_local_now()
+    updated = BackgroundJob.query.filter(
+        BackgroundJob.id == job_id,
+        BackgroundJob.status == 'queued',
+        BackgroundJob.attempts == 0,
+        BackgroundJob.created_at < now - timedelta(seconds=older_than_seconds),
+    ).update({'status': 'failed', 'error': reason, 'finished_at': now}, synchronize_session=False)
+    db.session.commit()
+    return bool(updated)
+
+
+def claim_job(worker_id, kinds=None, visibility_timeout=None):
+    """Lease the next runnable job to ``worker_id`` and commit, or return None."""
+    visibility_timeout = visibility_timeout or _config('JOBS_VISIBILITY_TIMEOUT', 300)
+    now = get_local_now()
+    query = BackgroundJob.query.filter(db.or_(
+        db.and_(BackgroundJob.status == 'queued', BackgroundJob.run_after <= now),
+        db.and_(BackgroundJob.status == 'running', BackgroundJob.locked_until < now),
+    ))
+    if kinds:
+        query = query.filter(BackgroundJob.kind.in_(kinds))
+
+    try:
+        job = query.order_by(BackgroundJob.run_after, BackgroundJob.id).with_for_update(skip_locked=True).first()
+        if job is None:
+            db.session.commit()
+            return None
+
+        if job.status == 'running' and job.attempts >= job.max_attempts:
+            # The lease of its last attempt expired; the worker probably died.
+            job.status = 'failed'
+            job.error = f'Lease expired after attempt {job.attempts} (worker {job.locked_by})'
+            job.finished_at = now
+            job.locked_until = None
+            db.session.commit()
+            return claim_job(worker_id, kinds, visibility_timeout)
+
+        job.status = 'running'
+        job.attempts = (job.attempts or 0) + 1
+        job.locked_by = worker_id
+        job.locked_until = now + timedelta(seconds=visibility_timeout)
+        job.started_at = now
+        db.session.commit()
+        return job
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _finish(job_id, worker_id, **values):
+    """Write a job's outcome, but only if this worker still holds the lease."""
+    values.setdefault('locked_until', None)
+    updated = BackgroundJob.query.filter(
+        BackgroundJob.id == job_id,
+        BackgroundJob.status == 'running',
+        BackgroundJob.locked_by == worker_id,
+    ).update(values, synchronize_session=False)
+    db.session.commit()
+    if not updated:
+        logger.warning('Job %s finished after its lease passed to another worker', job_id)
+    return bool(updated)
+
+
+def run_job(job, worker_id):
+    """Execute a claimed job and record success, a retry or failure."""
+    job_id, kind, payload, attempts, max_attempts = job.id, job.kind, job.payload or {}, job.attempts, job.max_attempts
+    handler = JOB_HANDLERS.get(kind)
+    if handler is None:
+        return _finish(job_id, worker_id, status='failed', error=f'No handler registered for {kind!r}',
+                       finished_at=get_local_now())
+
+    try:
+        result = handler(payload)
+    except Exception as exc:
+        db.session.rollback()
+        error = f'{exc.__class__.__name__}: {exc}'[:2000]
+        if attempts >= max_attempts:
+            logger.warning('Job %s (%s) failed permanently: %s', job_id, kind, error)
+            return _finish(job_id, worker_id, status='failed', error=error, finished_at=get_local_now())
+
+        backoff = _config('JOBS_RETRY_BACKOFF_SECONDS', 30) * (2 ** (attempts - 1))
+        logger.info('Job %s (%s) attempt %s failed; retrying in %ss', job_id, kind, attempts, backoff)
+        return _finish(job_id, worker_id, status='queued', error=error,
+                       run_after=get_local_now() + timedelta(seconds=backoff))
+
+    return _finish(job_id, worker_id, status='succeeded', result=result, error=None,
+                   finished_at=get_local_now())
+
+
+def work(worker_id=None, kinds=None, once=False, poll_seconds=None, max_jobs=None, stop_event=None):
+    """Claim and run jobs until stopped. Returns the number of jobs run.
+
+    ``once`` drains what is currently runnable and returns instead of polling.
+    """
+    load_handlers()
+    worker_id = worker_id or default_worker_id()
+    poll_seconds = poll_seconds or _config('JOBS_POLL_SECONDS', 2)
+    processed = 0
+
+    while not (stop_event and stop_event.is_set()):
+        try:
+            job = claim_job(worker_id, kinds)
+        except Exception:
+            logger.exception('Could not claim a background job')
+            job = None
+
+        if job is None:
+            db.session.remove()
+            if once:
+                break
+            if stop_event:
+                stop_event.wait(poll_seconds)
+            else:
+                time.sleep(poll_seconds)
+            continue
+
+        job_id = job.id
+        try:
+            run_job(job, worker_id)
+        except Exception:
+            db.session.rollback()
+            logger.exception('Could not record the outcome of job %s', job_id)
+        finally:
+            db.session.remove()
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            break
+
+    return processed
+
+
+class JobRunner:
+    """Optional in-process worker thread for deploys without a worker service."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = bool(app.config.get('JOBS_EMBEDDED_WORKER', True))
+        self.kinds = list(app.config.get('JOBS_EMBEDDED_KINDS') or []) or None
+        app.extensions['job_runner'] = self
+        if self.enabled:
+            app.before_request(self._ensure_thread)
+
+    def wake(self):
+        if not self.enabled:
+            return
+        self._ensure_thread()
+        self._wake.set()
+
+    def _ensure_thread(self):
+        # Threads do not survive gunicorn's fork, so (re)start per worker pid.
+        if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread_pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='job-runner', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            worker_id = f'embedded:{default_worker_id()}'
+            poll_seconds = self.app.config.get('JOBS_POLL_SECONDS', 2)
+            while not self._stop.is_set():
+                try:
+                    work(worker_id=worker_id, kinds=self.kinds, once=True)
+                except Exception:
+                    logger.exception('Embedded job runner pass failed')
+                # Idle polling is slower than a dedicated worker; enqueue() wakes us.
+                self._wake.wait(poll_seconds * 5)
+                self._wake.clear()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+job_runner = JobRunner()
@@ -0,0 +1,245 @@
+"""Installment schedules for individual and group loans.
+
+Loans only store aggregates (``balance``, ``periods_paid``, ``due_date``).
+This module expands a loan's terms into ``loan_installments`` rows and
+applies its payments to them oldest first, so collections questions such as
+"what is due this week" or "which loans are behind" are range scans on the
+installment indexes instead of per-loan recomputation.
+
+Schedules:
+
+- flat-rate individual loans: equal installments, one per week or month of
+  the term, the last on ``due_date``;
+- monthly-accrual individual loans: the monthly interest on each month
+  anniversary and the principal on ``due_date``. While the loan is unpaid the
+  schedule keeps adding monthly interest past maturity, like
+  ``refresh_loan_state`` does; once it is paid off, interest stops at the
+  payoff date, which is also when an early payoff repaid the principal;
+- group loans: ``total_periods`` equal installments, one every period.
+
+``sync_loan_schedule`` and ``sync_group_schedule`` rewrite a loan's rows in
+place and re-run the allocation. Call them after anything that changes the
+terms or payments of a loan that already has an id. The caller commits.
+"""
+
+from datetime import timedelta
+from decimal import ROUND_DOWN, Decimal
+
+from dateutil.relativedelta import relativedelta
+
+from app.extensions import db
+from app.models.finance import GroupLoan, GroupLoanPayment, Loan, LoanInstallment, LoanPayment
+from app.utils.timezone import get_local_today
+
+CENT = Decimal('0.01')
+OPEN_STATUSES = ('pending', 'partial')
+
+
+def _money(value):
+    return Decimal(str(value or 0))
+
+
+def _split(total, parts):
+    """Split ``total`` into ``parts`` cent amounts; the last takes the remainder."""
+    total = _money(total).quantize(CENT)
+    share = (total / parts).quantize(CENT, rounding=ROUND_DOWN)
+    return [share] * (parts - 1) + [total - share * (parts - 1)]
+
+
+def individual_schedule(loan, as_of_date=None, paid_off_on=None):
+    """Return ``[(due_date, principal_due, interest_due)]`` for an individual loan.
+
+    ``paid_off_on`` is the date of the payment that cleared a loan with no
+    balance left (defaults to ``as_of_date``).
+    """
+    from app.modules.finance import elapsed_full_months
+
+    as_of_date = as_of_date or get_local_today()
+    issue_date = loan.issue_date
+    due_date = loan.due_date or issue_date
+    principal = _money(loan.principal).quantize(CENT)
+
+    if (loan.interest_mode or 'flat_rate') == 'monthly_accrual':
+        principal_date = due_date
+        if _money(loan.balance) > 0:
+            months = max(elapsed_full_months(issue_date, due_date), elapsed_full_months(issue_date, as_of_date))
+        else:
+            # Only the months that had passed by the payoff were ever charged
+            paid_off_on = paid_off_on or as_of_date
+            months = elapsed_full_months(issue_date, paid_off_on)
+            principal_date = min(due_date, paid_off_on)
+        monthly_interest = _money(loan.monthly_interest_amount).quantize(CENT)
+        rows = {issue_date + relativedelta(months=month): [Decimal('0'), monthly_interest]
+                for month in range(1, months + 1)}
+        rows.setdefault(principal_date, [Decimal('0'), Decimal('0')])[0] = principal
+        return [(day, principal_due, interest_due) for day, (principal_due, interest_due) in sorted(rows.items())]
+
+    periods = max(int(loan.duration_weeks or 0), 1)
+    dates = []
+    for period in range(1, periods + 1):
+        if loan.duration_type == 'months':
+            day = issue_date + relativedelta(months=period)
+        else:
+            day = issue_date + timedelta(weeks=period)
+        dates.append(min(day, due_date))
+    dates[-1] = due_date
+    return list(zip(dates, _split(principal, periods), _split(loan.interest_amount, periods)))
+
+
+def group_schedule(group):
+    """Return ``[(due_date, principal_due, interest_due)]`` for a group loan."""
+    from app.modules.finance import PERIOD_DAYS
+
+    issue_date = group.issue_date or (group.created_at.date() if group.created_at else get_local_today())
+    periods = max(int(group.total_periods or 0), 1)
+    period_days = PERIOD_DAYS.get(group.period_type, 30)
+    dates = [issue_date + timedelta(days=period_days * period) for period in range(1, periods + 1)]
+    if group.due_date:
+        dates = [min(day, group.due_date) for day in dates]
+        dates[-1] = group.due_date
+    # Older group loans only recorded total_amount; the installments must add up to it.
+    principal = min(_money(group.principal), _money(group.total_amount))
+    interest = _money(group.total_amount) - principal
+    return list(zip(dates, _split(principal, periods), _split(interest, periods)))
+
+
+def allocate_payments(amounts_due, payments, amount_paid):
+    """Apply payments to installments oldest first.
+
+    ``payments`` is ``[(payment_date, amount)]`` in the order they were made
+    and ``amount_paid`` the loan's recorded total. Returns ``[(paid, status,
+    paid_date)]`` per installment. Any part of ``amount_paid`` without
+    payment rows (older data) is applied first, with no date.
+    """
+    credits = [(day, _money(amount)) for day, amount in payments]
+    unrecorded = _money(amount_paid) - sum((amount for _, amount in credits), Decimal('0'))
+    if unrecorded > 0:
+        credits.insert(0, (None, unrecorded))
+    available = max(_money(amount_paid), Decimal('0'))
+
+    paid = [Decimal('0')] * len(amounts_due)
+    paid_dates = [None] * len(amounts_due)
+    index = 0
+    for day, amount in credits:
+        amount = min(amount, available)
+        available -= amount
+        while amount > 0 and index < len(amounts_due):
+            take = min(amount, amounts_due[index] - paid[index])
+            paid[index] += take
+            amount -= take
+            if paid[index] >= amounts_due[index]:
+                paid_dates[index] = day
+                index += 1
+        if index >= len(amounts_due) or available <= 0:
+            break
+
+    allocation = []
+    for due, settled, paid_date in zip(amounts_due, paid, paid_dates):
+        if settled >= due:
+            status = 'paid'
+        elif settled > 0:
+            status = 'partial'
+        else:
+            status = 'pending'
+        allocation.append((settled, status, paid_date))
+    return allocation
+
+
+def _sync(existing_query, owner, schedule, payments, amount_paid):
+    rows = existing_query.order_by(LoanInstallment.installment_no).all()
+    amounts_due = [principal_due + interest_due for _, principal_due, interest_due in schedule]
+    allocation = allocate_payments(amounts_due, payments, amount_paid)
+
+    for number, ((due_date, principal_due, interest_due), amount_due, (settled, status, paid_date)) in enumerate(
+            zip(schedule, amounts_due, allocation), start=1):
+        if number <= len(rows):
+            row = rows[number - 1]
+        else:
+            row = LoanInstallment(installment_no=number, **owner)
+            db.session.add(row)
+        row.due_date = due_date
+        row.principal_due = principal_due
+        row.interest_due = interest_due
+        row.amount_due = amount_due
+        row.amount_paid = settled
+        row.status = status
+        row.paid_date = paid_date
+
+    for extra in rows[len(schedule):]:
+        db.session.delete(extra)
+    return len(schedule)
+
+
+def sync_loan_schedule(loan, as_of_date=None):
+    """Regenerate an individual loan's installments and re-apply its payments."""
+    existing = LoanInstallment.query.filter_by(loan_id=loan.id)
+    if loan.is_deleted:
+        existing.delete(synchronize_session=False)
+        return 0
+    payments = db.session.query(LoanPayment.payment_date, LoanPayment.amount).filter(
+        LoanPayment.loan_id == loan.id,
+        LoanPayment.is_deleted == False,
+    ).order_by(LoanPayment.payment_date, LoanPayment.id).all()
+    paid_off_on = payments[-1].payment_date if payments and _money(loan.balance) <= 0 else None
+    schedule = individual_schedule(loan, as_of_date, paid_off_on)
+    return _sync(existing, {'loan_id': loan.id}, schedule, payments, loan.amount_paid)
+
+
+def sync_group_schedule(group):
+    """Regenerate a group loan's installments and re-apply its payments."""
+    existing = LoanInstallment.query.filter_by(group_loan_id=group.id)
+    if group.is_deleted:
+        existing.delete(synchronize_session=False)
+        return 0
+    payments = db.session.query(GroupLoanPayment.payment_date, GroupLoanPayment.amount).filter(
+        GroupLoanPayment.group_loan_id == group.id,
+        GroupLoanPayment.is_deleted == False,
+    ).order_by(GroupLoanPayment.payment_date, GroupLoanPayment.id).all()
+    return _sync(existing, {'group_loan_id': group.id}, group_schedule(group), payments, group.amount_paid)
+
+
+def extend_accrual_schedules(as_of_date=None):
+    """Add the months accrued past maturity to unpaid monthly-accrual loans.
+
+    Called from the daily loan refresh after its bulk UPDATE (hence
+    ``populate_existing``); only these loans' schedules change with the
+    calendar. Returns the number of loans synced; the caller commits.
+    """
+    as_of_date = as_of_date or get_local_today()
+    loans = Loan.query.filter(
+        Loan.is_deleted == False,
+        Loan.interest_mode == 'monthly_accrual',
+        Loan.balance > 0,
+        Loan.due_date < as_of_date,
+    ).execution_options(populate_existing=True).all()
+    for loan in loans:
+        sync_loan_schedule(loan, as_of_date)
+    return len(loans)
+
+
+def rebuild_all_schedules(batch_size=200):
+    """Regenerate every live loan's schedule, committing per batch.
+
+    Returns ``(loans, group_loans)`` counts. Used to backfill the table and
+    to repair drift; safe to re-run.
+    """
+    counts = []
+    for model, sync in ((Loan, sync_loan_schedule), (GroupLoan, sync_group_schedule)):
+        # Rows of deleted loans are removed too
+        ids = [row_id for (row_id,) in db.session.query(model.id).order_by(model.id).all()]
+        for start in range(0, len(ids), batch_size):
+            for item in model.query.filter(model.id.in_(ids[start:start + batch_size])).all():
+                sync(item)
+            db.session.commit()
+        counts.append(len(ids))
+    return tuple(counts)
+
+
+def open_installments(start_date=None, end_date=None):
+    """Unpaid installments due in ``[start_date, end_date]`` (either bound optional)."""
+    query = LoanInstallment.query.filter(LoanInstallment.status.in_(OPEN_STATUSES))
+    if start_date:
+        query = query.filter(LoanInstallment.due_date >= start_date)
+    if end_date:
+        query = query.filter(LoanInstallment.due_date <= end_date)
+    return query
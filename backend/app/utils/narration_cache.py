@@ -0,0 +1,158 @@
+"""Shared cache for AI chat narration.
+
+The chatbot narrates structured intent data that is often byte-identical
+across requests (several managers asking about overdue loans within the
+hour). Narratives are stored in ``ai_narration_cache`` keyed by a hash of
+(intent, model, canonical JSON payload), so every worker can reuse them
+until they expire. Entries past ``AI_NARRATION_CACHE_SECONDS`` are never
+served, and the table is trimmed to the ``AI_NARRATION_CACHE_MAX_ENTRIES``
+most recently used rows.
+
+Reads and writes go through the request's session inside a savepoint, so
+a cache failure never discards the caller's pending work, and then commit
+so the connection is back in the pool before the provider call.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import text
+
+from app.extensions import db
+from app.utils.timezone import get_local_now
+
+logger = logging.getLogger(__name__)
+
+
+def _ttl_seconds():
+    return current_app.config.get('AI_NARRATION_CACHE_SECONDS', 900)
+
+
+def _max_entries():
+    return max(current_app.config.get('AI_NARRATION_CACHE_MAX_ENTRIES', 500), 1)
+
+
+def _commit():
+    try:
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        logger.warning('Narration cache commit failed: %s', exc.__class__.__name__)
+
+
+def narration_cache_key(intent, payload, model):
+    canonical = json.dumps(
+        {'intent': intent, 'model': model, 'payload': payload},
+        sort_keys=True, separators=(',', ':'), default=str,
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get_cached_narration(cache_key):
+    """Return a live cached narrative and mark it recently used, or None."""
+    if _ttl_seconds() <= 0:
+        return None
+    narrative = None
+    try:
+        with db.session.begin_nested():
+            narrative = db.session.execute(
+                text(
+                    'UPDATE ai_narration_cache '
+                    'SET hit_count = hit_count + 1, last_used_at = :now '
+                    'WHERE cache_key = :key AND expires_at > :now '
+                    'RETURNING narrative'
+                ),
+                {'key': cache_key, 'now': get_local_now()},
+            ).scalar()
+    except Exception as exc:
+        logger.warning('Narration cache lookup failed: %s', exc.__class__.__name__)
+    _commit()
+    return narrative
+
+
+def store_narration(cache_key, intent, model, narrative):
+    """Upsert a narrative, then drop expired and least recently used rows."""
+    ttl = _ttl_seconds()
+    if ttl <= 0 or not narrative:
+        return
+    now = get_local_now()
+    try:
+        with db.session.begin_nested():
+            db.session.execute(
+                text(
+                    'INSERT INTO ai_narration_cache '
+                    '(cache_key, intent, model, narrative, hit_count, created_at, last_used_at, expires_at) '
+                    'VALUES (:key, :intent, :model, :narrative, 0, :now, :now, :expires_at) '
+                    'ON CONFLICT (cache_key) DO UPDATE SET '
+                    'narrative = EXCLUDED.narrative, created_at = EXCLUDED.created_at, '
+                    'last_used_at = EXCLUDED.last_used_at, expires_at = EXCLUDED.expires_at'
+                ),
+                {
+                    'key': cache_key,
+                    'intent': intent[:50],
+                    'model': (model or '')[:100] or None,
+                    'narrative': narrative,
+                    'now': now,
+                    'expires_at': now + timedelta(seconds=ttl),
+                },
+            )
+            db.session.execute(
+                text(
+                    'DELETE FROM ai_narration_cache WHERE expires_at <= :now OR id IN ('
+                    ' SELECT id FROM ai_narration_cache ORDER BY last_used_at DESC OFFSET :keep)'
+                ),
+                {'now': now, 'keep': _max_entries()},
+            )
+    except Exception as exc:
+        logger.warning('Narration cache store failed: %s', exc.__class__.__name__)
+    _commit()
+
+
+def cached_ai_chat(intent, payload, prompt, *, system=None):
+    """``ai_chat`` that reuses the narrative for an identical (intent, payload, model)."""
+    from app.utils.ai_client import ai_chat, get_chat_model
+
+    model = get_chat_model()
+    cache_key = narration_cache_key(intent, payload, model)
+    narrative = get_cached_narration(cache_key)
+    if narrative:
+        return narrative
+
+    narrative = ai_chat(prompt, system=system)
+    if narrative:
+        store_narration(cache_key, intent, model, narrative)
+    return narrative
+
+
+def stream_cached_ai_chat(intent, payload, prompt, *, system=None):
+    """Streaming ``cached_ai_chat``: yields the cached narrative in one piece,
+    or the provider's tokens as they arrive.
+
+    The streamed text is only cached if the provider finished it; a stream
+    cut off part-way would otherwise be served to everyone until it expired.
+    """
+    from app.utils.ai_client import ai_chat_stream, get_chat_model
+
+    model = get_chat_model()
+    cache_key = narration_cache_key(intent, payload, model)
+    narrative = get_cached_narration(cache_key)
+    if narrative:
+        yield narrative
+        return
+
+    parts = []
+    stream = ai_chat_stream(prompt, system=system)
+    while True:
+        try:
+            chunk = next(stream)
+        except StopIteration as stop:
+            finished = bool(stop.value)
+            break
+        parts.append(chunk)
+        yield chunk
+    narrative = ''.join(parts).strip()
+    if finished and narrative:
+        store_narration(cache_key, intent, model, narrative)
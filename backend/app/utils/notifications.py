@@ -0,0 +1,182 @@
+"""Push notifications for staff tabs over Server-Sent Events.
+
+Storefront submissions call ``notify_staff`` inside their transaction, which
+issues ``pg_notify`` on the ``staff_notifications`` channel; PostgreSQL only
+delivers it once the row is committed. Each web worker runs one listener
+thread on a dedicated connection (outside the SQLAlchemy pool) and fans the
+payloads out to the SSE streams it is serving, so an open tab costs no
+queries while it waits.
+
+A stream occupies a gunicorn thread for its lifetime, so each worker serves
+at most ``NOTIFY_STREAM_MAX_CLIENTS`` streams and closes each one after
+``NOTIFY_STREAM_SECONDS`` (the browser reconnects). Tabs turned away fall back
+to polling ``/website/api/new-orders`` and ``/website/api/new-inquiries``.
+"""
+
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'staff_notifications'
+
+# pg_notify payloads are limited to 8000 bytes.
+MAX_PAYLOAD_ITEMS = 10
+
+
+def order_notification(order):
+    """Compact order payload: enough for the popup and section filtering (``product_types``)."""
+    items = order.items or []
+    return {
+        'kind': 'order',
+        'id': order.id,
+        'customer_name': order.customer_name,
+        'customer_phone': order.customer_phone,
+        'items': [
+            {
+                'name': str(item.get('name') or '')[:80],
+                'quantity': item.get('quantity', 1),
+                'type': item.get('type'),
+                'product_type': item.get('product_type'),
+            }
+            for item in items[:MAX_PAYLOAD_ITEMS]
+            if isinstance(item, dict)
+        ],
+        'total_amount': float(order.total_amount or 0),
+        'item_count': order.item_count,
+        'product_types': order.product_types,
+        'submitted_at': order.submitted_at.isoformat() if order.submitted_at else None,
+    }
+
+
+def inquiry_notification(inquiry):
+    return {
+        'kind': 'inquiry',
+        'id': inquiry.id,
+        'full_name': inquiry.full_name,
+        'phone': inquiry.phone,
+        'loan_type': inquiry.loan_type,
+        'requested_amount': inquiry.requested_amount,
+        'submitted_at': inquiry.submitted_at.isoformat() if inquiry.submitted_at else None,
+    }
+
+
+def notify_staff(payload):
+    """Queue a notification in the current transaction; it is sent on commit."""
+    from app.extensions import db
+
+    db.session.execute(
+        text('SELECT pg_notify(:channel, :payload)'),
+        {'channel': CHANNEL, 'payload': json.dumps(payload, default=str)},
+    )
+
+
+class NotificationHub:
+    """Per-worker LISTEN connection fanned out to SSE subscribers."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.max_clients = 2
+        self.stream_seconds = 55
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = bool(app.config.get('NOTIFY_STREAM_ENABLED', True))
+        self.max_clients = max(int(app.config.get('NOTIFY_STREAM_MAX_CLIENTS', 2)), 0)
+        self.stream_seconds = max(int(app.config.get('NOTIFY_STREAM_SECONDS', 55)), 5)
+        app.extensions['notification_hub'] = self
+
+    def subscribe(self):
+        """Return a queue of notification payloads, or None when streams are full or off."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscriber = queue.SimpleQueue()
+            self._subscribers.add(subscriber)
+        self._ensure_thread()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _publish(self, payload):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(payload)
+
+    def _ensure_thread(self):
+        # Threads do not survive gunicorn's fork, so (re)start per worker pid.
+        if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='staff-notify-listener', daemon=True)
+            self._thread.start()
+
+    def _connect(self):
+        from app.extensions import db
+
+        with self.app.app_context():
+            engine = db.engine
+            cargs, cparams = engine.dialect.create_connect_args(engine.url)
+            conn = engine.dialect.dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+    def _run(self):
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                backoff = 1
+                while True:
+                    if not select.select([conn], [], [], 30)[0]:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notice = conn.notifies.pop(0)
+                        try:
+                            self._publish(json.loads(notice.payload))
+                        except ValueError:
+                            logger.warning('Ignoring malformed staff notification payload')
+            except Exception as exc:
+                logger.warning('Staff notification listener failed (%s); reconnecting in %ss',
+                               exc.__class__.__name__, backoff)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+notification_hub = NotificationHub()
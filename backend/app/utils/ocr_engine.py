@@ -3,6 +3,10 @@
 Extracts structured fields from uploaded document images. For PDFs, the engine
 tries plain-text extraction first and then falls back to rasterizing the first
 page for AI vision OCR when a vision model is configured.
+
+Uploads run extraction as an ``ocr_extraction`` background job: the
+``OcrExtraction`` row stays in ``processing`` until the job stores the fields
+and moves it to ``pending`` review.
 """
 
 import base64
@@ -11,6 +15,8 @@ import logging
 import os
 import tempfile
 
+from app.utils.jobs import job_handler
+
 logger = logging.getLogger(__name__)
 
 MIME_TYPES = {
@@ -248,3 +254,55 @@ def _empty_fields(document_type):
         },
     }
     return templates.get(document_type, templates['general'])
+
+
+OCR_JOB_KIND = 'ocr_extraction'
+
+
+def ocr_job_key(extraction_id):
+    return f'ocr:{extraction_id}'
+
+
+def finish_ocr_extraction(extraction, result):
+    """Store an extraction result on its row and hand it over for review."""
+    success = bool(result.get('success'))
+    extraction.raw_ocr_text = result.get('raw_text')
+    extraction.extracted_fields_json = json.dumps(result.get('fields') or _empty_fields(extraction.document_type))
+    extraction.used_ai = success
+    extraction.fallback_reason = None if success else 'provider_unavailable'
+    extraction.status = 'pending'
+
+
+@job_handler(OCR_JOB_KIND)
+def run_ocr_extraction_job(payload):
+    """Background job: run AI OCR on an uploaded document."""
+    from app.extensions import db
+    from app.models.ai import OcrExtraction
+
+    extraction = db.session.get(OcrExtraction, payload['extraction_id'])
+    if extraction is None:
+        return {'success': False, 'error': 'extraction_missing'}
+    if extraction.status != 'processing':
+        return {'success': extraction.used_ai}
+
+    extraction_id, file_type, document_type = extraction.id, extraction.file_type, extraction.document_type
+    # Hand the connection back to the pool while the provider call runs.
+    db.session.remove()
+
+    try:
+        if file_type == 'pdf':
+            result = extract_from_pdf(payload['path'], document_type)
+        else:
+            result = extract_from_image(payload['path'], document_type)
+    except Exception as exc:
+        logger.warning('OCR job for extraction %s failed: %s', extraction_id, exc.__class__.__name__)
+        result = {'success': False, 'error': 'OCR extraction failed. Please enter the fields manually.'}
+
+    extraction = db.session.get(OcrExtraction, extraction_id)
+    if extraction is None:
+        return {'success': False, 'error': 'extraction_missing'}
+    if extraction.status != 'processing':
+        return {'success': extraction.used_ai}
+    finish_ocr_extraction(extraction, result)
+    db.session.commit()
+    return {'success': bool(result.get('success')), 'error': result.get('error')}
@@ -0,0 +1,107 @@
+"""Whole-response cache for the anonymous storefront pages.
+
+The public homepage and shop are the same for every visitor, so each worker
+keeps the rendered HTML keyed by path (the views ignore the query string,
+so ``?utm_source=...`` links share one entry), tagged with a content-hash
+ETag. At most ``STOREFRONT_CACHE_MAX_ENTRIES`` pages are kept; the least
+recently used one is evicted first. Repeat visitors sending ``If-None-Match`` get a bodyless
+304, and everyone else is served from memory without touching PostgreSQL.
+
+Managers' publish, image and settings changes call
+``invalidate_public_pages()`` so this worker re-renders immediately; other
+workers, and changes that happen elsewhere such as stock movements, show up
+within ``STOREFRONT_CACHE_SECONDS``.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+_page_cache = OrderedDict()
+_page_lock = threading.Lock()
+_generation = [0]
+
+
+def _cache_ttl_seconds():
+    return current_app.config.get('STOREFRONT_CACHE_SECONDS', 120)
+
+
+def _cache_max_entries():
+    return max(current_app.config.get('STOREFRONT_CACHE_MAX_ENTRIES', 32), 1)
+
+
+def _cache_control():
+    max_age = current_app.config.get('STOREFRONT_BROWSER_MAX_AGE', 30)
+    return f'public, max-age={max_age}'
+
+
+def invalidate_public_pages():
+    """Drop every cached storefront page on this worker."""
+    with _page_lock:
+        _generation[0] += 1
+        _page_cache.clear()
+
+
+def _respond(entry):
+    etag, body, mimetype = entry['etag'], entry['body'], entry['mimetype']
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = make_response(body)
+        response.mimetype = mimetype
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = _cache_control()
+    response.headers['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def cached_public_page(view):
+    """Cache a public GET view's 200 response per path."""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        ttl = _cache_ttl_seconds()
+        if request.method != 'GET' or ttl <= 0:
+            return view(*args, **kwargs)
+
+        key = request.path
+        now = time.monotonic()
+        with _page_lock:
+            entry = _page_cache.get(key)
+            if entry is not None and entry['generation'] == _generation[0] and now - entry['stored_at'] < ttl:
+                _page_cache.move_to_end(key)
+            else:
+                entry = None
+        if entry is not None:
+            return _respond(entry)
+
+        generation = _generation[0]
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.direct_passthrough:
+            return response
+
+        body = response.get_data()
+        entry = {
+            'etag': hashlib.sha1(body).hexdigest(),
+            'body': body,
+            'mimetype': response.mimetype,
+            'stored_at': now,
+            'generation': generation,
+        }
+        with _page_lock:
+            # Skip storing a page rendered from data that was invalidated mid-render.
+            if generation == _generation[0]:
+                _page_cache[key] = entry
+                _page_cache.move_to_end(key)
+                while len(_page_cache) > _cache_max_entries():
+                    _page_cache.popitem(last=False)
+
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = _cache_control()
+        response.headers['X-Page-Cache'] = 'MISS'
+        return response.make_conditional(request)
+
+    return decorated_function
@@ -0,0 +1,101 @@
+"""Keyset (cursor) pagination for long listings.
+
+OFFSET pagination makes PostgreSQL walk and discard every earlier row, so
+deep pages get slower as tables grow. These helpers order by a unique key
+such as ``(issue_date, id)`` and continue after the last row shown with
+``WHERE (issue_date, id) < (:issue_date, :id)``, which an index on the same
+columns answers in the same time however far down the list the page is.
+
+Cursors are opaque URL-safe strings holding the last row's key values.
+Listings render the first page as HTML and hand out ``next_cursor``; the
+"Load more" control fetches the following pages with ``format=json``.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from flask import jsonify, render_template, request, url_for
+from sqlalchemy import literal, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Return the key values in ``cursor`` typed for ``columns``, or None if it is missing or invalid."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            return None
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                decoded.append(date.fromisoformat(value))
+            else:
+                decoded.append(python_type(value))
+        return decoded
+    except (ValueError, TypeError, binascii.Error, NotImplementedError):
+        return None
+
+
+def page_size_arg(default=DEFAULT_PAGE_SIZE):
+    size = request.args.get('limit', default, type=int) or default
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def wants_json():
+    return request.args.get('format') == 'json'
+
+
+def keyset_page(query, columns, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=True):
+    """Return ``(rows, next_cursor)`` for one page of ``query`` ordered by ``columns``.
+
+    ``columns`` must end with a unique column (normally the primary key) and
+    contain no NULLs. ``next_cursor`` is None on the last page.
+    """
+    values = decode_cursor(cursor, columns)
+    if values is not None:
+        key = tuple_(*columns)
+        bound = tuple_(*[literal(value, column.type) for column, value in zip(columns, values)])
+        query = query.filter(key < bound if descending else key > bound)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows, next_cursor
+
+
+def next_page_url(next_cursor, filters):
+    """URL of the page after ``next_cursor`` on the current listing, keeping its filters."""
+    if not next_cursor:
+        return None
+    args = {key: value for key, value in filters.items() if value}
+    if request.args.get('limit'):
+        args['limit'] = page_size_arg()
+    return url_for(request.endpoint, cursor=next_cursor, **args)
+
+
+def keyset_json(rows_template, rows, next_cursor, filters, serialize, **context):
+    """JSON page for "Load more": the rows as data and as rendered table rows."""
+    return jsonify({
+        'items': [serialize(row) for row in rows],
+        'html': render_template(rows_template, **context),
+        'next_cursor': next_cursor,
+        'next_url': next_page_url(next_cursor, filters),
+    })
@@ -0,0 +1,194 @@
+"""Portfolio-at-risk (PAR) aging for individual and group loans.
+
+PARn is the outstanding balance of loans with an installment at least n days
+late, as a share of the whole outstanding portfolio. Balances are principal
+plus interest, the same figure the dashboard reports as loans outstanding.
+
+Lateness comes from ``loan_installments``: a running ``SUM(amount_due) OVER
+(PARTITION BY loan ORDER BY installment_no)`` is compared with what the loan
+had paid by the report date, so the first installment the payments do not
+cover gives the days in arrears. Because payments are counted up to the
+report date, the same query can rebuild earlier dates (against today's
+schedules and loan terms).
+
+``record_portfolio_snapshots`` stores one ``portfolio_snapshots`` row per
+loan type per day; trend views read those rows instead of recomputing
+history from the payment tables.
+"""
+
+from dataclasses import dataclass, fields
+from datetime import timedelta
+from decimal import Decimal
+
+from sqlalchemy import and_, case, cast, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.extensions import db
+from app.models.finance import GroupLoan, GroupLoanPayment, Loan, LoanInstallment, LoanPayment, PortfolioSnapshot
+from app.utils.timezone import get_local_now, get_local_today
+
+PAR_THRESHOLDS = (1, 7, 30, 90)
+LOAN_TYPES = ('individual', 'group')
+TREND_RANGES = (30, 90, 180, 365)
+
+
+@dataclass
+class PortfolioRisk:
+    """PAR figures for one loan type (or both combined) on one date."""
+    loan_count: int = 0
+    outstanding: Decimal = Decimal('0')
+    arrears_amount: Decimal = Decimal('0')
+    par1_amount: Decimal = Decimal('0')
+    par1_count: int = 0
+    par7_amount: Decimal = Decimal('0')
+    par7_count: int = 0
+    par30_amount: Decimal = Decimal('0')
+    par30_count: int = 0
+    par90_amount: Decimal = Decimal('0')
+    par90_count: int = 0
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(**{item.name: getattr(row, item.name) for item in fields(cls)})
+
+    def __add__(self, other):
+        return PortfolioRisk(**{item.name: getattr(self, item.name) + getattr(other, item.name)
+                                for item in fields(self)})
+
+    def par_ratio(self, days):
+        """PAR<days> as a percentage of the outstanding portfolio."""
+        if not self.outstanding:
+            return 0.0
+        return float(getattr(self, f'par{days}_amount')) * 100 / float(self.outstanding)
+
+    @property
+    def aging_buckets(self):
+        """Loans and balances by days late: current, 1-6, 7-29, 30-89 and 90+."""
+        buckets = []
+        bounds = (0,) + PAR_THRESHOLDS
+        for index, low in enumerate(bounds):
+            count = self.loan_count if low == 0 else getattr(self, f'par{low}_count')
+            amount = self.outstanding if low == 0 else getattr(self, f'par{low}_amount')
+            if index + 1 < len(bounds):
+                high = bounds[index + 1]
+                count -= getattr(self, f'par{high}_count')
+                amount -= getattr(self, f'par{high}_amount')
+                label = 'Current' if low == 0 else f'{low}-{high - 1} days'
+            else:
+                label = f'{low}+ days'
+            share = float(amount) * 100 / float(self.outstanding) if self.outstanding else 0.0
+            buckets.append({'label': label, 'count': count, 'amount': amount, 'share': share})
+        return buckets
+
+
+def _loan_sources():
+    return {
+        'individual': (Loan, LoanPayment, LoanPayment.loan_id, LoanInstallment.loan_id, Loan.issue_date),
+        'group': (GroupLoan, GroupLoanPayment, GroupLoanPayment.group_loan_id, LoanInstallment.group_loan_id,
+                  func.coalesce(GroupLoan.issue_date, cast(GroupLoan.created_at, db.Date))),
+    }
+
+
+def _arrears_by_loan(loan_type, as_of_date):
+    """Per-loan ``(outstanding, arrears, oldest_overdue)`` as of the end of ``as_of_date``."""
+    model, payment_model, payment_loan_id, installment_loan_id, issued_on = _loan_sources()[loan_type]
+
+    # amount_paid also covers older payments that have no payment rows
+    paid_later = db.session.query(func.coalesce(func.sum(payment_model.amount), 0)).filter(
+        payment_loan_id == model.id,
+        payment_model.is_deleted == False,
+        payment_model.payment_date > as_of_date,
+    ).correlate(model).scalar_subquery()
+    paid = (func.coalesce(model.amount_paid, 0) - paid_later).label('paid')
+    loans = db.session.query(
+        model.id.label('loan_id'),
+        paid,
+        func.greatest(func.coalesce(model.total_amount, 0) - paid, 0).label('outstanding'),
+    ).filter(model.is_deleted == False, issued_on <= as_of_date).subquery()
+
+    cumulative_due = func.sum(LoanInstallment.amount_due).over(
+        partition_by=installment_loan_id, order_by=LoanInstallment.installment_no
+    )
+    schedule = db.session.query(
+        installment_loan_id.label('loan_id'),
+        LoanInstallment.due_date,
+        # Payments settle installments oldest first: what is left of this one
+        func.least(LoanInstallment.amount_due, func.greatest(cumulative_due - loans.c.paid, 0)).label('unpaid'),
+    ).join(loans, installment_loan_id == loans.c.loan_id).subquery()
+
+    overdue = and_(schedule.c.unpaid > 0, schedule.c.due_date < as_of_date)
+    late = db.session.query(
+        schedule.c.loan_id,
+        func.sum(case((overdue, schedule.c.unpaid), else_=0)).label('arrears'),
+        func.min(case((overdue, schedule.c.due_date))).label('oldest_overdue'),
+    ).group_by(schedule.c.loan_id).subquery()
+
+    return db.session.query(
+        loans.c.loan_id,
+        loans.c.outstanding,
+        func.coalesce(late.c.arrears, 0).label('arrears'),
+        late.c.oldest_overdue,
+    ).outerjoin(late, late.c.loan_id == loans.c.loan_id).filter(loans.c.outstanding > 0).subquery()
+
+
+def compute_portfolio_risk(as_of_date=None):
+    """Return ``{loan_type: PortfolioRisk}`` for ``as_of_date``; one query per loan type."""
+    as_of_date = as_of_date or get_local_today()
+    results = {}
+    for loan_type in LOAN_TYPES:
+        loans = _arrears_by_loan(loan_type, as_of_date)
+        columns = [
+            func.count().label('loan_count'),
+            func.coalesce(func.sum(loans.c.outstanding), 0).label('outstanding'),
+            func.coalesce(func.sum(loans.c.arrears), 0).label('arrears_amount'),
+        ]
+        for days in PAR_THRESHOLDS:
+            at_risk = loans.c.oldest_overdue <= as_of_date - timedelta(days=days)
+            columns.append(func.coalesce(func.sum(case((at_risk, loans.c.outstanding), else_=0)), 0)
+                           .label(f'par{days}_amount'))
+            columns.append(func.count(case((at_risk, literal(1)))).label(f'par{days}_count'))
+        results[loan_type] = PortfolioRisk.from_row(db.session.query(*columns).one())
+    return results
+
+
+def record_portfolio_snapshots(as_of_date=None):
+    """Compute and upsert the snapshot rows for ``as_of_date``, then commit.
+
+    Re-running for the same date replaces its rows, so the latest run of the
+    day wins. Returns the ``{loan_type: PortfolioRisk}`` that was stored.
+    """
+    as_of_date = as_of_date or get_local_today()
+    results = compute_portfolio_risk(as_of_date)
+    table = PortfolioSnapshot.__table__
+    now = get_local_now()
+    for loan_type, risk in results.items():
+        values = {item.name: getattr(risk, item.name) for item in fields(risk)}
+        stmt = pg_insert(table).values(snapshot_date=as_of_date, loan_type=loan_type, created_at=now, **values)
+        stmt = stmt.on_conflict_do_update(
+            constraint='uq_portfolio_snapshot_date_type',
+            set_={**{name: stmt.excluded[name] for name in values}, 'created_at': stmt.excluded.created_at},
+        )
+        db.session.execute(stmt)
+    db.session.commit()
+    return results
+
+
+def snapshot_trend(days=90, today=None):
+    """Stored snapshots for the last ``days`` days, newest first.
+
+    Returns ``[(snapshot_date, {loan_type: PortfolioRisk, 'all': PortfolioRisk})]``.
+    Days without a snapshot are simply absent.
+    """
+    today = today or get_local_today()
+    rows = PortfolioSnapshot.query.filter(
+        PortfolioSnapshot.snapshot_date > today - timedelta(days=days),
+        PortfolioSnapshot.snapshot_date <= today,
+    ).order_by(PortfolioSnapshot.snapshot_date.desc(), PortfolioSnapshot.loan_type).all()
+
+    trend = {}
+    for row in rows:
+        by_type = trend.setdefault(row.snapshot_date, {'all': PortfolioRisk()})
+        risk = PortfolioRisk.from_row(row)
+        by_type[row.loan_type] = risk
+        by_type['all'] = by_type['all'] + risk
+    return list(trend.items())
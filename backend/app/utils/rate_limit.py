@@ -1,10 +1,179 @@
+"""Request throttling for login and public form endpoints.
+
+Three interchangeable backends sit behind ``consume_limit``/``clear_limit``,
+selected with ``RATE_LIMIT_BACKEND``:
+
+- ``memory``:   token buckets in a dict, private to each worker process.
+- ``sqlite``:   token buckets in a local SQLite file shared by every worker on
+                the host (default; survives worker restarts, no network hop).
+- ``database``: the original fixed-window counter in ``rate_limit_states``,
+                kept as the durable fallback when limits must survive deploys.
+
+Every backend fails open: a storage error never locks users out. When the
+SQLite file fails, requests use a per-worker memory fallback for
+``SQLiteRateLimitBackend.RETRY_AFTER_SECONDS`` and then try SQLite again.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
 
+from flask import current_app
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.extensions import db
 from app.utils.timezone import EAT_TIMEZONE, get_local_now
 
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKENDS = ('memory', 'sqlite', 'database')
+_BACKEND_EXTENSION_KEY = 'rate_limit_backend'
+_FALLBACK_EXTENSION_KEY = 'rate_limit_fallback'
+_backend_lock = threading.Lock()
+
+
+def _take_token(tokens, updated_at, blocked_until, limit, window_seconds, block_seconds, now):
+    """Token-bucket step shared by the memory and SQLite backends.
+
+    The bucket holds ``limit`` tokens and refills at ``limit / window_seconds``
+    per second, so a client can burst ``limit`` requests and then sustain the
+    same average rate as the old fixed window. Running dry blocks the client
+    for ``block_seconds``. Returns ``(tokens, updated_at, blocked_until,
+    allowed, retry_after)``.
+    """
+    if blocked_until and blocked_until > now:
+        return tokens, updated_at, blocked_until, False, max(int(blocked_until - now), 1)
+
+    if updated_at is None:
+        tokens = float(limit)
+    else:
+        refill = (now - updated_at) * (float(limit) / window_seconds)
+        tokens = min(float(limit), tokens + refill)
+
+    if tokens >= 1:
+        return tokens - 1, now, 0.0, True, 0
+
+    return tokens, now, now + block_seconds, False, int(block_seconds)
+
+
+class MemoryRateLimitBackend:
+    """Per-process token buckets guarded by a lock.
+
+    At most ``max_keys`` buckets are kept; the least recently hit one is
+    evicted first, so a flood of new keys costs O(1) per request.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window_seconds, block_seconds):
+        now = time.time()
+        with self._lock:
+            tokens, updated_at, blocked_until = self._buckets.get(key, (0.0, None, 0.0))
+            tokens, updated_at, blocked_until, allowed, retry_after = _take_token(
+                tokens, updated_at, blocked_until, limit, window_seconds, block_seconds, now
+            )
+            self._buckets[key] = (tokens, updated_at, blocked_until)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def clear(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class SQLiteRateLimitBackend:
+    """Token buckets in a local SQLite file shared across gunicorn workers.
+
+    A host-local stand-in for Redis: the Render service runs a single
+    instance, so a WAL-mode file on local disk gives every worker the same
+    view without adding a network dependency.
+    """
+
+    name = 'sqlite'
+    PRUNE_EVERY = 1000
+    PRUNE_AFTER_SECONDS = 86400
+    RETRY_AFTER_SECONDS = 30
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        self.unavailable_until = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit_buckets ('
+            ' key TEXT PRIMARY KEY,'
+            ' tokens REAL NOT NULL,'
+            ' updated_at REAL NOT NULL,'
+            ' blocked_until REAL NOT NULL DEFAULT 0)'
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def mark_failed(self):
+        """Skip this backend for a while and reconnect on the next attempt."""
+        self.unavailable_until = time.time() + self.RETRY_AFTER_SECONDS
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def hit(self, key, limit, window_seconds, block_seconds):
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated_at, blocked_until FROM rate_limit_buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated_at, blocked_until = row if row else (0.0, None, 0.0)
+            tokens, updated_at, blocked_until, allowed, retry_after = _take_token(
+                tokens, updated_at, blocked_until, limit, window_seconds, block_seconds, now
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at, blocked_until) '
+                'VALUES (?, ?, ?, ?)',
+                (key, tokens, updated_at, blocked_until),
+            )
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                conn.execute(
+                    'DELETE FROM rate_limit_buckets WHERE updated_at < ? AND blocked_until < ?',
+                    (now - self.PRUNE_AFTER_SECONDS, now),
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+    def clear(self, key):
+        self._connection().execute('DELETE FROM rate_limit_buckets WHERE key = ?', (key,))
+
 
 def _normalize_timestamp(value):
     if value is None:
@@ -14,65 +183,156 @@ def _normalize_timestamp(value):
     return value.astimezone(EAT_TIMEZONE)
 
 
-def consume_limit(scope, identifier, limit, window_seconds, block_seconds=None):
-    from app.models.user import RateLimitState
+def _storage_timestamp(value):
+    """Naive EAT wall-clock time for the timezone-less DateTime columns.
 
-    if not identifier:
-        return True, 0
+    Writing an aware value lets PostgreSQL shift it into the session timezone
+    (UTC on Render), which _normalize_timestamp would then misread as EAT and
+    reset the window on every request.
+    """
+    if value is None:
+        return None
+    return _normalize_timestamp(value).replace(tzinfo=None)
 
-    now = get_local_now()
-    block_seconds = block_seconds or window_seconds
 
-    try:
-        state = RateLimitState.query.filter_by(scope=scope, identifier=identifier).first()
-        if not state:
-            state = RateLimitState(
-                scope=scope,
-                identifier=identifier,
-                request_count=0,
-                window_started_at=now,
-            )
-            db.session.add(state)
-            db.session.flush()
+class DatabaseRateLimitBackend:
+    """Fixed-window counters persisted in the ``rate_limit_states`` table."""
+
+    name = 'database'
+
+    def hit(self, key, limit, window_seconds, block_seconds):
+        from app.models.user import RateLimitState
+
+        scope, identifier = key
+        now = get_local_now()
 
-        state.window_started_at = _normalize_timestamp(state.window_started_at)
-        state.blocked_until = _normalize_timestamp(state.blocked_until)
+        try:
+            state = RateLimitState.query.filter_by(scope=scope, identifier=identifier).first()
+            if not state:
+                state = RateLimitState(
+                    scope=scope,
+                    identifier=identifier,
+                    request_count=0,
+                    window_started_at=_storage_timestamp(now),
+                )
+                db.session.add(state)
+                db.session.flush()
 
-        if state.blocked_until and state.blocked_until > now:
-            retry_after = max(int((state.blocked_until - now).total_seconds()), 1)
-            return False, retry_after
+            window_started_at = _normalize_timestamp(state.window_started_at)
+            blocked_until = _normalize_timestamp(state.blocked_until)
 
-        if not state.window_started_at or (now - state.window_started_at).total_seconds() > window_seconds:
-            state.window_started_at = now
-            state.request_count = 0
-            state.blocked_until = None
+            if blocked_until and blocked_until > now:
+                retry_after = max(int((blocked_until - now).total_seconds()), 1)
+                db.session.rollback()
+                return False, retry_after
 
-        state.request_count = (state.request_count or 0) + 1
-        state.updated_at = now
+            if not window_started_at or (now - window_started_at).total_seconds() > window_seconds:
+                state.window_started_at = _storage_timestamp(now)
+                state.request_count = 0
+                state.blocked_until = None
+
+            state.request_count = (state.request_count or 0) + 1
+            state.updated_at = _storage_timestamp(now)
+
+            if state.request_count > limit:
+                state.blocked_until = _storage_timestamp(now + timedelta(seconds=block_seconds))
+                db.session.commit()
+                return False, block_seconds
 
-        if state.request_count > limit:
-            state.blocked_until = now + timedelta(seconds=block_seconds)
             db.session.commit()
-            return False, block_seconds
+            return True, 0
+        except SQLAlchemyError:
+            db.session.rollback()
+            return True, 0
 
-        db.session.commit()
-        return True, 0
-    except SQLAlchemyError:
-        db.session.rollback()
+    def clear(self, key):
+        from app.models.user import RateLimitState
+
+        scope, identifier = key
+        try:
+            state = RateLimitState.query.filter_by(scope=scope, identifier=identifier).first()
+            if not state:
+                return
+            db.session.delete(state)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+
+
+def create_backend(name, sqlite_path=None):
+    """Build a limiter backend by name; unknown names fall back to memory."""
+    if name == 'database':
+        return DatabaseRateLimitBackend()
+    if name == 'sqlite':
+        try:
+            return SQLiteRateLimitBackend(sqlite_path)
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning('SQLite rate limiter unavailable at %s (%s); using memory', sqlite_path, exc)
+    elif name != 'memory':
+        logger.warning('Unknown RATE_LIMIT_BACKEND %r; using memory', name)
+    return MemoryRateLimitBackend()
+
+
+def get_backend():
+    """Return the backend for the current request, creating it once per app.
+
+    While a failed SQLite backend is cooling down, this is the memory fallback.
+    """
+    backend = current_app.extensions.get(_BACKEND_EXTENSION_KEY)
+    if backend is None:
+        with _backend_lock:
+            backend = current_app.extensions.get(_BACKEND_EXTENSION_KEY)
+            if backend is None:
+                backend = create_backend(
+                    current_app.config.get('RATE_LIMIT_BACKEND', 'sqlite'),
+                    current_app.config.get('RATE_LIMIT_SQLITE_PATH'),
+                )
+                current_app.extensions[_BACKEND_EXTENSION_KEY] = backend
+    if getattr(backend, 'unavailable_until', 0) > time.time():
+        return _memory_fallback()
+    return backend
+
+
+def _memory_fallback():
+    fallback = current_app.extensions.get(_FALLBACK_EXTENSION_KEY)
+    if fallback is None:
+        with _backend_lock:
+            fallback = current_app.extensions.setdefault(_FALLBACK_EXTENSION_KEY, MemoryRateLimitBackend())
+    return fallback
+
+
+def _backend_key(backend, scope, identifier):
+    if backend.name == 'database':
+        return scope, identifier
+    return f'{scope}:{identifier}'
+
+
+def _fallback_to_memory(backend, exc):
+    logger.warning('%s rate limiter failed (%s); using memory for %ss', backend.name, exc,
+                   backend.RETRY_AFTER_SECONDS)
+    backend.mark_failed()
+    return _memory_fallback()
+
+
+def consume_limit(scope, identifier, limit, window_seconds, block_seconds=None):
+    if not identifier:
         return True, 0
 
+    block_seconds = block_seconds or window_seconds
+    backend = get_backend()
+    try:
+        return backend.hit(_backend_key(backend, scope, identifier), limit, window_seconds, block_seconds)
+    except sqlite3.Error as exc:
+        backend = _fallback_to_memory(backend, exc)
+        return backend.hit(_backend_key(backend, scope, identifier), limit, window_seconds, block_seconds)
 
-def clear_limit(scope, identifier):
-    from app.models.user import RateLimitState
 
+def clear_limit(scope, identifier):
     if not identifier:
         return
 
+    backend = get_backend()
     try:
-        state = RateLimitState.query.filter_by(scope=scope, identifier=identifier).first()
-        if not state:
-            return
-        db.session.delete(state)
-        db.session.commit()
-    except SQLAlchemyError:
-        db.session.rollback()
+        backend.clear(_backend_key(backend, scope, identifier))
+    except sqlite3.Error as exc:
+        _fallback_to_memory(backend, exc)
@@ -1,15 +1,72 @@
 """Utility functions for the application."""
+import os
+import threading
+from collections import deque
 from datetime import date
 
+from flask import current_app
+from sqlalchemy import text
+
+from app.extensions import db
+
 
 def format_currency(amount):
     """Format amount as currency string."""
     return f"UGX {amount:,.0f}"
 
 
+# One PostgreSQL sequence per reference prefix; see migration e8a1c3d5f7b9.
+REFERENCE_SEQUENCES = {
+    'DNV-B-': 'boutique_sale_ref_seq',
+    'DNV-HR-': 'boutique_hire_ref_seq',
+    'DNV-H-': 'hardware_sale_ref_seq',
+}
+
+_reference_blocks = {}
+_reference_lock = threading.Lock()
+_reference_pid = None
+
+
+def _reference_block_size():
+    try:
+        return max(int(current_app.config.get('REFERENCE_BLOCK_SIZE', 1)), 1)
+    except (RuntimeError, TypeError, ValueError):
+        return 1
+
+
+def _next_sequence_value(sequence_name):
+    """Return the next value for ``sequence_name``.
+
+    With REFERENCE_BLOCK_SIZE > 1 each worker fetches a block of values in
+    one round-trip and hands them out locally; numbers stay unique but may
+    interleave between workers and leave gaps on restart.
+    """
+    global _reference_pid
+
+    block_size = _reference_block_size()
+    if block_size == 1:
+        return db.session.execute(text('SELECT nextval(:name)'), {'name': sequence_name}).scalar()
+
+    with _reference_lock:
+        if _reference_pid != os.getpid():
+            _reference_blocks.clear()
+            _reference_pid = os.getpid()
+        block = _reference_blocks.setdefault(sequence_name, deque())
+        if not block:
+            block.extend(db.session.execute(
+                text('SELECT nextval(:name) FROM generate_series(1, :count)'),
+                {'name': sequence_name, 'count': block_size},
+            ).scalars())
+        return block.popleft()
+
+
 def generate_reference_number(prefix, model_class):
     """Generate a unique reference number for a model.
 
+    Known prefixes draw from a PostgreSQL sequence, so concurrent requests
+    never receive the same number and no table scan is needed. Unknown
+    prefixes fall back to incrementing the latest matching record.
+
     Args:
         prefix: The prefix for the reference number (e.g., 'DNV-B-')
         model_class: The SQLAlchemy model class to query
@@ -17,6 +74,10 @@ def generate_reference_number(prefix, model_class):
     Returns:
         A unique reference number string
     """
+    sequence_name = REFERENCE_SEQUENCES.get(prefix)
+    if sequence_name:
+        return f"{prefix}{_next_sequence_value(sequence_name):05d}"
+
     last_record = model_class.query.filter(
         model_class.reference_number.like(f'{prefix}%')
     ).order_by(model_class.id.desc()).first()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""Flood benchmark for the rate limiter backends.
+
+Usage:
+    python bench_rate_limit.py                      # memory + sqlite
+    python bench_rate_limit.py --backends memory sqlite database
+    python bench_rate_limit.py --threads 8 --requests 20000 --clients 200
+
+Each worker thread hammers ``consume_limit`` the way a flood against
+/api/order-request would (5 requests per 15 minutes per IP), spread over
+``--clients`` distinct IPs, and the script reports requests/second and how
+many were let through. The ``database`` backend needs a working DATABASE_URL
+(run ``flask db upgrade`` first); the others never touch PostgreSQL.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Ensure the backend directory is on sys.path so `app` can be imported.
+BACKEND_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.chdir(BACKEND_DIR)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+from app.utils.rate_limit import RATE_LIMIT_BACKENDS, clear_limit, consume_limit, create_backend
+
+
+def run_flood(app, backend_name, threads, requests_per_thread, clients):
+    scope = f'bench_{backend_name}_{os.getpid()}'
+    sqlite_path = os.path.join(tempfile.gettempdir(), f'denove_rate_limit_bench_{os.getpid()}.sqlite3')
+    with app.app_context():
+        app.extensions['rate_limit_backend'] = create_backend(backend_name, sqlite_path)
+
+    allowed_total = [0]
+    counter_lock = threading.Lock()
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker(worker_id):
+        allowed = 0
+        with app.app_context():
+            start_barrier.wait()
+            for n in range(requests_per_thread):
+                ok, _retry_after = consume_limit(scope, f'10.0.{worker_id}.{n % clients}', 5, 900, 1800)
+                allowed += int(ok)
+        with counter_lock:
+            allowed_total[0] += allowed
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        for worker_id in range(threads):
+            for n in range(clients):
+                clear_limit(scope, f'10.0.{worker_id}.{n}')
+        app.extensions.pop('rate_limit_backend', None)
+    if os.path.exists(sqlite_path):
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(sqlite_path + suffix)
+            except OSError:
+                pass
+
+    total = threads * requests_per_thread
+    return total, allowed_total[0], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', choices=RATE_LIMIT_BACKENDS, default=['memory', 'sqlite'])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=5000, help='requests per thread')
+    parser.add_argument('--clients', type=int, default=50, help='distinct client IPs per thread')
+    args = parser.parse_args()
+
+    app = create_app()
+    print(f'{args.threads} threads x {args.requests} requests, {args.clients} IPs per thread\n')
+    print(f'{"backend":<10} {"requests":>9} {"allowed":>8} {"seconds":>8} {"req/s":>10}')
+    for name in args.backends:
+        total, allowed, elapsed = run_flood(app, name, args.threads, args.requests, args.clients)
+        print(f'{name:<10} {total:>9} {allowed:>8} {elapsed:>8.2f} {total / elapsed:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
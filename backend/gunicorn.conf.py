@@ -16,3 +16,10 @@ accesslog = '-'
 errorlog = '-'
 capture_output = True
 loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def worker_exit(server, worker):
+    """Flush buffered audit rows before the worker process goes away."""
+    from app.extensions import audit_writer
+
+    audit_writer.shutdown()
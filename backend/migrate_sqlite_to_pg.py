@@ -62,6 +62,13 @@ PREFERRED_TABLE_ORDER = [
     'rate_limit_states',
 ]
 
+# (sequence, table, reference prefix), as created by migration e8a1c3d5f7b9
+REFERENCE_SEQUENCES = [
+    ('boutique_sale_ref_seq', 'boutique_sales', 'DNV-B-'),
+    ('boutique_hire_ref_seq', 'boutique_hires', 'DNV-HR-'),
+    ('hardware_sale_ref_seq', 'hardware_sales', 'DNV-H-'),
+]
+
 
 def order_tables(table_names):
     preferred = [table for table in PREFERRED_TABLE_ORDER if table in table_names]
@@ -163,6 +170,31 @@ def migrate(sqlite_path):
 
         conn_lite.close()
 
+        # Imported sales and hires keep their reference numbers; continue the
+        # reference sequences after them (same query as migration e8a1c3d5f7b9).
+        for sequence, table, prefix in REFERENCE_SEQUENCES:
+            if table not in pg_tables:
+                continue
+            last = db.session.execute(text(
+                f"SELECT setval('{sequence}', COALESCE(MAX(CAST(substring(reference_number FROM '([0-9]+)$') AS BIGINT)), 1), "
+                f"MAX(reference_number) IS NOT NULL) "
+                f"FROM {table} WHERE reference_number LIKE :pattern"
+            ), {'pattern': f'{prefix}%'}).scalar()
+            db.session.commit()
+            print(f'  SEQ   {sequence:40s} (continues after {last})')
+
+        # Migration b6d8f0a2c4e5 derived order lines and totals from the JSON
+        # cart, but ran before these orders were copied in. Derive them now for
+        # imported orders that have no lines, so section filters can see them.
+        if {'website_order_requests', 'website_order_items'} <= pg_tables:
+            from app.models.website import WebsiteOrderRequest
+
+            orders = WebsiteOrderRequest.query.filter(~WebsiteOrderRequest.line_items.any()).all()
+            for order in orders:
+                order.set_items(order.items)
+            db.session.commit()
+            print(f'  LINES {"website_order_items":40s} ({len(orders)} orders backfilled)')
+
         print('')
         print(f'Done. {migrated} tables migrated, '
               f'{skipped_nonempty} skipped (already have data), '
@@ -0,0 +1,38 @@
+"""add ai narration cache table
+
+Revision ID: a3c5e7f9b1d4
+Revises: f2b4d6a8c0e3
+Create Date: 2026-04-08 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f9b1d4'
+down_revision = 'f2b4d6a8c0e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ai_narration_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('intent', sa.String(length=50), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=True),
+        sa.Column('narrative', sa.Text(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('cache_key', name='uq_ai_narration_cache_key'),
+    )
+    op.create_index('ix_ai_narration_cache_last_used_at', 'ai_narration_cache', ['last_used_at'])
+
+
+def downgrade():
+    op.drop_index('ix_ai_narration_cache_last_used_at', table_name='ai_narration_cache')
+    op.drop_table('ai_narration_cache')
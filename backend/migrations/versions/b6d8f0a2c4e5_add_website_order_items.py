@@ -0,0 +1,103 @@
+"""add website order lines and derived order totals
+
+Revision ID: b6d8f0a2c4e5
+Revises: a3c5e7f9b1d4
+Create Date: 2026-04-09 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d8f0a2c4e5'
+down_revision = 'a3c5e7f9b1d4'
+branch_labels = None
+depends_on = None
+
+
+NUMBER = "'^-?[0-9]+(\\.[0-9]+)?$'"
+
+# Explode each order's JSON cart into website_order_items. Values that do not
+# parse fall back the same way WebsiteOrderRequest.set_items() does.
+BACKFILL_LINES = f"""
+INSERT INTO website_order_items
+    (order_id, line_no, product_type, product_id, name, quantity, unit_price, line_total)
+SELECT order_id, line_no, product_type, product_id, name, quantity, unit_price, quantity * unit_price
+FROM (
+    SELECT
+        o.id AS order_id,
+        e.line_no,
+        LEFT(COALESCE(NULLIF(e.item->>'product_type', ''), e.item->>'type'), 20) AS product_type,
+        CASE WHEN e.item->>'product_id' ~ '^[0-9]{{1,9}}$' THEN (e.item->>'product_id')::integer END AS product_id,
+        LEFT(COALESCE(e.item->>'name', ''), 200) AS name,
+        CASE WHEN e.item->>'quantity' ~ '^-?[0-9]{{1,9}}$' THEN (e.item->>'quantity')::integer
+             ELSE 1 END AS quantity,
+        CASE WHEN e.item->>'price' ~ {NUMBER} THEN ROUND((e.item->>'price')::numeric, 2)
+             ELSE 0 END AS unit_price
+    FROM website_order_requests o
+    CROSS JOIN LATERAL json_array_elements(
+        CASE WHEN json_typeof(o.items) = 'array' THEN o.items ELSE '[]'::json END
+    ) WITH ORDINALITY AS e(item, line_no)
+    WHERE json_typeof(e.item) = 'object'
+) AS lines
+"""
+
+BACKFILL_TOTALS = """
+UPDATE website_order_requests o
+SET total_amount = t.total_amount,
+    item_count = t.item_count,
+    product_types = t.product_types
+FROM (
+    SELECT
+        order_id,
+        SUM(line_total) AS total_amount,
+        SUM(quantity) AS item_count,
+        BIT_OR(CASE product_type WHEN 'boutique' THEN 1 WHEN 'hardware' THEN 2 ELSE 0 END) AS product_types
+    FROM website_order_items
+    GROUP BY order_id
+) AS t
+WHERE o.id = t.order_id
+"""
+
+
+def upgrade():
+    op.create_table(
+        'website_order_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('line_no', sa.Integer(), nullable=False),
+        sa.Column('product_type', sa.String(length=20), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Numeric(12, 2), nullable=False),
+        sa.Column('line_total', sa.Numeric(12, 2), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['website_order_requests.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_website_order_items_order_id', 'website_order_items', ['order_id'])
+
+    op.add_column('website_order_requests',
+                  sa.Column('total_amount', sa.Numeric(12, 2), nullable=False, server_default='0'))
+    op.add_column('website_order_requests',
+                  sa.Column('item_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('website_order_requests',
+                  sa.Column('product_types', sa.SmallInteger(), nullable=False, server_default='0'))
+
+    op.execute(BACKFILL_LINES)
+    op.execute(BACKFILL_TOTALS)
+
+    op.create_index(
+        'ix_website_order_requests_active_types', 'website_order_requests',
+        ['product_types', 'submitted_at'],
+        postgresql_where=sa.text('is_active = true'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_website_order_requests_active_types', table_name='website_order_requests')
+    op.drop_column('website_order_requests', 'product_types')
+    op.drop_column('website_order_requests', 'item_count')
+    op.drop_column('website_order_requests', 'total_amount')
+    op.drop_index('ix_website_order_items_order_id', table_name='website_order_items')
+    op.drop_table('website_order_items')
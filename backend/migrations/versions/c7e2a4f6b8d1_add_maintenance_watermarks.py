@@ -0,0 +1,31 @@
+"""add maintenance watermarks table
+
+Revision ID: c7e2a4f6b8d1
+Revises: b4d7e9f1a2c3
+Create Date: 2026-04-06 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a4f6b8d1'
+down_revision = 'b4d7e9f1a2c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'maintenance_watermarks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('as_of_date', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('name', name='uq_maintenance_watermark_name'),
+    )
+
+
+def downgrade():
+    op.drop_table('maintenance_watermarks')
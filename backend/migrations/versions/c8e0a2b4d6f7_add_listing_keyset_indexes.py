@@ -0,0 +1,41 @@
+"""add keyset pagination indexes for finance and customer listings
+
+Revision ID: c8e0a2b4d6f7
+Revises: b6d8f0a2c4e5
+Create Date: 2026-04-09 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e0a2b4d6f7'
+down_revision = 'b6d8f0a2c4e5'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns, partial index predicate) - each matches a
+# listing's ORDER BY so the next page starts with an index seek.
+INDEXES = [
+    ('ix_loans_live_issue_date_id', 'loans', ['issue_date', 'id'], 'is_deleted = false'),
+    ('ix_loan_clients_active_name_id', 'loan_clients', ['name', 'id'], 'is_active = true'),
+    ('ix_customers_name_id', 'customers', ['name', 'id'], None),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
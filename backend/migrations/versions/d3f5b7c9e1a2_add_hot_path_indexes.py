@@ -0,0 +1,62 @@
+"""add composite and partial indexes for hot filter columns
+
+Revision ID: d3f5b7c9e1a2
+Revises: c7e2a4f6b8d1
+Create Date: 2026-04-06 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f5b7c9e1a2'
+down_revision = 'c7e2a4f6b8d1'
+branch_labels = None
+depends_on = None
+
+
+LIVE = 'is_deleted = false'
+OPEN_CREDIT = "is_deleted = false AND payment_type = 'part' AND is_credit_cleared = false"
+LOW_STOCK = 'is_active = true AND quantity <= low_stock_threshold'
+
+# (index name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_boutique_stock_active_quantity', 'boutique_stock', ['quantity'], 'is_active = true'),
+    ('ix_boutique_stock_low_stock', 'boutique_stock', ['quantity'], LOW_STOCK),
+    ('ix_boutique_sales_live_sale_date', 'boutique_sales', ['sale_date', 'branch'], LIVE),
+    ('ix_boutique_sales_open_credit', 'boutique_sales', ['sale_date'], OPEN_CREDIT),
+    ('ix_boutique_sale_items_sale_id', 'boutique_sale_items', ['sale_id'], None),
+    ('ix_hardware_stock_active_quantity', 'hardware_stock', ['quantity'], 'is_active = true'),
+    ('ix_hardware_stock_low_stock', 'hardware_stock', ['quantity'], LOW_STOCK),
+    ('ix_hardware_sales_live_sale_date', 'hardware_sales', ['sale_date'], LIVE),
+    ('ix_hardware_sales_open_credit', 'hardware_sales', ['sale_date'], OPEN_CREDIT),
+    ('ix_hardware_sale_items_sale_id', 'hardware_sale_items', ['sale_id'], None),
+    ('ix_loans_live_status_balance', 'loans', ['status', 'balance'], LIVE),
+    ('ix_loans_client_id', 'loans', ['client_id'], None),
+    ('ix_loan_payments_live_payment_date', 'loan_payments', ['payment_date'], LIVE),
+    ('ix_loan_payments_loan_id', 'loan_payments', ['loan_id'], None),
+    ('ix_group_loans_live_status_balance', 'group_loans', ['status', 'balance'], LIVE),
+    ('ix_group_loan_payments_live_payment_date', 'group_loan_payments', ['payment_date'], LIVE),
+    ('ix_group_loan_payments_group_loan_id', 'group_loan_payments', ['group_loan_id'], None),
+    ('ix_audit_logs_created_at', 'audit_logs', ['created_at'], None),
+    ('ix_audit_logs_username_created_at', 'audit_logs', ['username', 'created_at'], None),
+]
+
+
+def upgrade():
+    # Built concurrently so live sales/payment writes are not blocked while
+    # the indexes are created on large tables.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,53 @@
+"""add loan installment schedules
+
+Revision ID: d9f1b3c5e7a0
+Revises: c8e0a2b4d6f7
+Create Date: 2026-04-10 09:00:00.000000
+
+Existing loans get their schedules from ``flask loan-schedules-rebuild``;
+the schedule and payment allocation rules live in app.utils.loan_schedule.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f1b3c5e7a0'
+down_revision = 'c8e0a2b4d6f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'loan_installments',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('loan_id', sa.Integer(), nullable=True),
+        sa.Column('group_loan_id', sa.Integer(), nullable=True),
+        sa.Column('installment_no', sa.Integer(), nullable=False),
+        sa.Column('due_date', sa.Date(), nullable=False),
+        sa.Column('principal_due', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('interest_due', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('amount_due', sa.Numeric(12, 2), nullable=False),
+        sa.Column('amount_paid', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('paid_date', sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(['loan_id'], ['loans.id']),
+        sa.ForeignKeyConstraint(['group_loan_id'], ['group_loans.id']),
+        sa.CheckConstraint('(loan_id IS NULL) <> (group_loan_id IS NULL)', name='ck_loan_installments_owner'),
+    )
+    op.create_index('ix_loan_installments_due_date_status', 'loan_installments', ['due_date', 'status'])
+    op.create_index(
+        'ix_loan_installments_open_due_date', 'loan_installments', ['due_date'],
+        postgresql_where=sa.text("status <> 'paid'"),
+    )
+    op.create_index('ix_loan_installments_loan_id', 'loan_installments', ['loan_id', 'installment_no'])
+    op.create_index('ix_loan_installments_group_loan_id', 'loan_installments', ['group_loan_id', 'installment_no'])
+
+
+def downgrade():
+    op.drop_index('ix_loan_installments_group_loan_id', table_name='loan_installments')
+    op.drop_index('ix_loan_installments_loan_id', table_name='loan_installments')
+    op.drop_index('ix_loan_installments_open_due_date', table_name='loan_installments')
+    op.drop_index('ix_loan_installments_due_date_status', table_name='loan_installments')
+    op.drop_table('loan_installments')
@@ -0,0 +1,42 @@
+"""add daily portfolio-at-risk snapshots
+
+Revision ID: e3a5c7e9f1b2
+Revises: d9f1b3c5e7a0
+Create Date: 2026-04-10 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a5c7e9f1b2'
+down_revision = 'd9f1b3c5e7a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'portfolio_snapshots',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('loan_type', sa.String(length=20), nullable=False),
+        sa.Column('loan_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('outstanding', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('arrears_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('par1_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('par1_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('par7_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('par7_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('par30_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('par30_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('par90_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('par90_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('snapshot_date', 'loan_type', name='uq_portfolio_snapshot_date_type'),
+    )
+
+
+def downgrade():
+    op.drop_table('portfolio_snapshots')
@@ -0,0 +1,40 @@
+"""add sequences for sale and hire reference numbers
+
+Revision ID: e8a1c3d5f7b9
+Revises: d3f5b7c9e1a2
+Create Date: 2026-04-07 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a1c3d5f7b9'
+down_revision = 'd3f5b7c9e1a2'
+branch_labels = None
+depends_on = None
+
+
+# (sequence, table, reference prefix)
+REFERENCE_SEQUENCES = [
+    ('boutique_sale_ref_seq', 'boutique_sales', 'DNV-B-'),
+    ('boutique_hire_ref_seq', 'boutique_hires', 'DNV-HR-'),
+    ('hardware_sale_ref_seq', 'hardware_sales', 'DNV-H-'),
+]
+
+
+def upgrade():
+    for sequence, table, prefix in REFERENCE_SEQUENCES:
+        op.execute(sa.schema.CreateSequence(sa.Sequence(sequence)))
+        # Continue numbering after the highest reference already issued.
+        op.execute(sa.text(
+            f"SELECT setval('{sequence}', COALESCE(MAX(CAST(substring(reference_number FROM '([0-9]+)$') AS BIGINT)), 1), "
+            f"MAX(reference_number) IS NOT NULL) "
+            f"FROM {table} WHERE reference_number LIKE :pattern"
+        ).bindparams(pattern=f'{prefix}%'))
+
+
+def downgrade():
+    for sequence, _table, _prefix in reversed(REFERENCE_SEQUENCES):
+        op.execute(sa.schema.DropSequence(sa.Sequence(sequence)))
@@ -0,0 +1,53 @@
+"""add background jobs table
+
+Revision ID: f2b4d6a8c0e3
+Revises: e8a1c3d5f7b9
+Create Date: 2026-04-08 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b4d6a8c0e3'
+down_revision = 'e8a1c3d5f7b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('dedupe_key', sa.String(length=150), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        'ix_background_jobs_claim', 'background_jobs', ['status', 'run_after'],
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.create_index(
+        'uq_background_jobs_active_dedupe', 'background_jobs', ['dedupe_key'], unique=True,
+        postgresql_where=sa.text("dedupe_key IS NOT NULL AND status IN ('queued', 'running')"),
+    )
+
+
+def downgrade():
+    op.drop_index('uq_background_jobs_active_dedupe', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_claim', table_name='background_jobs')
+    op.drop_table('background_jobs')
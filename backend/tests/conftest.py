@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+# app.config resolves the database URL when it is imported, and every app
+# module imports it. Pure unit tests only need the modules importable, so
+# point it at a placeholder that nothing connects to; tests that need
+# PostgreSQL use the ``app`` fixture, which skips without a real database.
+DATABASE_CONFIGURED = bool(
+    os.getenv('DATABASE_URL') or (os.getenv('PGUSER') and os.getenv('PGDATABASE'))
+)
+if not DATABASE_CONFIGURED:
+    os.environ['DATABASE_URL'] = 'postgresql://unconfigured@localhost/unconfigured'
+
+
+@pytest.fixture(scope='session')
+def app():
+    """An app bound to the PostgreSQL database in ``DATABASE_URL``.
+
+    Tests that use it are skipped when no database is configured or reachable.
+    """
+    if not DATABASE_CONFIGURED:
+        pytest.skip('DATABASE_URL is not set')
+
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app
+    from app.config import Config
+    from app.extensions import db
+
+    class TestConfig(Config):
+        TESTING = True
+        JOBS_EMBEDDED_WORKER = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        try:
+            db.session.execute(text('SELECT 1'))
+        except OperationalError as exc:
+            pytest.skip(f'PostgreSQL is not reachable: {exc}')
+        finally:
+            db.session.remove()
+    return app
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
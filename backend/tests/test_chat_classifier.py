@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.utils import chat_engine
+from app.utils.chat_engine import classify_message, extract_parameters
+
+TODAY = date(2026, 10, 17)
+YESTERDAY = TODAY - timedelta(days=1)
+
+
+@pytest.fixture(autouse=True)
+def fixed_today(monkeypatch):
+    monkeypatch.setattr(chat_engine, 'get_local_today', lambda: TODAY)
+
+
+@pytest.mark.parametrize('message, intent, params', [
+    ('How much stock do I have right now?', 'inventory_overview', {}),
+    ('How much stock do I have in Mbale branch?', 'inventory_overview', {'branch': 'B'}),
+    ('How much stock is in Kapchorwa?', 'inventory_overview', {'branch': 'K'}),
+    ('Which stock items need restocking?', 'low_stock', {}),
+    ('low stock in Mbale', 'low_stock', {'branch': 'B'}),
+    ('Show all overdue loans', 'overdue_loans', {}),
+    ('Show overdue loans in Mbale', 'overdue_loans', {'branch': 'B'}),
+    ('loans over 1m overdue', 'overdue_loans', {'amount': 1_000_000}),
+    ('show me loans above 500k', 'loan_search', {'amount': 500_000}),
+    ("Summarise yesterday's performance by section", 'yesterday_summary', {'date': YESTERDAY}),
+    ('Mbale sales yesterday', 'yesterday_summary', {'date': YESTERDAY, 'branch': 'B'}),
+    ('Compare boutique branches this week', 'branch_comparison', {'days': 7}),
+    ('Compare branches over the last 30 days', 'branch_comparison', {'days': 30}),
+    ('Who logged in yesterday and what did they do?', 'user_activity', {'date': YESTERDAY}),
+    ('who made the biggest sales yesterday', 'top_transactions', {'date': YESTERDAY}),
+    ('biggest sales in Kapchorwa on 2026-10-01', 'top_transactions', {'date': date(2026, 10, 1), 'branch': 'K'}),
+    ('top transactions last 30 days', 'top_transactions', {'days': 30}),
+    ('Any pending inquiries?', 'pending_inquiries', {}),
+    ('Explain projections', 'projection_guidance', {}),
+    ('hello there', 'general', {}),
+])
+def test_classify_message(message, intent, params):
+    result = classify_message(message)
+    assert result['intent'] == intent
+    assert result['params'] == params
+
+
+@pytest.mark.parametrize('message, params', [
+    ('sales today', {'date': TODAY}),
+    ('sales the day before yesterday', {'date': TODAY - timedelta(days=2)}),
+    ('loans over UGX 2,500,000', {'amount': 2_500_000}),
+    ('loans over 1.5 million this month', {'amount': 1_500_000, 'days': 30}),
+    ('activity on 2026-02-30', {}),
+])
+def test_extract_parameters(message, params):
+    assert extract_parameters(message) == params
+
+
+def test_repeated_matches_of_a_rule_score_once():
+    ranked = dict(classify_message('Mbale branch, Kapchorwa branch: how much stock do we have?')['ranked'])
+    assert ranked['branch_comparison'] == 2
+    assert ranked['inventory_overview'] > ranked['branch_comparison']
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.utils.chat_engine import INTENT_HANDLERS, INTENT_QUERY_BUDGETS
+
+ROWS_PER_TABLE = 4
+
+
+@pytest.fixture
+def seeded_books(app_context):
+    """Several rows in every table a handler reads, rolled back afterwards.
+
+    An N+1 loop issues no extra queries over an empty table, so the budgets
+    are only meaningful with more than one row to iterate.
+    """
+    from app.extensions import db
+    from app.models.boutique import BoutiqueSale, BoutiqueStock
+    from app.models.finance import GroupLoan, GroupLoanPayment, Loan, LoanClient, LoanPayment
+    from app.models.hardware import HardwareSale, HardwareStock
+    from app.models.user import AuditLog
+    from app.models.website import WebsiteLoanInquiry, WebsiteOrderRequest
+    from app.utils.timezone import get_local_now, get_local_today
+
+    today = get_local_today()
+    yesterday = today - timedelta(days=1)
+    overdue_since = today - timedelta(days=30)
+    money = Decimal('900000')
+
+    for index in range(ROWS_PER_TABLE):
+        branch = 'K' if index % 2 else 'B'
+        client = LoanClient(name=f'Budget client {index}', phone=f'07000000{index:02d}')
+        db.session.add(client)
+        db.session.flush()
+        loan = Loan(
+            client_id=client.id, principal=money, interest_rate=Decimal('10'), interest_amount=Decimal('90000'),
+            total_amount=money + Decimal('90000'), amount_paid=Decimal('0'), balance=money + Decimal('90000'),
+            duration_weeks=4, issue_date=overdue_since - timedelta(days=28), due_date=overdue_since,
+            status='overdue',
+        )
+        group = GroupLoan(
+            group_name=f'Budget group {index}', member_count=5, principal=money, total_amount=money,
+            amount_per_period=money / 4, total_periods=4, balance=money, amount_paid=Decimal('0'),
+            issue_date=overdue_since - timedelta(days=120), due_date=overdue_since, status='overdue',
+        )
+        db.session.add_all([loan, group])
+        db.session.flush()
+        db.session.add_all([
+            LoanPayment(loan_id=loan.id, payment_date=yesterday, amount=Decimal('1000'), balance_after=loan.balance),
+            GroupLoanPayment(group_loan_id=group.id, payment_date=yesterday, amount=Decimal('1000'),
+                             balance_after=group.balance),
+            BoutiqueStock(item_name=f'Budget dress {index}', quantity=1, initial_quantity=10, low_stock_threshold=5,
+                          cost_price=Decimal('1000'), min_selling_price=Decimal('1500'),
+                          max_selling_price=Decimal('2000'), branch=branch, is_active=True),
+            HardwareStock(item_name=f'Budget nails {index}', quantity=1, initial_quantity=10, low_stock_threshold=5,
+                          cost_price=Decimal('1000'), min_selling_price=Decimal('1500'),
+                          max_selling_price=Decimal('2000'), is_active=True),
+            BoutiqueSale(reference_number=f'BUDGET-B-{index}', sale_date=yesterday, branch=branch,
+                         payment_type='full', total_amount=money, amount_paid=money),
+            HardwareSale(reference_number=f'BUDGET-H-{index}', sale_date=yesterday,
+                         payment_type='full', total_amount=money, amount_paid=money),
+            AuditLog(username=f'budget_user_{index}', section='boutique', action='create', entity='sale',
+                     created_at=get_local_now() - timedelta(days=1)),
+            WebsiteLoanInquiry(full_name=f'Budget lead {index}', phone='0700000000', email='lead@example.com',
+                               requested_amount='500000', loan_type='individual', status='new', is_active=True),
+            WebsiteOrderRequest(customer_name=f'Budget buyer {index}', customer_phone='0700000000',
+                                items=[], status='new', is_active=True),
+        ])
+    db.session.flush()
+    try:
+        yield
+    finally:
+        db.session.rollback()
+
+
+def test_every_intent_has_a_query_budget():
+    assert set(INTENT_HANDLERS) == set(INTENT_QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize('params', [{}, {'branch': 'B'}], ids=['all', 'branch'])
+@pytest.mark.parametrize('intent', sorted(INTENT_HANDLERS))
+def test_intent_handler_stays_within_query_budget(seeded_books, intent, params):
+    from app.extensions import db
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        data = INTENT_HANDLERS[intent](params)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) <= INTENT_QUERY_BUDGETS[intent], '\n\n'.join(statements)
+    if intent != 'projection_guidance':
+        assert data.get('items') or data.get('total'), f'{intent} found none of the seeded rows'
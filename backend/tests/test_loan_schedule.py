@@ -0,0 +1,165 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.models.finance import LoanInstallment
+from app.utils import loan_schedule
+from app.utils.loan_schedule import allocate_payments, group_schedule, individual_schedule
+
+
+def _accrual_loan(**overrides):
+    values = dict(
+        principal=Decimal('1000000'),
+        interest_mode='monthly_accrual',
+        monthly_interest_amount=Decimal('100000'),
+        interest_amount=Decimal('0'),
+        amount_paid=Decimal('0'),
+        balance=Decimal('1000000'),
+        duration_weeks=3,
+        duration_type='months',
+        issue_date=date(2026, 1, 1),
+        due_date=date(2026, 4, 1),
+        status='active',
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def _flat_loan(weeks, **overrides):
+    values = dict(
+        principal=Decimal('1000000'),
+        interest_mode='flat_rate',
+        interest_amount=Decimal('100000'),
+        duration_weeks=weeks,
+        duration_type='weeks',
+        issue_date=date(2026, 1, 1),
+        due_date=date(2026, 1, 1) + timedelta(weeks=weeks),
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.added = []
+        self.deleted = []
+
+    def add(self, row):
+        self.added.append(row)
+
+    def delete(self, row):
+        self.deleted.append(row)
+
+
+def _sync(monkeypatch, rows, schedule, payments=(), amount_paid=0):
+    session = _RecordingSession()
+    monkeypatch.setattr(loan_schedule, 'db', SimpleNamespace(session=session))
+    existing = SimpleNamespace(order_by=lambda *_columns: SimpleNamespace(all=lambda: list(rows)))
+    loan_schedule._sync(existing, {'loan_id': 1}, schedule, list(payments), amount_paid)
+    return session
+
+
+def _allocate(schedule, payments, amount_paid):
+    amounts_due = [principal_due + interest_due for _, principal_due, interest_due in schedule]
+    return allocate_payments(amounts_due, payments, amount_paid)
+
+
+def test_accrual_schedule_charges_every_month_of_the_term():
+    schedule = individual_schedule(_accrual_loan(), as_of_date=date(2026, 1, 15))
+
+    assert [day for day, _, _ in schedule] == [date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)]
+    assert sum(interest for _, _, interest in schedule) == Decimal('300000')
+    assert schedule[-1][1] == Decimal('1000000')
+
+
+def test_accrual_early_payoff_settles_every_installment():
+    payoff = date(2026, 2, 5)
+    loan = _accrual_loan(amount_paid=Decimal('1100000'), interest_amount=Decimal('100000'),
+                         balance=Decimal('0'), status='paid')
+
+    schedule = individual_schedule(loan, as_of_date=date(2026, 6, 1), paid_off_on=payoff)
+
+    assert schedule == [
+        (date(2026, 2, 1), Decimal('0'), Decimal('100000.00')),
+        (payoff, Decimal('1000000.00'), Decimal('0')),
+    ]
+    allocation = _allocate(schedule, [(payoff, Decimal('1100000'))], loan.amount_paid)
+    assert [status for _, status, _ in allocation] == ['paid', 'paid']
+    assert [paid_date for _, _, paid_date in allocation] == [payoff, payoff]
+
+
+def test_accrual_schedule_extends_past_maturity_while_unpaid():
+    loan = _accrual_loan(balance=Decimal('1500000'))
+
+    schedule = individual_schedule(loan, as_of_date=date(2026, 6, 10))
+
+    assert len(schedule) == 5
+    assert schedule[2] == (date(2026, 4, 1), Decimal('1000000.00'), Decimal('100000.00'))
+
+
+def test_payments_settle_oldest_installments_first():
+    allocation = allocate_payments(
+        [Decimal('100'), Decimal('100'), Decimal('100')],
+        [(date(2026, 1, 10), Decimal('150'))],
+        Decimal('150'),
+    )
+
+    assert allocation == [
+        (Decimal('100'), 'paid', date(2026, 1, 10)),
+        (Decimal('50'), 'partial', None),
+        (Decimal('0'), 'pending', None),
+    ]
+
+
+def test_group_schedule_splits_the_total_over_every_period():
+    group = SimpleNamespace(
+        issue_date=date(2026, 1, 1), created_at=None, total_periods=3, period_type='monthly',
+        due_date=date(2026, 4, 1), principal=Decimal('1000000'), total_amount=Decimal('1200000'),
+    )
+
+    schedule = group_schedule(group)
+
+    assert [day for day, _, _ in schedule] == [date(2026, 1, 31), date(2026, 3, 2), date(2026, 4, 1)]
+    assert [principal for _, principal, _ in schedule] == [Decimal('333333.33'), Decimal('333333.33'),
+                                                          Decimal('333333.34')]
+    assert sum(principal + interest for _, principal, interest in schedule) == Decimal('1200000')
+
+
+def test_group_schedule_sums_to_total_when_principal_exceeds_it():
+    group = SimpleNamespace(
+        issue_date=date(2026, 1, 1), created_at=None, total_periods=4, period_type='weekly',
+        due_date=None, principal=Decimal('1000000'), total_amount=Decimal('900000'),
+    )
+
+    schedule = group_schedule(group)
+
+    assert [day for day, _, _ in schedule][-1] == date(2026, 1, 29)
+    assert all(interest == 0 for _, _, interest in schedule)
+    assert sum(principal for _, principal, _ in schedule) == Decimal('900000')
+
+
+def test_sync_reuses_rows_and_deletes_the_rest_when_the_term_shrinks(monkeypatch):
+    session = _sync(monkeypatch, [], individual_schedule(_flat_loan(4)))
+    rows = session.added
+    assert [row.installment_no for row in rows] == [1, 2, 3, 4]
+    assert all(isinstance(row, LoanInstallment) and row.loan_id == 1 for row in rows)
+
+    shorter = individual_schedule(_flat_loan(2))
+    session = _sync(monkeypatch, rows, shorter, [(date(2026, 1, 8), Decimal('550000'))], Decimal('550000'))
+
+    assert session.added == []
+    assert session.deleted == rows[2:]
+    assert [(row.due_date, row.amount_due, row.status) for row in rows[:2]] == [
+        (date(2026, 1, 8), Decimal('550000.00'), 'paid'),
+        (date(2026, 1, 15), Decimal('550000.00'), 'pending'),
+    ]
+
+
+def test_sync_adds_rows_when_the_term_grows(monkeypatch):
+    rows = _sync(monkeypatch, [], individual_schedule(_flat_loan(2))).added
+
+    session = _sync(monkeypatch, rows, individual_schedule(_flat_loan(3)))
+
+    assert session.deleted == []
+    assert [row.installment_no for row in session.added] == [3]
+    assert rows[1].due_date == date(2026, 1, 15)